@@ -0,0 +1,212 @@
+import os
+import sys
+import zlib
+import struct
+import random
+import argparse
+
+# Synthetic mods for benchmarks, every generated mod passes validation, --check-assets included
+# Layout: <directory>/mystery/mystery.ito with events/, enemies/, img/ and sounds/ next to it, linked as "mystery\..." like real mods
+
+MOD_DIR = "mystery"
+
+TRIGGER_SLOTS = ['winnumbera', 'winnumberb', 'winnumberc', 'failnumbera', 'failnumberb', 'failnumberc']
+FORCED_EVENT_KEYS = ['one_frc', 'two_frc', 'thr_frc', 'fou_frc', 'fiv_frc', 'six_frc', 'sev_frc', 'eig_frc', 'nin_frc', 'ten_frc']
+
+ITEMS = ["BASEBALL BAT", "BANDAGE", "BACKPACK", "ANATOMY BOOK", "BRANCH", "BRICK"]
+LOCATIONS = ["school", "seaside", "mansion", "downtown", "hospital", "forest", "village"]
+CHARACTERS = ["kirie", "aiko", "haru", "mizuki", "kouji", "mimi"]
+ENEMY_TYPES = ["human", "monster", "ghost", "eldritch", "undead"]
+DAMAGE_TYPES = ["STA", "REA"]
+WEAKNESSES = ["blunt", "sharp", "fire", "magic"]
+
+ASSETS_PER_DIRECTORY = 50
+# Events take turns loading these, so both sound formats are checked
+SOUNDS = ["sounds/sfx0.wav", "sounds/sfx1.ogg"]
+
+# Shape of a generated mod, see generate_mod
+class CorpusShape:
+
+    def __init__(self, events=20, chain_depth=0, fanout_depth=0, shared_enemies=1, assets=10, oversized_lines=0, seed=0):
+        # Events forced by the mystery or hanging below them, one winnumberb link each
+        self.events = events
+        # Length of a linear trigger_event chain
+        self.chain_depth = chain_depth
+        # Levels of events triggering six events each through winnumbera/b/c and failnumbera/b/c
+        self.fanout_depth = fanout_depth
+        # Enemies triggered from every event, so all of them share the same few files
+        self.shared_enemies = shared_enemies
+        # Images spread over nested img/ directories, events and enemies reference some of them
+        self.assets = assets
+        # Extra description lines in every event
+        self.oversized_lines = oversized_lines
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+# 1x1 RGBA image: signature, IHDR, a single IDAT and IEND
+def png_bytes():
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', 1, 1, 8, 6, 0, 0, 0)
+    # Filter byte, then one transparent pixel
+    pixels = zlib.compress(b'\x00\x00\x00\x00\x00')
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', pixels) + chunk(b'IEND', b'')
+
+# Mono 16-bit PCM, 22050 Hz, a few samples of silence
+def wav_bytes():
+    samples = b'\x00\x00' * 16
+    fmt = struct.pack('<HHIIHH', 1, 1, 22050, 22050 * 2, 2, 16)
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', len(samples)) + samples
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+# CRC of Ogg pages: polynomial 0x04c11db7, not reflected, no final xor
+def ogg_crc(data):
+    crc = 0
+    for byte in data:
+        crc ^= byte << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04c11db7 if crc & 0x80000000 else crc << 1) & 0xffffffff
+    return crc
+
+# First page of a Vorbis stream, holding the identification header: mono, 22050 Hz, block sizes 256 and 2048
+def ogg_bytes():
+    packet = b'\x01vorbis' + struct.pack('<IBIiiiBB', 0, 1, 22050, 0, 64000, 0, 0xb8, 1)
+    # Version 0, beginning of stream, granule position 0, serial number 1, page 0, a single segment
+    page = b'OggS' + struct.pack('<BBqIIIB', 0, 0x02, 0, 1, 0, 0, 1) + bytes([len(packet)]) + packet
+    crc = ogg_crc(page)
+    return page[:22] + struct.pack('<I', crc) + page[26:]
+
+def link(path):
+    return MOD_DIR + "\\" + path.replace('/', '\\')
+
+def write_ito(filepath, header, entries):
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    lines = [header] + [f'{key}="{value}"' for key, value in entries]
+    with open(filepath, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+
+# Writes a mod of given shape into directory
+# Returns (mystery file path, mod_root, number of .ito files)
+def generate_mod(directory, shape):
+    rng = random.Random(shape.seed)
+    mod_root = os.path.join(directory, MOD_DIR)
+
+    assets = []
+    for number in range(max(shape.assets, 1)):
+        group = number // ASSETS_PER_DIRECTORY
+        path = f"img/set{group // ASSETS_PER_DIRECTORY:03}/group{group:03}/pic{number:05}.png"
+        assets.append(path)
+        os.makedirs(os.path.join(mod_root, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(mod_root, path), 'wb') as file:
+            file.write(png_bytes())
+
+    for path in SOUNDS:
+        os.makedirs(os.path.join(mod_root, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(mod_root, path), 'wb') as file:
+            file.write(wav_bytes() if path.endswith('.wav') else ogg_bytes())
+
+    enemies = [f"enemies/m{number:04}.ito" for number in range(shape.shared_enemies)]
+    for number, path in enumerate(enemies):
+        write_ito(os.path.join(mod_root, path), "[enemy]", [
+            ('name', f"Enemy {number}"),
+            ('art01', link(rng.choice(assets))),
+            ('prize_name', rng.choice(ITEMS)),
+            ('weakness', rng.choice(WEAKNESSES)),
+            ('location', rng.choice(LOCATIONS)),
+            ('type', rng.choice(ENEMY_TYPES)),
+            ('damagetype', rng.choice(DAMAGE_TYPES)),
+        ])
+
+    # Event path -> {slot: linked path}, written once every link is known
+    events = {}
+    counter = [0]
+
+    def new_event(prefix):
+        path = f"events/{prefix}{counter[0]:05}.ito"
+        counter[0] += 1
+        events[path] = {}
+        return path
+
+    roots = []
+    if shape.chain_depth:
+        chain = [new_event("chain") for _ in range(shape.chain_depth)]
+        for parent, child in zip(chain, chain[1:]):
+            events[parent]['winnumberb'] = child
+        roots.append(chain[0])
+
+    if shape.fanout_depth:
+        level = [new_event("fan")]
+        roots.append(level[0])
+        for _ in range(shape.fanout_depth):
+            next_level = []
+            for parent in level:
+                for slot in TRIGGER_SLOTS:
+                    child = new_event("fan")
+                    events[parent][slot] = child
+                    next_level.append(child)
+            level = next_level
+
+    # Plain events fill the remaining forced slots, the rest hang below them
+    plain = [new_event("e") for _ in range(shape.events)]
+    forced_count = max(len(FORCED_EVENT_KEYS) - len(roots), 1)
+    roots += plain[:forced_count]
+    for number in range(forced_count, len(plain)):
+        events[plain[number - forced_count]]['winnumberb'] = plain[number]
+
+    for index, (path, links) in enumerate(events.items()):
+        entries = [
+            ('name', f"Event {path}"),
+            ('image', link(rng.choice(assets))),
+            ('location', rng.choice(LOCATIONS)),
+            ('character', rng.choice(CHARACTERS)),
+            ('load_sound', link(SOUNDS[index % len(SOUNDS)])),
+        ]
+        for slot in TRIGGER_SLOTS:
+            prize_key = slot.replace('number', 'prize')
+            if slot in links:
+                entries += [(prize_key, "trigger_event"), (slot, link(links[slot]))]
+            elif slot == 'winnumbera':
+                entries += [(prize_key, "item"), (slot, rng.choice(ITEMS))]
+            elif slot == 'failnumbera' and enemies:
+                # Every event triggers one of a few enemies, the same files are reached along many paths
+                entries += [(prize_key, "trigger_enemy"), (slot, link(rng.choice(enemies)))]
+        for number in range(shape.oversized_lines):
+            entries.append((f'description{number:05}', "The corridor stretches on, lit by a single flickering lamp."))
+        write_ito(os.path.join(mod_root, path), "[event]", entries)
+
+    mystery_path = os.path.join(mod_root, "mystery.ito")
+    entries = [
+        ('name', "Synthetic benchmark mystery"),
+        ('art', assets[0]),
+        ('end_img', assets[-1]),
+        ('mystery_sound', "theme"),
+    ]
+    for key, path in zip(FORCED_EVENT_KEYS, roots):
+        entries.append((key, link(path)))
+    write_ito(mystery_path, "[mystery]", entries)
+
+    return mystery_path, mod_root, len(events) + len(enemies) + 1
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic mod for benchmarking the validator.')
+    parser.add_argument('directory', type=str, help='Directory to write the mod to, the mystery is placed in its "mystery" subdirectory')
+    parser.add_argument('--events', type=int, default=20, help='Optional number of plain events, defaults to 20')
+    parser.add_argument('--chain-depth', type=int, default=0, help='Optional length of a linear trigger_event chain')
+    parser.add_argument('--fanout-depth', type=int, default=0, help='Optional levels of events triggering six events each')
+    parser.add_argument('--shared-enemies', type=int, default=1, help='Optional number of enemies triggered by all events, defaults to 1')
+    parser.add_argument('--assets', type=int, default=10, help='Optional number of image files, defaults to 10')
+    parser.add_argument('--oversized-lines', type=int, default=0, help='Optional number of extra lines in every event')
+    parser.add_argument('--seed', type=int, default=0, help='Optional random seed, defaults to 0')
+
+    args = parser.parse_args()
+
+    shape = CorpusShape(args.events, args.chain_depth, args.fanout_depth, args.shared_enemies, args.assets, args.oversized_lines, args.seed)
+    mystery_path, mod_root, file_count = generate_mod(args.directory, shape)
+    print(f"Generated {file_count} .ito files, validate with:")
+    print(f'python validate.py "{mystery_path}"')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+import contextlib
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+import validate_mystery
+import validate_event
+import validate_enemy
+from corpus import CorpusShape, generate_mod, MOD_DIR
+from scripts.ito_document import parse_ito
+from scripts.file_system import FileSystemIndex
+from scripts.mod_graph import MYSTERY, EVENT, ENEMY, LINKED, HEADERS, find_forced_events, discover_linked_files
+from scripts.config_registry import load_mod_dir_requirements
+from scripts.diagnostics import DiagnosticCollector
+from scripts.reporters import Reporter, NullStream
+from scripts.check_quotes import check_quotes
+from scripts.check_no_duplicate_keys import check_no_duplicate_keys
+from scripts.check_keys_and_values import check_key_value_rules
+from scripts.check_prizes import check_prize_rules
+from scripts.check_asset_references import check_asset_references
+from scripts.check_music_references import check_music_references
+from scripts.check_trigger_references import check_trigger_references
+
+CONFIG_PATH = validate_event.CONFIG_PATH
+
+# Scenario name -> shape at scale 1, each one stresses a different part of validation
+SCENARIOS = {
+    'many-events': CorpusShape(events=500),
+    'deep-chain': CorpusShape(events=0, chain_depth=300),
+    'wide-fanout': CorpusShape(events=0, fanout_depth=3),
+    'diamond-enemies': CorpusShape(events=300, shared_enemies=5),
+    'large-assets': CorpusShape(events=100, assets=20000),
+    'oversized-files': CorpusShape(events=50, oversized_lines=5000),
+}
+
+# Counts files validated, validators report every file they finish to their collector
+class CountingReporter(Reporter):
+
+    def __init__(self):
+        super().__init__(NullStream())
+        self.file_count = 0
+
+    def file(self, path, kind, valid, message):
+        self.file_count += 1
+
+def scaled(shape, scale):
+    values = shape.to_dict()
+    for name in ('events', 'chain_depth', 'assets', 'oversized_lines'):
+        values[name] = int(values[name] * scale)
+    return CorpusShape(**values)
+
+# Runs function repeat times, then once more to measure peak memory
+# function returns the number of files it processed
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        file_count = function()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        'files': file_count,
+        'min_seconds': min(timings),
+        'median_seconds': median,
+        'files_per_second': file_count / median if median else None,
+        'peak_memory_kib': peak // 1024,
+    }
+
+# Validators as run by their command line tools, including building the index of mod_root
+def validator_benchmarks(mystery_path, mod_root, documents):
+    mod_dir = MOD_DIR + os.sep
+    first_event = documents[EVENT][0].filepath if documents[EVENT] else None
+    first_enemy = documents[ENEMY][0].filepath if documents[ENEMY] else None
+
+    def run(validate, filepath):
+        reporter = CountingReporter()
+        validate(filepath, mod_dir, mod_root, print_info=False, fs=FileSystemIndex(mod_root), diagnostics=DiagnosticCollector(reporter=reporter))
+        return reporter.file_count
+
+    benchmarks = {'validate_mystery': lambda: run(validate_mystery.validate_mystery, mystery_path)}
+    if first_event:
+        benchmarks['validate_event'] = lambda: run(validate_event.validate_event, first_event)
+    if first_enemy:
+        benchmarks['validate_enemy'] = lambda: run(validate_enemy.validate_enemy, first_enemy)
+    return benchmarks
+
+# Every function in scripts/ on its own, applied to each parsed document it applies to
+def script_benchmarks(mystery_path, mod_root, documents):
+    mod_dir = MOD_DIR + os.sep
+    fs = FileSystemIndex(mod_root)
+    paths = [document.filepath for kind in (MYSTERY, EVENT, ENEMY) for document in documents[kind]]
+    every_document = [document for kind in (MYSTERY, EVENT, ENEMY) for document in documents[kind]]
+    events = documents[EVENT]
+
+    allowed_duplicates = {
+        MYSTERY: os.path.join(CONFIG_PATH, validate_mystery.ALLOWED_DUPLICATE_KEYS),
+        EVENT: os.path.join(CONFIG_PATH, validate_event.ALLOWED_DUPLICATE_KEYS),
+        ENEMY: os.path.join(CONFIG_PATH, validate_enemy.ALLOWED_DUPLICATE_KEYS),
+    }
+    asset_keys = {
+        MYSTERY: os.path.join(CONFIG_PATH, validate_mystery.ASSET_KEYS),
+        EVENT: os.path.join(CONFIG_PATH, validate_event.ASSET_KEYS),
+        ENEMY: os.path.join(CONFIG_PATH, validate_enemy.ASSET_KEYS),
+    }
+    key_value_rules = {
+        EVENT: os.path.join(CONFIG_PATH, validate_event.KEY_VALUE_RULES),
+        ENEMY: os.path.join(CONFIG_PATH, validate_enemy.KEY_VALUE_RULES),
+    }
+    mystery_triggers = os.path.join(CONFIG_PATH, validate_mystery.TRIGGER_KEYS)
+
+    def for_each(documents_to_check, check):
+        for document in documents_to_check:
+            check(document)
+        return len(documents_to_check)
+
+    def by_kind(kinds, check):
+        count = 0
+        for kind in kinds:
+            count += for_each(documents[kind], lambda document: check(kind, document))
+        return count
+
+    def walk_linked_files():
+        mystery = documents[MYSTERY][0]
+        references = find_forced_events(mystery, mod_dir, mod_root, load_mod_dir_requirements(mystery_triggers))
+        event_triggers = load_mod_dir_requirements(os.path.join(CONFIG_PATH, validate_event.TRIGGER_KEYS))
+        return sum(1 for _, _, status, _ in discover_linked_files(references, mod_dir, mod_root, event_triggers, fs=fs) if status == LINKED)
+
+    return {
+        'file_system_index': lambda: len(FileSystemIndex(mod_root).paths),
+        'parse_ito': lambda: len([parse_ito(path) for path in paths]),
+        'discover_linked_files': walk_linked_files,
+        'check_quotes': lambda: for_each(every_document, check_quotes),
+        'check_no_duplicate_keys': lambda: by_kind((MYSTERY, EVENT, ENEMY), lambda kind, document: check_no_duplicate_keys(document, allowed_duplicates[kind])),
+        'check_key_value_rules': lambda: by_kind((EVENT, ENEMY), lambda kind, document: check_key_value_rules(document, key_value_rules[kind])),
+        'check_prize_rules': lambda: for_each(events, lambda document: check_prize_rules(document, os.path.join(CONFIG_PATH, validate_event.PRIZE_RULES))),
+        'check_asset_references': lambda: by_kind((MYSTERY, EVENT, ENEMY), lambda kind, document: check_asset_references(document, mod_dir, mod_root, asset_keys[kind], fs=fs)),
+        'check_music_references': lambda: for_each(documents[MYSTERY], lambda document: check_music_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, validate_mystery.MUSIC_KEYS), os.path.join(CONFIG_PATH, validate_mystery.MUSIC_VALUES), fs=fs)),
+        'check_trigger_references': lambda: for_each(events, lambda document: check_trigger_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, validate_event.TRIGGER_KEYS), fs=fs)),
+    }
+
+# Parsed .ito files of the generated mod grouped by type, in sorted path order
+def parse_corpus(mod_root):
+    documents = {MYSTERY: [], EVENT: [], ENEMY: []}
+    for directory, subdirectories, filenames in os.walk(mod_root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.ito'):
+                document = parse_ito(os.path.join(directory, filename))
+                documents[HEADERS[document.header]].append(document)
+    return documents
+
+def run_scenario(name, shape, directory, repeat):
+    mystery_path, mod_root, file_count = generate_mod(os.path.join(directory, name), shape)
+    documents = parse_corpus(mod_root)
+
+    results = {}
+    benchmarks = validator_benchmarks(mystery_path, mod_root, documents)
+    benchmarks.update(script_benchmarks(mystery_path, mod_root, documents))
+    for benchmark, function in benchmarks.items():
+        results[benchmark] = measure(function, repeat)
+        print_result(name, benchmark, results[benchmark])
+    return {'shape': shape.to_dict(), 'files': file_count, 'benchmarks': results}
+
+def print_result(scenario, benchmark, result, baseline=None):
+    line = f"{scenario:<17}{benchmark:<26}{result['files']:>7}{result['median_seconds'] * 1000:>11.1f}{result['files_per_second'] or 0:>12.0f}{result['peak_memory_kib']:>11}"
+    if baseline is not None:
+        line += f"{result['median_seconds'] / baseline['median_seconds']:>9.2f}x"
+    print(line)
+
+# Prints every benchmark found in both runs with its median time relative to the baseline
+def compare(results, baseline):
+    print()
+    print(f"Compared with {baseline['created']} (lower is faster):")
+    for scenario, scenario_results in results['scenarios'].items():
+        baseline_scenario = baseline['scenarios'].get(scenario)
+        if baseline_scenario is None:
+            continue
+        for benchmark, result in scenario_results['benchmarks'].items():
+            if benchmark in baseline_scenario['benchmarks']:
+                print_result(scenario, benchmark, result, baseline_scenario['benchmarks'][benchmark])
+
+def main():
+    parser = argparse.ArgumentParser(description='Time validators and every function in scripts/ on generated mods.')
+    parser.add_argument('--scenario', type=str, nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS), help='Optional scenarios to run, defaults to all')
+    parser.add_argument('--scale', type=float, default=1.0, help='Optional multiplier for the size of every scenario, defaults to 1')
+    parser.add_argument('--repeat', type=int, default=5, help='Optional number of timed runs of each benchmark, defaults to 5')
+    parser.add_argument('--output', type=str, default="", help='Optional JSON file to save results to')
+    parser.add_argument('--compare', type=str, default="", help='Optional JSON file saved by a previous run to compare with')
+    parser.add_argument('--corpus-dir', type=str, default="", help='Optional directory to keep generated mods in, a temporary directory by default')
+
+    args = parser.parse_args()
+
+    results = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'scenarios': {},
+    }
+
+    print(f"{'Scenario':<17}{'Benchmark':<26}{'Files':>7}{'Median ms':>11}{'Files/s':>12}{'Peak KiB':>11}")
+    with contextlib.ExitStack() as stack:
+        directory = args.corpus_dir if args.corpus_dir else stack.enter_context(tempfile.TemporaryDirectory())
+        for name in args.scenario:
+            results['scenarios'][name] = run_scenario(name, scaled(SCENARIOS[name], args.scale), directory, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(results, json.load(file))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
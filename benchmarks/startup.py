@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Smallest event that passes every check, so the run is almost entirely interpreter and import time
+TRIVIAL_EVENT = '[event]\nname="Startup benchmark"\n'
+
+# Runs command repeat times, returns wall clock time of each run in milliseconds
+def measure(command, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=REPO_PATH)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold start of validating a trivial event, as done by editor integrations on every save.')
+    parser.add_argument('--repeat', type=int, default=20, help='Optional number of runs, defaults to 20')
+    parser.add_argument('--budget-ms', type=float, default=80, help='Optional, fail if median time above the bare interpreter exceeds this many milliseconds, defaults to 80')
+    parser.add_argument('--command', type=str, nargs='+', default=None, help='Optional validator command to measure instead of the scripts, e.g. path to a PyInstaller build')
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        event_path = os.path.join(directory, 'event.ito')
+        with open(event_path, 'w', encoding='utf-8') as file:
+            file.write(TRIVIAL_EVENT)
+
+        command = args.command if args.command else [sys.executable, os.path.join(REPO_PATH, 'validate_event.py')]
+        command = command + [event_path, '--format', 'quiet']
+
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=REPO_PATH)
+        if result.returncode != 0:
+            print(f"Validation of the trivial event failed with exit code {result.returncode}")
+            print(result.stderr.decode('utf-8', 'replace'))
+            return 1
+
+        baseline = measure([sys.executable, '-c', 'pass'], args.repeat)
+        timings = measure(command, args.repeat)
+
+    baseline_median = statistics.median(baseline)
+    median = statistics.median(timings)
+    overhead = median - baseline_median
+    print(f"python -c pass:  min {min(baseline):.1f} ms, median {baseline_median:.1f} ms")
+    print(f"validate_event:  min {min(timings):.1f} ms, median {median:.1f} ms")
+    print(f"Validator overhead: {overhead:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if overhead > args.budget_ms:
+        print(f"Startup is over budget by {overhead - args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+import sys
+import argparse
+
+# PyInstaller check
+if getattr(sys, 'frozen', False):
+    application_path = sys._MEIPASS
+else:
+    application_path = os.path.dirname(os.path.abspath(__file__))
+
+CONFIG_PATH = os.path.join(application_path, 'config')
+
+from scripts.terminal import enable_colors
+from scripts.config_registry import available_languages
+from scripts.game_profile import available_game_versions, build_profile
+
+enable_colors()
+RED = '\033[31m'
+GREEN = '\033[32m'
+DARK_GRAY = '\033[90m'
+RESET = '\033[0m'
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile config tables of game versions into bundles loaded by the validators with a single read. Validators rebuild outdated bundles on their own, run this before building an executable.')
+    parser.add_argument('--game-version', type=str, nargs='*', default=None, choices=available_game_versions(CONFIG_PATH), help='Optional game versions to compile, by default all of them')
+    parser.add_argument('--lang', type=str, nargs='*', default=None, choices=available_languages(CONFIG_PATH), help='Optional languages to compile, by default all of them')
+
+    args = parser.parse_args()
+    game_versions = args.game_version if args.game_version else available_game_versions(CONFIG_PATH)
+    languages = args.lang if args.lang else available_languages(CONFIG_PATH)
+
+    failed = False
+    for game_version in game_versions:
+        for language in languages:
+            try:
+                profile, filepath = build_profile(CONFIG_PATH, game_version, language)
+            except Exception as e:
+                print(f"{RED}{game_version} ({language}): an error occurred: {str(e)}{RESET}")
+                failed = True
+                continue
+            if filepath is None:
+                print(f"{RED}{game_version} ({language}): bundle could not be written to '{CONFIG_PATH}'{RESET}")
+                failed = True
+                continue
+            print(f"{GREEN}{game_version} ({language}): {len(profile.tables)} tables -> {filepath}{RESET}")
+            print(f"{DARK_GRAY}   sha256 {profile.digest}{RESET}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
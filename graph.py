@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import argparse
+
+# PyInstaller check
+if getattr(sys, 'frozen', False):
+    application_path = sys._MEIPASS
+else:
+    application_path = os.path.dirname(os.path.abspath(__file__))
+
+CONFIG_PATH = os.path.join(application_path, 'config')
+
+from scripts.terminal import enable_colors
+from scripts.config_registry import load_mod_dir_requirements
+from scripts.file_system import FileSystemIndex
+from scripts.mod_graph import build_graph, relative_path
+
+FORCED_EVENT_KEYS = "mystery_trigger_keys.txt"
+TRIGGER_KEYS = "event_trigger_keys.txt"
+
+HUMAN = "human"
+DOT = "dot"
+JSON = "json"
+FORMATS = [HUMAN, DOT, JSON]
+
+enable_colors()
+RED = '\033[31m'
+GREEN = '\033[32m'
+YELLOW = '\033[33m'
+DARK_GRAY = '\033[90m'
+RESET = '\033[0m'
+
+def print_summary(graph, mod_root):
+
+    def name(identity):
+        return relative_path(graph.nodes[identity].path, mod_root)
+
+    missing = [identity for identity, node in graph.nodes.items() if not node.exists]
+    print(f"{len(graph.nodes) - len(missing)} files, {graph.edge_count()} references")
+
+    if missing:
+        print(f"{RED}Missing files:{RESET}")
+        for identity in missing:
+            sources = ', '.join(sorted({relative_path(reference.source, mod_root) for reference in graph.references_to(graph.nodes[identity].path)}))
+            print(f"{RED}   {name(identity)}{RESET} {DARK_GRAY}referenced from {sources}{RESET}")
+
+    cycles = graph.cycles()
+    if cycles:
+        print(f"{YELLOW}Trigger loops:{RESET}")
+        for cycle in cycles:
+            print(f"{YELLOW}   {' -> '.join(name(identity) for identity in cycle + cycle[:1])}{RESET}")
+    else:
+        print(f"{GREEN}No trigger loops.{RESET}")
+
+    chain = graph.longest_chain()
+    steps = [name(step[0]) if len(step) == 1 else '{' + ', '.join(name(identity) for identity in step) + '}' for step in chain]
+    print(f"Longest chain: {len(chain)} files")
+    if chain:
+        print(f"{DARK_GRAY}   {' -> '.join(steps)}{RESET}")
+
+    orphans = graph.orphans(mod_root)
+    if orphans:
+        print(f"{YELLOW}Not reached from any file given:{RESET}")
+        for path in orphans:
+            print(f"{YELLOW}   {relative_path(path, mod_root)}{RESET}")
+    else:
+        print(f"{GREEN}Every .ito file in mod_root is reached.{RESET}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the structure of a mod: which files trigger which, trigger loops, the longest chain and unreached files.')
+    parser.add_argument('ito_filepaths', type=str, nargs='+', help='Mystery, event or enemy .ito files the graph starts from, e.g. every mystery in mod_root')
+    parser.add_argument('--mod_dir', type=str, default="", help='Optional directory for mods of specific type, relative to WoH .exe location, e.g. "mystery\"')
+    parser.add_argument('--mod_root', type=str, default="", help='Optional directory from which paths will be built, defaults to location of the first .ito')
+    parser.add_argument('--format', type=str, default=HUMAN, choices=FORMATS, help='Optional output format: human (default) summary, dot (Graphviz) or json graph')
+    parser.add_argument('--output', type=str, default="", help='Optional file to write the output to instead of the terminal')
+
+    args = parser.parse_args()
+
+    ito_filepaths = [path.replace('\\', os.sep).replace('/', os.sep) for path in args.ito_filepaths]
+    mod_dir = args.mod_dir if args.mod_dir else "mystery" + os.sep
+    mod_root = args.mod_root if args.mod_root else os.path.dirname(ito_filepaths[0])
+    mod_dir = mod_dir.replace('\\', os.sep).replace('/', os.sep)
+    mod_root = mod_root.replace('\\', os.sep).replace('/', os.sep)
+
+    try:
+        graph = build_graph(ito_filepaths, mod_dir, mod_root,
+                            load_mod_dir_requirements(os.path.join(CONFIG_PATH, FORCED_EVENT_KEYS)),
+                            load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS)),
+                            FileSystemIndex(mod_root if mod_root else os.curdir))
+    except Exception as e:
+        print(f"{RED}An error occurred: {str(e)}{RESET}")
+        return 1
+
+    if args.format == HUMAN and not args.output:
+        print_summary(graph, mod_root)
+        return 0
+
+    if args.format == DOT:
+        text = graph.to_dot(mod_root)
+    elif args.format == JSON:
+        text = json.dumps(graph.to_dict(mod_root), indent=2) + "\n"
+    else:
+        parser.error("human output is only printed to the terminal, use --format dot or json with --output")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+import os
+import sys
+import json
+import time
+import argparse
+from urllib.parse import urlparse, unquote
+
+# PyInstaller check
+if getattr(sys, 'frozen', False):
+    application_path = sys._MEIPASS
+else:
+    application_path = os.path.dirname(os.path.abspath(__file__))
+
+CONFIG_PATH = os.path.join(application_path, 'config')
+
+import validate_mystery
+import validate_event
+import validate_enemy
+from woh_validator import normalize_path, DEFAULT_MOD_DIR
+from scripts.ito_document import ItoDocument
+from scripts.config_registry import select_profile, load_mod_dir_requirements, available_languages, DEFAULT_LANGUAGE
+from scripts.game_profile import available_game_versions, DEFAULT_GAME_VERSION
+from scripts.file_system import FileSystemIndex
+from scripts.mod_graph import MYSTERY, EVENT, ENEMY, HEADERS, read_kind, find_forced_events, find_triggered_files
+from scripts.diagnostics import Diagnostic, DiagnosticCollector, ERROR, PARSE_ERROR, FILE_NOT_FOUND, DUPLICATE_KEY, UNCLOSED_QUOTES
+from scripts.check_quotes import check_quotes
+
+# LSP constants
+TEXT_DOCUMENT_SYNC_FULL = 1
+SEVERITY_ERROR = 1
+SEVERITY_WARNING = 2
+METHOD_NOT_FOUND = -32601
+INVALID_REQUEST = -32600
+JSON_PARSE_ERROR = -32700
+SERVER_NOT_INITIALIZED = -32002
+
+SOURCE = "woh-validator"
+# Directories above a file searched for a mystery when the file lies outside every workspace folder
+MAX_MOD_ROOT_DEPTH = 5
+
+# Rules whose diagnostics point at the key of an entry, all others at its value
+KEY_RULES = {DUPLICATE_KEY}
+
+def config(filename):
+    return os.path.join(CONFIG_PATH, filename)
+
+# Runs every check of the document's own kind on the parsed buffer, linked files are only checked for existence
+# Same checks as validate_mystery, validate_event and validate_enemy run on a single file, without printing anything
+def check_document(document, kind, mod_dir, mod_root, fs, diagnostics):
+    if kind == MYSTERY:
+        validate_mystery.check_document(document, mod_dir, mod_root, fs, diagnostics, print_info=False)
+        references = find_forced_events(document, mod_dir, mod_root, load_mod_dir_requirements(config(validate_mystery.TRIGGER_KEYS)))
+    elif kind == EVENT:
+        validate_event.check_document(document, mod_dir, mod_root, fs, diagnostics, print_info=False)
+        references = find_triggered_files(document, mod_dir, mod_root, load_mod_dir_requirements(config(validate_event.TRIGGER_KEYS)))
+    elif kind == ENEMY:
+        validate_enemy.check_document(document, mod_dir, mod_root, fs, diagnostics, print_info=False)
+        references = []
+    else:
+        check_quotes(document, diagnostics)
+        diagnostics.add(Diagnostic(document.filepath, 1, None, PARSE_ERROR, ERROR, f"Unrecognized file type, the first line should be one of {', '.join(HEADERS)}"))
+        references = []
+
+    # Reported the same way as the walk over linked files does
+    for reference in references:
+        if not fs.exists(reference.full_path):
+            diagnostics.add(Diagnostic(reference.source, reference.line_number, reference.key, FILE_NOT_FOUND, ERROR, f"Referenced file {reference.path} does not exist."))
+
+def workspace_key(uri):
+    return os.path.normcase(os.path.abspath(uri_to_path(uri)))
+
+def uri_to_path(uri):
+    url = urlparse(uri)
+    path = unquote(url.path)
+    # file:///C:/mods/... on Windows
+    if os.name == 'nt' and path.startswith('/') and len(path) > 2 and path[2] == ':':
+        path = path[1:]
+    return normalize_path(path)
+
+# LSP positions count UTF-16 code units
+def utf16_length(text):
+    return len(text.encode('utf-16-le')) // 2
+
+# Range of a diagnostic in the buffer: the key or the value of its entry, or the whole line without surrounding whitespace
+def diagnostic_range(diagnostic, lines):
+    if diagnostic.line is None or not 1 <= diagnostic.line <= len(lines):
+        return {'start': {'line': 0, 'character': 0}, 'end': {'line': 0, 'character': utf16_length(lines[0]) if lines else 0}}
+    line = lines[diagnostic.line - 1]
+    start = len(line) - len(line.lstrip())
+    end = len(line.rstrip())
+    if diagnostic.key is not None and diagnostic.rule != UNCLOSED_QUOTES and '=' in line:
+        separator = line.index('=')
+        if diagnostic.rule in KEY_RULES:
+            end = len(line[:separator].rstrip())
+        else:
+            value = line[separator + 1:]
+            value_start = separator + 1 + len(value) - len(value.lstrip())
+            if value_start < end:
+                start = value_start
+    return {
+        'start': {'line': diagnostic.line - 1, 'character': utf16_length(line[:start])},
+        'end': {'line': diagnostic.line - 1, 'character': utf16_length(line[:end])},
+    }
+
+def to_lsp_diagnostic(diagnostic, lines):
+    return {
+        'range': diagnostic_range(diagnostic, lines),
+        'severity': SEVERITY_ERROR if diagnostic.severity == ERROR else SEVERITY_WARNING,
+        'code': diagnostic.rule,
+        'source': SOURCE,
+        'message': diagnostic.message,
+    }
+
+# Language server over stdio, checks open .ito buffers on every change and publishes diagnostics
+# mod_root and mod_dir are found per file: the closest directory above it containing a mystery .ito, with "mystery\" as mod_dir,
+# otherwise the file's own directory without mod_dir, unless set in initializationOptions
+# The search stops at the workspace folder holding the file, or MAX_MOD_ROOT_DEPTH directories up outside of the workspace
+class LanguageServer:
+
+    # verbose - log time taken by every check to stderr
+    def __init__(self, input_stream, output_stream, game_version=DEFAULT_GAME_VERSION, language=DEFAULT_LANGUAGE, verbose=False):
+        self.input_stream = input_stream
+        self.output_stream = output_stream
+        self.verbose = verbose
+        self.game_version = game_version
+        self.language = language
+        self.mod_dir = None
+        self.mod_root = None
+        # Normcased paths of the client's workspace folders
+        self.workspace_roots = set()
+        self.initialized = False
+        self.shutdown_requested = False
+        # uri -> text of every open document
+        self.documents = {}
+        # mod_root -> FileSystemIndex, rebuilt once files are saved, created or deleted
+        self.indexes = {}
+        # Directory -> whether it contains a mystery .ito
+        self.mystery_directories = {}
+
+    # Next message from the client, None once the input is closed
+    # Messages that can't be read are answered with a parse error, the client may still send valid ones after them
+    def read_message(self):
+        while True:
+            headers = {}
+            try:
+                while True:
+                    line = self.input_stream.readline()
+                    if not line:
+                        return None
+                    line = line.decode('ascii').strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length < 0:
+                    raise ValueError(f"Negative Content-Length {length}")
+                message = json.loads(self.input_stream.read(length).decode('utf-8'))
+            except ValueError as e:
+                # UnicodeDecodeError and JSONDecodeError are ValueErrors too
+                self.respond(None, error={'code': JSON_PARSE_ERROR, 'message': f"Parse error: {str(e)}"})
+                continue
+            if not isinstance(message, dict):
+                self.respond(None, error={'code': INVALID_REQUEST, 'message': "Message is not a JSON object"})
+                continue
+            return message
+
+    def send(self, message):
+        message['jsonrpc'] = "2.0"
+        data = json.dumps(message).encode('utf-8')
+        self.output_stream.write(f"Content-Length: {len(data)}\r\n\r\n".encode('ascii') + data)
+        self.output_stream.flush()
+
+    def respond(self, request_id, result=None, error=None):
+        message = {'id': request_id}
+        if error is not None:
+            message['error'] = error
+        else:
+            message['result'] = result
+        self.send(message)
+
+    def notify(self, method, params):
+        self.send({'method': method, 'params': params})
+
+    # Returns exit code once the client sent exit
+    def run(self):
+        while True:
+            message = self.read_message()
+            if message is None:
+                return 0 if self.shutdown_requested else 1
+            method = message.get('method')
+            request_id = message.get('id')
+            if method == 'exit':
+                return 0 if self.shutdown_requested else 1
+            if not self.initialized and method not in ('initialize', 'shutdown'):
+                if request_id is not None:
+                    self.respond(request_id, error={'code': SERVER_NOT_INITIALIZED, 'message': "Server not initialized"})
+                continue
+            try:
+                result = self.handle(method, message.get('params') or {}, request_id)
+            except Exception as e:
+                if request_id is not None:
+                    self.respond(request_id, error={'code': INVALID_REQUEST, 'message': str(e)})
+                else:
+                    self.log(f"An error occurred while handling {method}: {str(e)}")
+                continue
+            if request_id is not None and method is not None:
+                if result is METHOD_NOT_FOUND:
+                    self.respond(request_id, error={'code': METHOD_NOT_FOUND, 'message': f"Unknown method {method}"})
+                else:
+                    self.respond(request_id, result)
+
+    def log(self, message):
+        print(message, file=sys.stderr, flush=True)
+
+    def handle(self, method, params, request_id):
+        if method == 'initialize':
+            options = params.get('initializationOptions') or {}
+            self.game_version = options.get('game_version', self.game_version)
+            self.language = options.get('lang', self.language)
+            self.mod_dir = normalize_path(options['mod_dir']) if options.get('mod_dir') else None
+            self.mod_root = normalize_path(options['mod_root']) if options.get('mod_root') else None
+            folders = params.get('workspaceFolders') or []
+            if folders:
+                self.workspace_roots = {workspace_key(folder['uri']) for folder in folders}
+            elif params.get('rootUri'):
+                self.workspace_roots = {workspace_key(params['rootUri'])}
+            elif params.get('rootPath'):
+                self.workspace_roots = {os.path.normcase(os.path.abspath(normalize_path(params['rootPath'])))}
+            valid, message = select_profile(CONFIG_PATH, self.game_version, self.language)
+            if not valid:
+                raise ValueError(message)
+            self.initialized = True
+            return {
+                'capabilities': {'textDocumentSync': {'openClose': True, 'change': TEXT_DOCUMENT_SYNC_FULL, 'save': True}},
+                'serverInfo': {'name': SOURCE},
+            }
+        if method == 'shutdown':
+            self.shutdown_requested = True
+            return None
+
+        if method == 'textDocument/didOpen':
+            document = params['textDocument']
+            self.documents[document['uri']] = document['text']
+            self.publish(document['uri'])
+        elif method == 'textDocument/didChange':
+            uri = params['textDocument']['uri']
+            changes = params.get('contentChanges') or []
+            if changes:
+                # Full sync, the last change holds the whole buffer
+                self.documents[uri] = changes[-1]['text']
+                self.publish(uri)
+        elif method == 'textDocument/didSave':
+            # A save may come with new or removed assets, e.g. after renaming a file the editor knows about
+            self.indexes.clear()
+            self.publish_all()
+        elif method == 'workspace/didChangeWatchedFiles':
+            self.indexes.clear()
+            self.mystery_directories.clear()
+            self.publish_all()
+        elif method == 'workspace/didChangeWorkspaceFolders':
+            event = params.get('event') or {}
+            self.workspace_roots -= {workspace_key(folder['uri']) for folder in event.get('removed') or []}
+            self.workspace_roots |= {workspace_key(folder['uri']) for folder in event.get('added') or []}
+            self.publish_all()
+        elif method == 'textDocument/didClose':
+            uri = params['textDocument']['uri']
+            self.documents.pop(uri, None)
+            self.notify('textDocument/publishDiagnostics', {'uri': uri, 'diagnostics': []})
+        elif request_id is not None:
+            return METHOD_NOT_FOUND
+        return None
+
+    def contains_mystery(self, directory):
+        contains = self.mystery_directories.get(directory)
+        if contains is None:
+            contains = False
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith('.ito') and entry.is_file():
+                            try:
+                                if read_kind(entry.path) == MYSTERY:
+                                    contains = True
+                                    break
+                            except (OSError, UnicodeDecodeError):
+                                continue
+            except OSError:
+                pass
+            self.mystery_directories[directory] = contains
+        return contains
+
+    # (mod_dir, mod_root) for a file
+    def locate(self, filepath, kind):
+        if self.mod_root is not None:
+            return (self.mod_dir if self.mod_dir is not None else DEFAULT_MOD_DIR), self.mod_root
+        directory = os.path.dirname(os.path.abspath(filepath))
+        if kind != MYSTERY:
+            in_workspace = self.workspace_root(directory) is not None
+            parent = directory
+            depth = 0
+            while True:
+                if self.contains_mystery(parent):
+                    return (self.mod_dir if self.mod_dir is not None else DEFAULT_MOD_DIR), parent
+                next_parent = os.path.dirname(parent)
+                if next_parent == parent or os.path.normcase(parent) in self.workspace_roots or (not in_workspace and depth >= MAX_MOD_ROOT_DEPTH):
+                    break
+                parent = next_parent
+                depth += 1
+            return (self.mod_dir if self.mod_dir is not None else ""), directory
+        return (self.mod_dir if self.mod_dir is not None else DEFAULT_MOD_DIR), directory
+
+    # Workspace folder directory is in, None if it's outside of all of them
+    def workspace_root(self, directory):
+        key = os.path.normcase(directory)
+        for root in self.workspace_roots:
+            if key == root or key.startswith(root.rstrip(os.sep) + os.sep):
+                return root
+        return None
+
+    def get_index(self, mod_root):
+        index = self.indexes.get(mod_root)
+        if index is None:
+            index = FileSystemIndex(mod_root)
+            self.indexes[mod_root] = index
+        return index
+
+    def publish_all(self):
+        for uri in list(self.documents):
+            self.publish(uri)
+
+    def publish(self, uri):
+        text = self.documents.get(uri)
+        if text is None:
+            return
+        started = time.perf_counter()
+        filepath = uri_to_path(uri)
+        text = text.replace('\r\n', '\n')
+        document = ItoDocument(filepath, text)
+        kind = HEADERS.get(document.header)
+        mod_dir, mod_root = self.locate(filepath, kind)
+        diagnostics = DiagnosticCollector()
+        check_document(document, kind, mod_dir, mod_root, self.get_index(mod_root), diagnostics)
+        lines = text.split('\n')
+        self.notify('textDocument/publishDiagnostics', {
+            'uri': uri,
+            'diagnostics': [to_lsp_diagnostic(diagnostic, lines) for diagnostic in diagnostics.diagnostics if diagnostic.file == filepath],
+        })
+        if self.verbose:
+            self.log(f"Checked {os.path.basename(filepath)} in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Language server checking .ito files in editors as they are typed, speaks LSP over stdin/stdout.')
+    parser.add_argument('--stdio', action='store_true', help='Accepted for compatibility with editors passing it, stdio is the only transport')
+    parser.add_argument('--lang', type=str, default=DEFAULT_LANGUAGE, choices=available_languages(CONFIG_PATH), help='Optional language of item, spell, curse, injury and ally names, one of the directories in config, defaults to en, can also be set with the "lang" initialization option')
+    parser.add_argument('--game-version', type=str, default=DEFAULT_GAME_VERSION, choices=available_game_versions(CONFIG_PATH), help='Optional game version whose config is used, defaults to woh-1.01, can also be set with the "game_version" initialization option')
+    parser.add_argument('--verbose', action='store_true', help='Optional, log time taken by every check to stderr')
+
+    args = parser.parse_args()
+
+    input_stream = sys.stdin.buffer
+    output_stream = sys.stdout.buffer
+    # Anything printed by accident must not end up in the protocol stream
+    sys.stdout = sys.stderr
+
+    server = LanguageServer(input_stream, output_stream, args.game_version, args.lang, args.verbose)
+    return server.run()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import os
+import struct
+
+# Bytes read from the start of every asset, enough for the header of each supported format
+HEADER_SIZE = 64
+# Threads reading headers at once, reads mostly wait on the disk
+PREFETCH_THREADS = 16
+
+PNG = "png"
+GIF = "gif"
+BMP = "bmp"
+WAV = "wav"
+OGG = "ogg"
+IMAGE_FORMATS = (PNG, GIF, BMP)
+SOUND_FORMATS = (WAV, OGG)
+# Extensions of files read ahead by prefetch_headers
+ASSET_EXTENSIONS = ('.png', '.gif', '.bmp', '.wav', '.ogg')
+
+# What the first bytes of an image or sound say about it
+# width, height and bits (per pixel) are only known for images
+# problem is set when the file is not of a supported format or its header makes no sense, e.g. "has no channels"
+class AssetHeader:
+    __slots__ = ('format', 'width', 'height', 'bits', 'problem')
+
+    def __init__(self, format=None, width=None, height=None, bits=None, problem=None):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.bits = bits
+        self.problem = problem
+
+    def __repr__(self):
+        return f"AssetHeader({self.format!r}, {self.width!r}, {self.height!r}, {self.bits!r}, {self.problem!r})"
+
+# Path -> (stamp, AssetHeader), kept for the lifetime of the process
+# A header is read again once the file's size or modification time changes
+headers = {}
+# Long-running processes, e.g. serve.py workers, start over once this many headers are kept
+MAX_CACHED_HEADERS = 100000
+
+def parse_png(data):
+    # Signature, then the IHDR chunk: length, type, width, height, bit depth, color type
+    if len(data) < 26 or data[12:16] != b'IHDR':
+        return AssetHeader(PNG, problem="has a truncated PNG header")
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', data[16:26])
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color_type)
+    if channels is None:
+        return AssetHeader(PNG, width, height, problem=f"has unknown PNG color type {color_type}")
+    if width == 0 or height == 0:
+        return AssetHeader(PNG, width, height, problem="is empty")
+    return AssetHeader(PNG, width, height, bit_depth * channels)
+
+def parse_gif(data):
+    # Logical screen descriptor: width, height, packed fields with the size of the global color table
+    if len(data) < 11:
+        return AssetHeader(GIF, problem="has a truncated GIF header")
+    width, height, packed = struct.unpack('<HHB', data[6:11])
+    if width == 0 or height == 0:
+        return AssetHeader(GIF, width, height, problem="is empty")
+    return AssetHeader(GIF, width, height, (packed & 0x07) + 1)
+
+def parse_bmp(data):
+    if len(data) < 18:
+        return AssetHeader(BMP, problem="has a truncated BMP header")
+    info_size = struct.unpack('<I', data[14:18])[0]
+    if info_size == 12 and len(data) >= 26:
+        width, height, _, bits = struct.unpack('<HHHH', data[18:26])
+    elif info_size >= 40 and len(data) >= 30:
+        width, height, _, bits = struct.unpack('<iiHH', data[18:30])
+        # Negative height marks rows stored top to bottom
+        height = abs(height)
+    else:
+        return AssetHeader(BMP, problem="has a truncated BMP header")
+    if width <= 0 or height == 0:
+        return AssetHeader(BMP, width, height, problem="is empty")
+    if bits not in (1, 4, 8, 16, 24, 32):
+        return AssetHeader(BMP, width, height, bits, problem=f"has unsupported BMP bit depth {bits}")
+    return AssetHeader(BMP, width, height, bits)
+
+def parse_wav(data):
+    if data[8:12] != b'WAVE':
+        return AssetHeader(WAV, problem="is a RIFF file, but not a WAV sound")
+    # The format chunk nearly always comes first, other layouts are only checked as far as the container goes
+    if data[12:16] != b'fmt ':
+        return AssetHeader(WAV)
+    if len(data) < 36:
+        return AssetHeader(WAV, problem="has a truncated WAV header")
+    audio_format, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', data[20:36])
+    if channels == 0:
+        return AssetHeader(WAV, problem="has no channels")
+    if sample_rate == 0:
+        return AssetHeader(WAV, problem="has a sample rate of 0")
+    # PCM, IEEE float and extensible formats carry a meaningful bit depth
+    if audio_format in (1, 3, 0xFFFE) and bits not in (8, 16, 24, 32, 64):
+        return AssetHeader(WAV, problem=f"has unsupported sample size of {bits} bits")
+    return AssetHeader(WAV)
+
+def parse_ogg(data):
+    # First page of the stream: version 0, beginning of stream flag, then the first packet after the segment table
+    if len(data) < 27 or data[4] != 0 or not data[5] & 0x02:
+        return AssetHeader(OGG, problem="doesn't start with the first page of an Ogg stream")
+    packet = data[27 + data[26]:]
+    if packet.startswith(b'\x01vorbis'):
+        if len(packet) < 16:
+            return AssetHeader(OGG, problem="has a truncated Vorbis header")
+        channels, sample_rate = struct.unpack('<BI', packet[11:16])
+    elif packet.startswith(b'OpusHead'):
+        if len(packet) < 16:
+            return AssetHeader(OGG, problem="has a truncated Opus header")
+        channels, sample_rate = packet[9], struct.unpack('<I', packet[12:16])[0]
+        # Opus streams may leave the original sample rate out
+        sample_rate = sample_rate or 48000
+    else:
+        return AssetHeader(OGG, problem="is an Ogg file, but not Vorbis or Opus sound")
+    if channels == 0:
+        return AssetHeader(OGG, problem="has no channels")
+    if sample_rate == 0:
+        return AssetHeader(OGG, problem="has a sample rate of 0")
+    return AssetHeader(OGG)
+
+# Format is recognized by the file's signature, regardless of its extension
+def parse_header(data):
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return parse_png(data)
+    if data.startswith(b'GIF87a') or data.startswith(b'GIF89a'):
+        return parse_gif(data)
+    if data.startswith(b'BM'):
+        return parse_bmp(data)
+    if data.startswith(b'RIFF'):
+        return parse_wav(data)
+    if data.startswith(b'OggS'):
+        return parse_ogg(data)
+    return AssetHeader(problem="is not a PNG, GIF or BMP image, nor a WAV or OGG sound")
+
+# AssetHeader of the file at path, read again only if its size or modification time changed
+# fs - file system the file is read from, its stamp is recorded as a dependency by RecordingFileSystem
+def read_header(path, fs):
+    key = os.path.normcase(os.path.abspath(path))
+    stamp = fs.stamp(path)
+    cached = headers.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        header = parse_header(fs.read_bytes(path, HEADER_SIZE))
+    except OSError as e:
+        header = AssetHeader(problem=f"could not be read: {str(e)}")
+    if len(headers) >= MAX_CACHED_HEADERS:
+        headers.clear()
+    headers[key] = (stamp, header)
+    return header
+
+# Reads headers of every image and sound in filepaths on a thread pool, so checks later find them in memory
+def prefetch_headers(filepaths, fs):
+    filepaths = [filepath for filepath in filepaths if filepath.lower().endswith(ASSET_EXTENSIONS)]
+    if len(filepaths) < 2:
+        return
+    # Thread pool machinery is only loaded when content checks are on
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as executor:
+        for _ in executor.map(lambda filepath: read_header(filepath, fs), filepaths):
+            pass
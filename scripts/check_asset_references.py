@@ -1,49 +1,87 @@
 import os
+from .file_system import OS_FILE_SYSTEM
+from .diagnostics import report, MISSING_MOD_DIR, FILE_NOT_FOUND, RESTRICTED_FILENAME, INVALID_ASSET, CHECK_ERROR
+from .config_registry import load_mod_dir_requirements, load_asset_content_rules
 
-def load_mod_dir_requirements(filepath):
-    keys_requiring_mod_dir = {}
-    with open(filepath, 'r') as file:
-        for line in file:
-            parts = line.strip().split(',')
-            key = parts[0].strip()
-            requires_mod_dir = parts[1].strip() if len(parts) > 1 else None
-            keys_requiring_mod_dir[key] = requires_mod_dir == 'True'
-    return keys_requiring_mod_dir
+# Next to the asset keys files
+ASSET_CONTENT_RULES = "asset_content_rules.txt"
+
+# Content checks are opt-in, validate_path turns them on for a run and --jobs workers are told with every file
+# Header parsing is only imported once they're on
+content_checks = False
+
+def enable_content_checks(enabled):
+    global content_checks
+    content_checks = enabled
+
+# Problem with the format, size or bit depth of an existing asset judged by its header only, None if there's none
+# rule - (formats, (width, height) or None, bits or None), see asset_content_rules.txt
+def find_content_problem(path, rule, fs):
+    from . import asset_headers
+    header = asset_headers.read_header(path, fs)
+    if header.problem is not None:
+        return header.problem
+    formats, size, bits = rule
+    if header.format not in formats:
+        kind = "image" if header.format in asset_headers.IMAGE_FORMATS else "sound"
+        return f"is a {header.format.upper()} {kind}, expected {' or '.join(sorted(format.upper() for format in formats))}"
+    problems = []
+    if header.width is not None:
+        if size is not None and (header.width, header.height) != size:
+            problems.append(f"is {header.width}x{header.height}, expected {size[0]}x{size[1]}")
+        if bits is not None and header.bits not in bits:
+            problems.append(f"has {header.bits} bits per pixel, expected {' or '.join(str(value) for value in sorted(bits))}")
+    # A single diagnostic per key, so both problems are reported together
+    return " and ".join(problems) if problems else None
 
 # Check if referenced files exist for specified keys
-def check_asset_references(ito_filepath, mod_dir, mod_root, keys_file, allow_n_r = False):
+# With content_checks on, the headers of existing files are checked against asset_content_rules.txt too
+def check_asset_references(document, mod_dir, mod_root, keys_file, allow_n_r = False, fs=None, diagnostics=None):
 
-    os.path.basename(ito_filepath)
+    if fs is None:
+        fs = OS_FILE_SYSTEM
 
     assets_requiring_mod_dir = load_mod_dir_requirements(keys_file)
+    content_rules = load_asset_content_rules(os.path.join(os.path.dirname(keys_file), ASSET_CONTENT_RULES)) if content_checks else {}
 
     try:
-        with open(ito_filepath, 'r', encoding='utf-8') as file:
-            errors = []
-            for line in file:
-                line = line.strip()
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"').replace(' ', '').replace('\\', os.sep).replace('/', os.sep)
-                    if key in assets_requiring_mod_dir and value:  # Only proceed if value is not empty
-                        if mod_dir and assets_requiring_mod_dir[key]:
-                            if not value.startswith(mod_dir):
-                                errors.append(f"Missing required mod_dir '{mod_dir}' for key '{key}'. Found '{value}'.")
-                                continue
-                            # Exclude mod_dir from path
-                            value = value[len(mod_dir):]
-
-                        ref_full_path = os.path.join(mod_root, value)
-                        if not os.path.exists(ref_full_path):
-                            errors.append(f"File not found: {value} ({ref_full_path}) referenced at key '{key}'")
-                        else:
-                            # Special rule - check if the filename starts with 'n' or 'r'
-                            ref_basename = os.path.basename(ref_full_path)
-                            if ref_basename[0].lower() in ['n', 'r'] and not allow_n_r:
-                                    errors.append(f"Filename '{ref_basename}' starts with restricted character 'n' or 'r' at key '{key}'")                 
-            if errors:
-                return False, errors
-            return True, f"All file references are valid."
+        errors = []
+        for entry in document.entries:
+            key = entry.key
+            value = entry.value.replace(' ', '').replace('\\', os.sep).replace('/', os.sep)
+            if key in assets_requiring_mod_dir and value:  # Only proceed if value is not empty
+                if mod_dir and assets_requiring_mod_dir[key]:
+                    if not value.startswith(mod_dir):
+                        message = f"Missing required mod_dir '{mod_dir}' for key '{key}'. Found '{value}'."
+                        errors.append(message)
+                        report(diagnostics, document, entry.line_number, key, MISSING_MOD_DIR, message)
+                        continue
+                    # Exclude mod_dir from path
+                    value = value[len(mod_dir):]
+
+                ref_full_path = os.path.join(mod_root, value)
+                if not fs.exists(ref_full_path):
+                    message = f"File not found: {value} ({ref_full_path}) referenced at key '{key}'"
+                    case_match = fs.match_ignoring_case(ref_full_path)
+                    if case_match:
+                        message += f". Only '{case_match}' exists, which differs in letter case and resolves on case-insensitive file systems like Windows only"
+                    errors.append(message)
+                    report(diagnostics, document, entry.line_number, key, FILE_NOT_FOUND, message)
+                else:
+                    # Special rule - check if the filename starts with 'n' or 'r'
+                    ref_basename = os.path.basename(ref_full_path)
+                    if ref_basename[0].lower() in ['n', 'r'] and not allow_n_r:
+                            message = f"Filename '{ref_basename}' starts with restricted character 'n' or 'r' at key '{key}'"
+                            errors.append(message)
+                            report(diagnostics, document, entry.line_number, key, RESTRICTED_FILENAME, message)
+                    problem = find_content_problem(ref_full_path, content_rules[key], fs) if key in content_rules else None
+                    if problem is not None:
+                        message = f"Asset {value} ({ref_full_path}) referenced at key '{key}' {problem}"
+                        errors.append(message)
+                        report(diagnostics, document, entry.line_number, key, INVALID_ASSET, message)
+        if errors:
+            return False, errors
+        return True, f"All file references are valid."
     except Exception as e:
-        return False, f"An error occurred: {str(e)}"
+        report(diagnostics, document, None, None, CHECK_ERROR, f"An error occurred: {str(e)}")
+        return False, [f"An error occurred: {str(e)}"]
@@ -1,74 +1,32 @@
-import os
+from .config_registry import load_key_value_rules
+from .suggestions import did_you_mean
+from .diagnostics import report, INVALID_VALUE, CHECK_ERROR
 
-def load_valid_keys(filepath):
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            return {line.strip() for line in file if line.strip()}
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error: Configuration file '{filepath}' not found. Please ensure the file exists to continue.")
-    except Exception as e:
-        raise Exception(f"An error occurred while reading the hardcoded values file: {str(e)}")
-
-def load_valid_values(filepath):
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            return {line.strip() for line in file if line.strip()}
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error: Configuration file '{filepath}' not found. Please ensure the file exists to continue.")
-    except Exception as e:
-        raise Exception(f"An error occurred while reading the hardcoded values file: {str(e)}")
-
-def check_key_and_values(filepath, key_to_check, values_file, allow_empty=True):
+# Check values of every key with a rule in rules_file, in a single pass over the file
+def check_key_value_rules(document, rules_file, diagnostics=None):
 
-    valid_values = load_valid_values(values_file)
+    rules = load_key_value_rules(rules_file)
 
     try: 
-        with open(filepath, 'r', encoding='utf-8') as file:
-            errors = []
-
-            for line in file:
-                line = line.strip()
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"')
-                    
-                    if key == key_to_check:
-                        if (not value or value.isspace()) and allow_empty:
-                            continue
-                        if not value in valid_values:
-                            errors.append(f"Incorrect value '{value}' for key '{key}'.")
-
-        if errors:
-            return False, errors
-        return True, f"All key and values validated."
-    except Exception as e:
-        return False, f"An error occurred: {str(e)}"
-
-def check_keys_and_values(filepath, keys_file, values_file, allow_empty=True):
-
-    valid_keys = load_valid_keys(keys_file)
-    valid_values = load_valid_values(values_file)
-
-    try: 
-        with open(filepath, 'r', encoding='utf-8') as file:
-            errors = []
-
-            for line in file:
-                line = line.strip()
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"').replace(' ', '')
-                    #print(f"{key}:{value}")
-                    if key in valid_keys:
-                        if (not value or value.isspace()) and allow_empty:
-                            continue
-                        if not value in valid_values:
-                            errors.append(f"Incorrect value '{value}' for key '{key}'.")
+        errors = []
+
+        for entry in document.entries:
+            key_rules = rules.get(entry.key)
+            if key_rules is None:
+                continue
+
+            for valid_values, allow_empty, remove_spaces in key_rules:
+                value = entry.value.replace(' ', '') if remove_spaces else entry.value
+                if (not value or value.isspace()) and allow_empty:
+                    continue
+                if not value in valid_values:
+                    message = f"Incorrect value '{value}' for key '{entry.key}'." + did_you_mean(value, valid_values)
+                    errors.append(message)
+                    report(diagnostics, document, entry.line_number, entry.key, INVALID_VALUE, message)
 
         if errors:
             return False, errors
         return True, f"All key and values validated."
     except Exception as e:
-        return False, f"An error occurred: {str(e)}"
+        report(diagnostics, document, None, None, CHECK_ERROR, f"An error occurred: {str(e)}")
+        return False, [f"An error occurred: {str(e)}"]
@@ -1,50 +1,42 @@
 import os
+from .config_registry import load_prize_rules
+from .suggestions import did_you_mean
+from .diagnostics import report, INVALID_PRIZE, CHECK_ERROR
 
-def load_valid_values(filepath):
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            return {line.strip() for line in file if line.strip()}
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Error: Configuration file '{filepath}' not found. Please ensure the file exists to continue.")
-    except Exception as e:
-        raise Exception(f"An error occurred while reading the hardcoded values file: {str(e)}")
-
-# Check if correct prize is set for that prize type
-def check_prizes(filepath, prize_type, values_file):
-    valid_values = load_valid_values(values_file)
+# Check if correct prize is set for each prize type with a rule in rules_file
+def check_prize_rules(document, rules_file, diagnostics=None):
+    rules = load_prize_rules(rules_file)
 
     try:
         prize_keys = {}
         prizes = {}
         
-        with open(filepath, 'r', encoding='utf-8') as file:
-            errors = []
-            for line in file:
-                line = line.strip()
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip().strip('"')
+        errors = []
+        for entry in document.entries:
+            key = entry.key
+            value = entry.value
 
-                    # Detect if it's a prize or number based on prefix
-                    if 'winprize' in key:
-                        prize_keys[key] = value
-                    elif 'winnumber' in key:
-                        prizes[key] = value
-                    elif 'failprize' in key:
-                        prize_keys[key] = value
-                    elif 'failnumber' in key:
-                        prizes[key] = value
+            # Detect if it's a prize or number based on prefix
+            if 'winprize' in key:
+                prize_keys[key] = value
+            elif 'winnumber' in key:
+                prizes[key] = entry
+            elif 'failprize' in key:
+                prize_keys[key] = value
+            elif 'failnumber' in key:
+                prizes[key] = entry
 
-            # Check if this is valid prize for that prize type
-            for key, value in prizes.items():
-                prize_key = key.replace('number', 'prize')
-                if prize_keys.get(prize_key) == prize_type:
-                    if not value in valid_values:
-                        errors.append(f"Incorrect prize '{value}' for prize type '{prize_type}' at key '{key}'.")
-                        continue 
+        # Check if this is valid prize for that prize type
+        for key, entry in prizes.items():
+            prize_type = prize_keys.get(key.replace('number', 'prize'))
+            valid_values = rules.get(prize_type)
+            if valid_values is not None and not entry.value in valid_values:
+                message = f"Incorrect prize '{entry.value}' for prize type '{prize_type}' at key '{key}'." + did_you_mean(entry.value, valid_values)
+                errors.append(message)
+                report(diagnostics, document, entry.line_number, key, INVALID_PRIZE, message)
         if errors:
             return False, errors
         return True, f"All prizes validated."
     except Exception as e:
-        return False, f"An error occurred: {str(e)}"
+        report(diagnostics, document, None, None, CHECK_ERROR, f"An error occurred: {str(e)}")
+        return False, [f"An error occurred: {str(e)}"]
@@ -1,14 +1,20 @@
-def check_quotes(filepath):
+from .diagnostics import report, UNCLOSED_QUOTES, CHECK_ERROR
+
+def check_quotes(document, diagnostics=None):
     try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            line_number = 0
-            for line in file:
-                line_number += 1
-                quote_count = line.count('"')
+        errors = []
+        line_number = 0
+        for quote_count in document.quote_counts:
+            line_number += 1
 
-                if quote_count % 2 != 0:
-                    return False, f"Unclosed quotes found at line {line_number}"
+            if quote_count % 2 != 0:
+                message = f"Unclosed quotes found at line {line_number}"
+                errors.append(message)
+                report(diagnostics, document, line_number, None, UNCLOSED_QUOTES, message)
 
+        if errors:
+            return False, errors
         return True, "All quotes are correctly closed."
     except Exception as e:
-        return False, f"Error: {str(e)}"
\ No newline at end of file
+        report(diagnostics, document, None, None, CHECK_ERROR, f"Error: {str(e)}")
+        return False, [f"Error: {str(e)}"]
@@ -0,0 +1,22 @@
+from .reporters import HUMAN, FORMATS
+from .config_registry import available_languages, DEFAULT_LANGUAGE
+from .game_profile import available_game_versions, DEFAULT_GAME_VERSION
+
+# Output, config and performance options shared by validate.py, validate_mystery.py, validate_event.py, validate_enemy.py and validate_batch.py
+# linked_files - add --jobs, --cache and --max-errors, which only matter to files linking others
+# cache_location - where --cache keeps its results, as told in the help
+def add_common_arguments(parser, config_path, linked_files=True, cache_location="next to mod_root"):
+    parser.add_argument('--format', type=str, default=HUMAN, choices=FORMATS, help='Optional output format: human (default), quiet (exit code only), jsonl (one JSON record per diagnostic and file) or sarif')
+    parser.add_argument('--output', type=str, default="", help='Optional file to write the report to instead of the terminal')
+    parser.add_argument('--lang', type=str, default=DEFAULT_LANGUAGE, choices=available_languages(config_path), help='Optional language of item, spell, curse, injury and ally names, one of the directories in config, defaults to en')
+    parser.add_argument('--game-version', type=str, default=DEFAULT_GAME_VERSION, choices=available_game_versions(config_path), help='Optional game version whose config is used, one of the directories in config\\games, defaults to woh-1.01')
+    if linked_files:
+        parser.add_argument('--jobs', type=int, default=1, help='Optional number of worker processes used to validate linked events and enemies, defaults to 1')
+        parser.add_argument('--cache', action='store_true', help=f'Optional, reuse results of unchanged linked files from previous runs, stored in .woh_validate_cache {cache_location}')
+        parser.add_argument('--max-errors', type=int, default=None, help='Optional, stop validating linked files once this many errors were found, by default every problem is reported')
+    parser.add_argument('--check-assets', action='store_true', help='Optional, also check format, size and bit depth of referenced images and sounds against config\\asset_content_rules.txt, reading only their headers')
+    profile_help = 'Optional, print time, file opens, bytes read, stat calls and config loads of the N slowest checks and files (10 by default) to stderr'
+    if linked_files:
+        profile_help += ', --jobs is ignored while profiling'
+    parser.add_argument('--profile', type=int, nargs='?', const=10, default=None, metavar='N', help=profile_help)
+    parser.add_argument('--profile-output', type=str, default="", help='Optional file to write cProfile stats of the whole run to, implies --profile')
@@ -0,0 +1,243 @@
+import os
+import sys
+from types import MappingProxyType
+
+from .game_profile import DEFAULT_GAME_VERSION, GAMES_DIR_NAME, load_profile
+
+# Tables of localized names (items, spells, curses, injuries, allies) are in a directory per language next to the rule files
+DEFAULT_LANGUAGE = "en"
+
+# Process-wide cache of parsed config tables
+# Each table is loaded once and reloaded only when its file's mtime changes
+class ConfigRegistry:
+
+    def __init__(self):
+        # (loader name, filepath) -> (mtime, table)
+        self._tables = {}
+        # Number of times a config file was actually read, reported by --profile
+        self.loads = 0
+        self.language = DEFAULT_LANGUAGE
+        self.game_version = DEFAULT_GAME_VERSION
+        # Selected game profile, tables it contains are taken from its bundle instead of their files
+        self.profile = None
+        # Config filepath -> lines, for every table in the profile
+        self._profile_lines = {}
+
+    # Only tables of the selected language are ever read
+    def set_language(self, language):
+        if language != self.language:
+            self.language = language
+            # Compiled rules point at tables of the previous language
+            self._tables.clear()
+
+    def set_profile(self, config_path, profile):
+        self.profile = profile
+        self.game_version = profile.game_version
+        self._profile_lines = {os.path.join(config_path, *relative_path.split('/')): lines for relative_path, lines in profile.tables.items()}
+        self.set_language(profile.language)
+        self._tables.clear()
+
+    # Value table referenced from a rule file, from the language directory if it's localized there
+    def _values_path(self, directory, values_file):
+        localized_path = os.path.join(directory, self.language, values_file)
+        if localized_path in self._profile_lines or os.path.exists(localized_path):
+            return localized_path
+        return os.path.join(directory, values_file)
+
+    # Tables from the profile never change during a run, the bundle is rebuilt on the next one
+    def _mtime(self, filepath):
+        if filepath in self._profile_lines:
+            return 0
+        try:
+            return os.stat(filepath).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Error: Configuration file '{filepath}' not found. Please ensure the file exists to continue.")
+
+    def _get(self, name, filepath, parse):
+        mtime = self._mtime(filepath)
+
+        cached = self._tables.get((name, filepath))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            table = parse(self._lines(filepath))
+        except Exception as e:
+            raise Exception(f"An error occurred while reading the configuration file '{filepath}': {str(e)}")
+
+        self._tables[(name, filepath)] = (mtime, table)
+        self.loads += 1
+        return table
+
+    # One value per line, e.g. item_values.txt, winprize_keys.txt
+    def value_set(self, filepath):
+        return self._get('value_set', filepath, _parse_value_set)
+
+    # key,True/False per line, e.g. event_asset_keys.txt - True if the key requires mod_dir prefix
+    def mod_dir_requirements(self, filepath):
+        return self._get('mod_dir_requirements', filepath, _parse_mod_dir_requirements)
+
+    # Content rules of assets, asset_content_rules.txt - one rule per line: key,formats,size,bits
+    # formats separated by spaces, size as WIDTHxHEIGHT, bits per pixel separated by spaces, * for any size or bits
+    def asset_content_rules(self, filepath):
+        return self._get('asset_content_rules', filepath, _parse_asset_content_rules)
+
+    # Key/value rules, e.g. event_key_value_rules.txt - one rule per line: keys,values file,allow empty
+    # keys is either a keys file (values compared with spaces removed) or a single key name (values compared as they are)
+    # Compiled into key -> list of (valid values, allow_empty, remove_spaces), so each entry is checked with one lookup
+    def key_value_rules(self, filepath):
+        return self._get_compiled('key_value_rules', filepath, self._compile_key_value_rules)
+
+    # Prize rules, e.g. event_prize_rules.txt - one rule per line: prize type,values file
+    # Compiled into prize type -> valid values
+    def prize_rules(self, filepath):
+        return self._get_compiled('prize_rules', filepath, self._compile_prize_rules)
+
+    # Like _get, but the table also depends on config files referenced from filepath
+    # build(filepath) returns (table, referenced filepaths), the table is rebuilt once any of these files changes
+    def _get_compiled(self, name, filepath, build):
+        cached = self._tables.get((name, filepath))
+        if cached is not None:
+            mtimes, table = cached
+            if all(self._mtime(path) == mtime for path, mtime in mtimes):
+                return table
+
+        mtime = self._mtime(filepath)
+        try:
+            table, referenced_filepaths = build(filepath)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise Exception(f"An error occurred while reading the configuration file '{filepath}': {str(e)}")
+
+        mtimes = [(filepath, mtime)] + [(path, self._mtime(path)) for path in referenced_filepaths]
+        self._tables[(name, filepath)] = (mtimes, table)
+        self.loads += 1
+        return table
+
+    def _compile_key_value_rules(self, filepath):
+        directory = os.path.dirname(filepath)
+        rules = {}
+        referenced_filepaths = []
+        for keys, values_file, allow_empty in self._read_rules(filepath, 3):
+            values_filepath = self._values_path(directory, values_file)
+            referenced_filepaths.append(values_filepath)
+            if keys.endswith('.txt'):
+                keys_filepath = os.path.join(directory, keys)
+                referenced_filepaths.append(keys_filepath)
+                rule_keys = self.value_set(keys_filepath)
+                remove_spaces = True
+            else:
+                rule_keys = [keys]
+                remove_spaces = False
+            rule = (self.value_set(values_filepath), allow_empty == 'True', remove_spaces)
+            for key in rule_keys:
+                rules.setdefault(key, []).append(rule)
+        return MappingProxyType({key: tuple(key_rules) for key, key_rules in rules.items()}), referenced_filepaths
+
+    def _compile_prize_rules(self, filepath):
+        directory = os.path.dirname(filepath)
+        rules = {}
+        referenced_filepaths = []
+        for prize_type, values_file in self._read_rules(filepath, 2):
+            values_filepath = self._values_path(directory, values_file)
+            referenced_filepaths.append(values_filepath)
+            rules[prize_type] = self.value_set(values_filepath)
+        return MappingProxyType(rules), referenced_filepaths
+
+    # Lines of a config file, from the profile's bundle if it contains the file
+    def _lines(self, filepath):
+        lines = self._profile_lines.get(filepath)
+        if lines is not None:
+            return lines
+        with open(filepath, 'r', encoding='utf-8') as file:
+            return file.readlines()
+
+    def _read_rules(self, filepath, column_count):
+        for line in self._lines(filepath):
+            if not line.strip():
+                continue
+            columns = [column.strip() for column in line.split(',')]
+            if len(columns) != column_count:
+                raise ValueError(f"Expected {column_count} comma separated values, found '{line.strip()}'")
+            yield columns
+
+    def clear(self):
+        self._tables.clear()
+
+# Values are interned, names shared by several tables or languages are stored once
+def _parse_value_set(file):
+    return frozenset(sys.intern(line.strip()) for line in file if line.strip())
+
+def _parse_mod_dir_requirements(file):
+    keys_requiring_mod_dir = {}
+    for line in file:
+        parts = line.strip().split(',')
+        key = parts[0].strip()
+        requires_mod_dir = parts[1].strip() if len(parts) > 1 else None
+        keys_requiring_mod_dir[key] = requires_mod_dir == 'True'
+    return MappingProxyType(keys_requiring_mod_dir)
+
+# Compiled into key -> (formats, (width, height) or None, bits or None)
+def _parse_asset_content_rules(file):
+    rules = {}
+    for line in file:
+        if not line.strip():
+            continue
+        columns = [column.strip() for column in line.split(',')]
+        if len(columns) != 4:
+            raise ValueError(f"Expected 4 comma separated values, found '{line.strip()}'")
+        key, formats, size, bits = columns
+        size = None if size == '*' else tuple(int(dimension) for dimension in size.lower().split('x', 1))
+        bits = None if bits == '*' else frozenset(int(value) for value in bits.split())
+        rules[key] = (frozenset(formats.lower().split()), size, bits)
+    return MappingProxyType(rules)
+
+registry = ConfigRegistry()
+
+def set_language(language):
+    registry.set_language(language)
+
+def get_language():
+    return registry.language
+
+# Selects game version and language of every table loaded from now on, returns (valid, message)
+# Tables of the profile are read from its bundle, which is rebuilt first if its .txt files changed
+def select_profile(config_path, game_version, language):
+    profile = registry.profile
+    if profile is not None and profile.game_version == game_version and profile.language == language:
+        return True, ""
+    if language not in available_languages(config_path):
+        return False, f"Language '{language}' not found in '{config_path}', available: {', '.join(available_languages(config_path))}"
+    try:
+        profile = load_profile(config_path, game_version, language)
+    except Exception as e:
+        return False, f"An error occurred while loading game profile '{game_version}': {str(e)}"
+    registry.set_profile(config_path, profile)
+    return True, ""
+
+# (game version, language) of the selected profile, passed to worker processes
+def get_selection():
+    return (registry.game_version, registry.language)
+
+# Names of language directories in config_path
+def available_languages(config_path):
+    try:
+        return sorted(entry.name for entry in os.scandir(config_path) if entry.is_dir() and entry.name != GAMES_DIR_NAME)
+    except OSError:
+        return [DEFAULT_LANGUAGE]
+
+def load_value_set(filepath):
+    return registry.value_set(filepath)
+
+def load_mod_dir_requirements(filepath):
+    return registry.mod_dir_requirements(filepath)
+
+def load_asset_content_rules(filepath):
+    return registry.asset_content_rules(filepath)
+
+def load_key_value_rules(filepath):
+    return registry.key_value_rules(filepath)
+
+def load_prize_rules(filepath):
+    return registry.prize_rules(filepath)
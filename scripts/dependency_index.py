@@ -0,0 +1,60 @@
+import os
+
+# Reverse dependency index of validated files
+# Dependencies are paths a file's checks looked at: assets, music, triggered events/enemies and forced events
+class DependencyIndex:
+
+    def __init__(self):
+        # Validated file -> frozenset of absolute paths it depends on
+        self.dependencies = {}
+        # Lowercase absolute path -> set of validated files depending on it
+        # Letter case is ignored, adding or removing a differently cased file changes the hint given for a missing one
+        self.dependents = {}
+        # Lowercase absolute path -> set of validated files whose checks read its content, e.g. asset headers with --check-assets
+        self.content_dependents = {}
+        # Linked file -> Reference it was reached by, so it can be validated again on its own
+        self.references = {}
+
+    # paths - RecordingFileSystem.checked, files recorded with their stamp had their content checked
+    def set_dependencies(self, filepath, paths, reference=None):
+        filepath = os.path.abspath(filepath)
+        for path in self.dependencies.get(filepath, ()):
+            self.dependents[path.lower()].discard(filepath)
+            self.content_dependents.get(path.lower(), set()).discard(filepath)
+        self.dependencies[filepath] = frozenset(os.path.abspath(path) for path in paths)
+        for path, checked in paths.items():
+            path = os.path.abspath(path)
+            self.dependents.setdefault(path.lower(), set()).add(filepath)
+            if isinstance(checked, list):
+                self.content_dependents.setdefault(path.lower(), set()).add(filepath)
+        if reference is not None:
+            self.references[filepath] = reference
+
+    def add_dependency(self, filepath, path):
+        filepath = os.path.abspath(filepath)
+        path = os.path.abspath(path)
+        self.dependencies[filepath] = self.dependencies.get(filepath, frozenset()) | {path}
+        self.dependents.setdefault(path.lower(), set()).add(filepath)
+
+    def __contains__(self, filepath):
+        return os.path.abspath(filepath) in self.dependencies
+
+    # Validated files that have to be checked again after a change
+    # A modified file affects itself and files that read its content, files referencing a path are affected once it's added or removed
+    def affected_by(self, modified, added_or_removed):
+        affected = set()
+        for path in modified | added_or_removed:
+            path = os.path.abspath(path)
+            if path in self.dependencies:
+                affected.add(path)
+        for path in modified:
+            affected.update(self.content_dependents.get(os.path.abspath(path).lower(), ()))
+        for path in added_or_removed:
+            affected.update(self.dependents.get(os.path.abspath(path).lower(), ()))
+        return affected
+
+    def clear(self):
+        self.dependencies.clear()
+        self.dependents.clear()
+        self.content_dependents.clear()
+        self.references.clear()
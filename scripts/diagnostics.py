@@ -0,0 +1,142 @@
+# Severities
+ERROR = "error"
+WARNING = "warning"
+
+# Rule ids
+PARSE_ERROR = "parse-error"
+CHECK_ERROR = "check-error"
+UNCLOSED_QUOTES = "unclosed-quotes"
+DUPLICATE_KEY = "duplicate-key"
+DUPLICATE_SECTION = "duplicate-section"
+INVALID_VALUE = "invalid-value"
+INVALID_PRIZE = "invalid-prize"
+MISSING_MOD_DIR = "missing-mod-dir"
+FILE_NOT_FOUND = "file-not-found"
+RESTRICTED_FILENAME = "restricted-filename"
+INVALID_ASSET = "invalid-asset"
+DUPLICATE_FORCED_EVENT = "duplicate-forced-event"
+LOCATION_MISMATCH = "location-mismatch"
+UNREACHABLE_ENDING = "unreachable-ending"
+
+# Single problem found in a file, line and key are None when it's not tied to one
+class Diagnostic:
+    __slots__ = ('file', 'line', 'key', 'rule', 'severity', 'message')
+
+    def __init__(self, file, line, key, rule, severity, message):
+        self.file = file
+        self.line = line
+        self.key = key
+        self.rule = rule
+        self.severity = severity
+        self.message = message
+
+    def __repr__(self):
+        return f"Diagnostic({self.file!r}, {self.line!r}, {self.key!r}, {self.rule!r}, {self.severity!r}, {self.message!r})"
+
+    # Plain dict, so diagnostics can be stored in the validation cache
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @staticmethod
+    def from_dict(values):
+        return Diagnostic(values['file'], values['line'], values['key'], values['rule'], values['severity'], values['message'])
+
+# Outcome of validating a single file
+class FileResult:
+    __slots__ = ('path', 'kind', 'valid', 'message')
+
+    def __init__(self, path, kind, valid, message):
+        self.path = path
+        self.kind = kind
+        self.valid = valid
+        self.message = message
+
+    def __repr__(self):
+        return f"FileResult({self.path!r}, {self.kind!r}, {self.valid!r}, {self.message!r})"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+# Everything found by one validation run, returned by woh_validator.validate_path
+# files and diagnostics are in the order they were found, message sums up the whole run
+class Report:
+    __slots__ = ('valid', 'message', 'files', 'diagnostics')
+
+    def __init__(self, valid, message, files, diagnostics):
+        self.valid = valid
+        self.message = message
+        self.files = files
+        self.diagnostics = diagnostics
+
+    def __repr__(self):
+        return f"Report({self.valid!r}, {self.message!r}, {len(self.files)} files, {len(self.diagnostics)} diagnostics)"
+
+    @property
+    def error_count(self):
+        return sum(1 for diagnostic in self.diagnostics if diagnostic.severity == ERROR)
+
+    # Plain dict, ready for json.dumps
+    def to_dict(self):
+        return {
+            'valid': self.valid,
+            'message': self.message,
+            'errors': self.error_count,
+            'files': [file.to_dict() for file in self.files],
+            'diagnostics': [diagnostic.to_dict() for diagnostic in self.diagnostics],
+        }
+
+# Every diagnostic found during a run, in the order they were found
+# Validation continues after errors until max_errors is reached, None means no limit
+# Diagnostics, validated files and text printed by validators are passed on to reporter as they arrive, without one the text is dropped
+# collect_summaries - also summarize files validated on their own, mysteries and linked files are always summarized
+class DiagnosticCollector:
+
+    def __init__(self, max_errors=None, reporter=None, collect_summaries=False):
+        self.max_errors = max_errors
+        self.reporter = reporter
+        self.collect_summaries = collect_summaries
+        self.diagnostics = []
+        # FileResult of every validated file
+        self.files = []
+        # mod_summary.FileSummary of every validated file that could be parsed, for rules spanning files
+        self.summaries = []
+        self.error_count = 0
+        # The same problem can be found twice, e.g. a missing triggered event by the event's checks and by the graph walk
+        self.seen = set()
+
+    # Returns False if the same diagnostic was already collected
+    # Only diagnostics tied to both a line and a key are merged, others can't be told apart from a different problem
+    def add(self, diagnostic):
+        if diagnostic.line is not None and diagnostic.key is not None:
+            identity = (diagnostic.file, diagnostic.line, diagnostic.key, diagnostic.rule)
+            if identity in self.seen:
+                return False
+            self.seen.add(identity)
+        self.diagnostics.append(diagnostic)
+        if diagnostic.severity == ERROR:
+            self.error_count += 1
+        if self.reporter is not None:
+            self.reporter.diagnostic(diagnostic)
+        return True
+
+    def file_validated(self, path, kind, valid, message):
+        self.files.append(FileResult(path, kind, valid, message))
+        if self.reporter is not None:
+            self.reporter.file(path, kind, valid, message)
+
+    # Progress and problems as validators print them, the reporter decides where the text goes
+    def print(self, text="", end="\n"):
+        if self.reporter is not None:
+            self.reporter.text(text + end)
+
+    def add_summary(self, summary):
+        self.summaries.append(summary)
+
+    @property
+    def limit_reached(self):
+        return self.max_errors is not None and self.error_count >= self.max_errors
+
+# Used by checks, which only collect diagnostics when given a collector
+def report(diagnostics, document, line, key, rule, message, severity=ERROR):
+    if diagnostics is not None:
+        diagnostics.add(Diagnostic(document.filepath, line, key, rule, severity, message))
@@ -0,0 +1,270 @@
+import os
+
+# Mods can be read from .zip archives without extracting them, e.g. mods/my_mystery.zip/mystery/mystery.ito
+ARCHIVE_EXTENSION = ".zip"
+
+# Plain access to files on disk, checks only go through this so other sources can be swapped in
+class FileSystem:
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    # Actual path if path only exists with different letter case, None otherwise
+    def match_ignoring_case(self, path):
+        return None
+
+    # Same value for every spelling of a path to one file, e.g. with ".." or other separators, or through a symlink
+    def identity(self, path):
+        return os.path.normcase(os.path.realpath(path))
+
+    # .ito files are read as text, with universal newlines like open() does by default
+    def open(self, path):
+        return open(path, 'r', encoding='utf-8')
+
+    # [size, modification time] of a file, None if it doesn't exist
+    # A list, so it compares equal to itself after being stored as JSON
+    def stamp(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    # First size bytes of a file, used to check headers of images and sounds
+    def read_bytes(self, path, size):
+        with open(path, 'rb') as file:
+            return file.read(size)
+
+    def close(self):
+        pass
+
+# Index of everything under root, built with a single os.scandir walk
+# Existence checks under root are answered from memory, anything outside root falls back to the disk
+class FileSystemIndex:
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.root_key = os.path.normcase(self.root)
+        # os.path.normcase keeps the platform's own case sensitivity, like os.path.exists
+        self.paths = set()
+        # Lowercase path -> actual path, used to flag references that only resolve on case-insensitive file systems
+        self.paths_ignoring_case = {}
+        # Path -> identity, resolving symlinks costs a stat call per path component
+        self.identities = {}
+        # Path of every file under root
+        self.filepaths = []
+
+        directories = [self.root]
+        while directories:
+            directory = directories.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        self.add(entry.path)
+                        if entry.is_dir(follow_symlinks=False):
+                            directories.append(entry.path)
+                        else:
+                            self.filepaths.append(entry.path)
+            except OSError:
+                continue
+        self.add(self.root)
+
+    def add(self, path):
+        path = os.path.abspath(path)
+        self.paths.add(os.path.normcase(path))
+        self.paths_ignoring_case.setdefault(path.lower(), path)
+
+    def is_indexed(self, path_key):
+        return path_key == self.root_key or path_key.startswith(self.root_key + os.sep)
+
+    def exists(self, path):
+        path = os.path.abspath(path)
+        path_key = os.path.normcase(path)
+        if not self.is_indexed(path_key):
+            return os.path.exists(path)
+        return path_key in self.paths
+
+    def match_ignoring_case(self, path):
+        path = os.path.abspath(path)
+        path_key = os.path.normcase(path)
+        if not self.is_indexed(path_key) or path_key in self.paths:
+            return None
+        return self.paths_ignoring_case.get(path.lower())
+
+    def identity(self, path):
+        identity = self.identities.get(path)
+        if identity is None:
+            identity = os.path.normcase(os.path.realpath(path))
+            self.identities[path] = identity
+        return identity
+
+    def open(self, path):
+        return open(path, 'r', encoding='utf-8')
+
+    def stamp(self, path):
+        return OS_FILE_SYSTEM.stamp(path)
+
+    def read_bytes(self, path, size):
+        return OS_FILE_SYSTEM.read_bytes(path, size)
+
+    def close(self):
+        pass
+
+# Index of a .zip archive built from its central directory, without extracting anything
+# Paths inside the archive are the archive's path followed by the member's, files are streamed from their members
+# Anything outside the archive falls back to the disk, like with FileSystemIndex
+class ArchiveFileSystem:
+
+    def __init__(self, archive_path):
+        import zipfile
+        self.root = os.path.abspath(archive_path)
+        self.root_key = os.path.normcase(self.root)
+        self.archive = zipfile.ZipFile(self.root)
+        # Normcased path inside the archive -> ZipInfo, None for directories, including ones only implied by member names
+        self.members = {"": None}
+        # Lowercase path inside the archive -> actual one
+        self.members_ignoring_case = {}
+        self.identities = {}
+        # Path of every file in the archive, in archive order
+        self.filepaths = []
+
+        for info in self.archive.infolist():
+            member = os.path.normpath(info.filename.replace('/', os.sep).replace('\\', os.sep)).lstrip(os.sep)
+            if member in ("", os.curdir) or member.startswith(os.pardir + os.sep) or member == os.pardir:
+                continue
+            self.add(member, None if info.is_dir() else info)
+            if not info.is_dir():
+                self.filepaths.append(os.path.join(self.root, member))
+            parent = os.path.dirname(member)
+            while parent and os.path.normcase(parent) not in self.members:
+                self.add(parent, None)
+                parent = os.path.dirname(parent)
+
+    def add(self, member, info):
+        self.members[os.path.normcase(member)] = info
+        self.members_ignoring_case.setdefault(member.lower(), member)
+
+    # Path inside the archive, or None if path is outside of it
+    def member(self, path):
+        path = os.path.abspath(path)
+        path_key = os.path.normcase(path)
+        if path_key == self.root_key:
+            return ""
+        if path_key.startswith(self.root_key + os.sep):
+            return path[len(self.root) + 1:]
+        return None
+
+    def exists(self, path):
+        member = self.member(path)
+        if member is None:
+            return os.path.exists(path)
+        return os.path.normcase(member) in self.members
+
+    def match_ignoring_case(self, path):
+        member = self.member(path)
+        if member is None or os.path.normcase(member) in self.members:
+            return None
+        match = self.members_ignoring_case.get(member.lower())
+        return os.path.join(self.root, match) if match is not None else None
+
+    # Paths inside the archive can't be symlinks, normalizing them is enough
+    def identity(self, path):
+        identity = self.identities.get(path)
+        if identity is None:
+            if self.member(path) is None:
+                identity = os.path.normcase(os.path.realpath(path))
+            else:
+                identity = os.path.normcase(os.path.abspath(path))
+            self.identities[path] = identity
+        return identity
+
+    def open(self, path):
+        member = self.member(path)
+        if member is None:
+            return open(path, 'r', encoding='utf-8')
+        info = self.members.get(os.path.normcase(member))
+        if info is None:
+            raise FileNotFoundError(f"No such file in archive {self.root}: '{member}'")
+        import io
+        return io.TextIOWrapper(self.archive.open(info), encoding='utf-8')
+
+    # Members can't be touched without rewriting the archive, so their size and CRC-32 stand in for the modification time
+    def stamp(self, path):
+        member = self.member(path)
+        if member is None:
+            return OS_FILE_SYSTEM.stamp(path)
+        info = self.members.get(os.path.normcase(member))
+        if info is None:
+            return None
+        return [info.file_size, info.CRC]
+
+    def read_bytes(self, path, size):
+        member = self.member(path)
+        if member is None:
+            return OS_FILE_SYSTEM.read_bytes(path, size)
+        info = self.members.get(os.path.normcase(member))
+        if info is None:
+            raise FileNotFoundError(f"No such file in archive {self.root}: '{member}'")
+        with self.archive.open(info) as file:
+            return file.read(size)
+
+    def close(self):
+        self.archive.close()
+
+# (archive filepath, path inside it) if path points into a .zip archive, (None, path) otherwise
+def split_archive_path(path):
+    parts = os.path.abspath(path).split(os.sep)
+    for index, part in enumerate(parts):
+        if part.lower().endswith(ARCHIVE_EXTENSION):
+            archive_path = os.sep.join(parts[:index + 1])
+            if os.path.isfile(archive_path):
+                return archive_path, os.sep.join(parts[index + 1:])
+    return None, path
+
+# Index of mod_root, read from the archive's central directory if mod_root is inside a .zip
+def open_file_system(mod_root):
+    archive_path, _ = split_archive_path(mod_root if mod_root else os.curdir)
+    if archive_path is not None:
+        return ArchiveFileSystem(archive_path)
+    return FileSystemIndex(mod_root if mod_root else os.curdir)
+
+# Wraps another file system and records the result of every existence check, and the stamp of every file whose content was checked
+# Missing paths that were also looked up ignoring letter case are recorded with the match, so the hint is checked again too
+class RecordingFileSystem:
+
+    def __init__(self, fs):
+        self.fs = fs
+        # Absolute path -> whether it existed, its stamp, or its letter case match ("" if there was none)
+        self.checked = {}
+
+    def exists(self, path):
+        exists = self.fs.exists(path)
+        self.checked[os.path.abspath(path)] = exists
+        return exists
+
+    def match_ignoring_case(self, path):
+        match = self.fs.match_ignoring_case(path)
+        if not self.fs.exists(path):
+            self.checked[os.path.abspath(path)] = match if match is not None else ""
+        return match
+
+    def identity(self, path):
+        return self.fs.identity(path)
+
+    def open(self, path):
+        return self.fs.open(path)
+
+    # Stamps of files whose content was checked are recorded in place of their existence
+    def stamp(self, path):
+        stamp = self.fs.stamp(path)
+        if stamp is not None:
+            self.checked[os.path.abspath(path)] = stamp
+        return stamp
+
+    def read_bytes(self, path, size):
+        return self.fs.read_bytes(path, size)
+
+    def close(self):
+        self.fs.close()
+
+OS_FILE_SYSTEM = FileSystem()
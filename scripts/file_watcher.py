@@ -0,0 +1,33 @@
+import os
+
+# (mtime, size) of every file under root, walked with os.scandir
+def snapshot_files(root):
+    files = {}
+    directories = [root]
+    while directories:
+        directory = directories.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[os.path.abspath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            # Directory removed while walking, picked up on the next poll
+            continue
+    return files
+
+# Paths modified, and paths added or removed between two snapshots
+def diff_snapshots(old_files, new_files):
+    modified = set()
+    added_or_removed = set()
+    for path, state in new_files.items():
+        old_state = old_files.get(path)
+        if old_state is None:
+            added_or_removed.add(path)
+        elif old_state != state:
+            modified.add(path)
+    added_or_removed.update(path for path in old_files if path not in new_files)
+    return modified, added_or_removed
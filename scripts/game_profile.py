@@ -0,0 +1,132 @@
+import os
+import sys
+import zlib
+import marshal
+
+# Game version the validator was written for, its config tables are the ones in config/ itself
+DEFAULT_GAME_VERSION = "woh-1.01"
+# Other game versions are in config/games/<version>/, with the same layout as config/
+# Only tables that differ from the default version need to be there, the rest are taken from config/
+GAMES_DIR_NAME = "games"
+
+BUNDLE_MAGIC = b"WOHPROF1"
+BUNDLE_EXTENSION = ".bundle"
+# Bumped whenever the bundle layout changes, older bundles are rebuilt
+BUNDLE_FORMAT = 1
+
+# Every config table of one game version and language, read from a single bundle file
+class GameProfile:
+
+    def __init__(self, game_version, language, tables, digest):
+        self.game_version = game_version
+        self.language = language
+        # Path relative to config/, with '/' separators -> lines of the table as read from the file
+        self.tables = tables
+        # SHA-256 of game version, language and every table, computed when the bundle was built
+        self.digest = digest
+
+def profile_directory(config_path, game_version):
+    if game_version == DEFAULT_GAME_VERSION:
+        return config_path
+    return os.path.join(config_path, GAMES_DIR_NAME, game_version)
+
+def available_game_versions(config_path):
+    try:
+        with os.scandir(os.path.join(config_path, GAMES_DIR_NAME)) as entries:
+            return [DEFAULT_GAME_VERSION] + sorted(entry.name for entry in entries if entry.is_dir())
+    except OSError:
+        return [DEFAULT_GAME_VERSION]
+
+def bundle_path(config_path, game_version, language):
+    return os.path.join(profile_directory(config_path, game_version), f"{game_version}.{language}{BUNDLE_EXTENSION}")
+
+# Relative path -> (source filepath, mtime, size) of every table in the profile
+# Tables of the game version's directory replace the ones with the same path in config/
+def source_stamps(config_path, game_version, language):
+    directories = [config_path]
+    if game_version != DEFAULT_GAME_VERSION:
+        directories.append(profile_directory(config_path, game_version))
+
+    stamps = {}
+    for directory in directories:
+        for prefix in ("", language + "/"):
+            try:
+                with os.scandir(os.path.join(directory, prefix)) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('.txt') and entry.is_file():
+                            stat = entry.stat()
+                            stamps[prefix + entry.name] = (entry.path, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+    return stamps
+
+def digest_tables(game_version, language, tables):
+    import hashlib
+    return hashlib.sha256(marshal.dumps((BUNDLE_FORMAT, game_version, language, tables))).hexdigest()
+
+# Lines are kept exactly as iterating the file yields them, so tables parse the same from the bundle and from the file
+def compile_tables(stamps):
+    tables = {}
+    for relative_path in sorted(stamps):
+        with open(stamps[relative_path][0], 'r', encoding='utf-8') as file:
+            tables[relative_path] = tuple(file)
+    return tables
+
+# Layout: magic, CRC-32 of the payload, payload - marshalled dict with format, game version, language, source stamps, digest and tables
+# Written to a temporary file first, so a run reading the bundle meanwhile never sees half of it
+def write_bundle(filepath, game_version, language, stamps, tables, digest):
+    payload = marshal.dumps({'format': BUNDLE_FORMAT, 'game_version': game_version, 'language': language,
+                             'stamps': stamps, 'digest': digest, 'tables': tables})
+    temp_filepath = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(temp_filepath, 'wb') as file:
+            file.write(BUNDLE_MAGIC + zlib.crc32(payload).to_bytes(4, 'little') + payload)
+        os.replace(temp_filepath, filepath)
+    except OSError:
+        if os.path.exists(temp_filepath):
+            os.remove(temp_filepath)
+        raise
+
+# Bundle contents, or None if it's missing, corrupted or written by a different Python version
+def read_bundle(filepath):
+    try:
+        with open(filepath, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    header_size = len(BUNDLE_MAGIC) + 4
+    if len(data) < header_size or not data.startswith(BUNDLE_MAGIC):
+        return None
+    payload = data[header_size:]
+    if zlib.crc32(payload) != int.from_bytes(data[len(BUNDLE_MAGIC):header_size], 'little'):
+        return None
+    try:
+        bundle = marshal.loads(payload)
+    except (ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(bundle, dict) or bundle.get('format') != BUNDLE_FORMAT:
+        return None
+    return bundle
+
+# Compiles the profile from its .txt files and saves the bundle
+# Returns (GameProfile, bundle filepath or None if it couldn't be written, e.g. read-only install)
+def build_profile(config_path, game_version, language):
+    stamps = source_stamps(config_path, game_version, language)
+    tables = compile_tables(stamps)
+    digest = digest_tables(game_version, language, tables)
+    filepath = bundle_path(config_path, game_version, language)
+    try:
+        write_bundle(filepath, game_version, language, stamps, tables, digest)
+    except OSError:
+        filepath = None
+    return GameProfile(game_version, language, tables, digest), filepath
+
+# Loads the profile with a single read of its bundle
+# The bundle is rebuilt first if any .txt file was added, removed or changed since it was built
+# Config of an executable built with PyInstaller can't change, so its bundle is used without checking
+def load_profile(config_path, game_version, language):
+    bundle = read_bundle(bundle_path(config_path, game_version, language))
+    if bundle is not None and bundle['game_version'] == game_version and bundle['language'] == language:
+        if getattr(sys, 'frozen', False) or bundle['stamps'] == source_stamps(config_path, game_version, language):
+            return GameProfile(game_version, language, bundle['tables'], bundle['digest'])
+    return build_profile(config_path, game_version, language)[0]
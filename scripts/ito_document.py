@@ -0,0 +1,69 @@
+import os
+
+# Single key="value" line of an .ito file
+class ItoEntry:
+    __slots__ = ('line_number', 'section', 'key', 'value')
+
+    def __init__(self, line_number, section, key, value):
+        self.line_number = line_number
+        self.section = section
+        self.key = key
+        # Value with surrounding whitespace and quotes removed, checks apply their own normalization on top
+        self.value = value
+
+    def __repr__(self):
+        return f"ItoEntry({self.line_number}, {self.section!r}, {self.key!r}, {self.value!r})"
+
+# Parsed .ito file - read and split once, then shared by every check
+class ItoDocument:
+
+    def __init__(self, filepath, text):
+        self.filepath = filepath
+        self.basename = os.path.basename(filepath)
+        # Only needed by the validation cache, hashed on first use
+        self.text = text
+        self._content_hash = None
+        # Raw quote count for each line, index 0 is line 1
+        self.quote_counts = []
+        # (line_number, '[section]') in file order
+        self.sections = []
+        # ItoEntry for every line containing '=', in file order
+        self.entries = []
+        self.header = ""
+
+        lines = text.split('\n')
+        if lines and lines[-1] == '':
+            lines.pop()
+
+        section = None
+        for line_number, line in enumerate(lines, 1):
+            self.quote_counts.append(line.count('"'))
+            line = line.strip()
+            if line_number == 1:
+                self.header = line
+            if '=' in line:
+                key, value = line.split('=', 1)
+                self.entries.append(ItoEntry(line_number, section, key.strip(), value.strip().strip('"')))
+            elif line.startswith('[') and line.endswith(']'):
+                section = line
+                self.sections.append((line_number, line))
+
+    @property
+    def content_hash(self):
+        if self._content_hash is None:
+            import hashlib
+            self._content_hash = hashlib.sha256(self.text.encode('utf-8')).hexdigest()
+            self.text = None
+        return self._content_hash
+
+    # First value for given key, or default if key is not present
+    def get(self, key, default=None):
+        for entry in self.entries:
+            if entry.key == key:
+                return entry.value
+        return default
+
+# fs - file system the file is read from, e.g. an ArchiveFileSystem for files inside a .zip
+def parse_ito(filepath, fs=None):
+    with (open(filepath, 'r', encoding='utf-8') if fs is None else fs.open(filepath)) as file:
+        return ItoDocument(filepath, file.read())
@@ -0,0 +1,322 @@
+import os
+
+from .ito_document import parse_ito
+from .file_system import OS_FILE_SYSTEM
+
+MYSTERY = "mystery"
+EVENT = "event"
+ENEMY = "enemy"
+
+# First line of an .ito file -> its type
+HEADERS = {'[mystery]': MYSTERY, '[event]': EVENT, '[enemy]': ENEMY}
+
+# Status of a discovered reference
+LINKED = "linked"
+DUPLICATE = "duplicate"
+MISSING = "missing"
+
+# Link from one .ito file to another, e.g. _frc event of a mystery or trigger_enemy prize of an event
+class Reference:
+    __slots__ = ('kind', 'key', 'path', 'full_path', 'source', 'line_number')
+
+    def __init__(self, kind, key, path, full_path, source, line_number=None):
+        self.kind = kind
+        self.key = key
+        # Path as written in .ito, with mod_dir excluded where the key requires it
+        self.path = path
+        self.full_path = full_path
+        # Path of the .ito file containing the reference, and the line it's on
+        self.source = source
+        self.line_number = line_number
+
+    def __repr__(self):
+        return f"Reference({self.kind!r}, {self.key!r}, {self.path!r}, {self.source!r})"
+
+# Type of .ito file recognized by its header line, None if it's not a mystery, event or enemy
+# fs - file system the file is read from, e.g. an ArchiveFileSystem for files inside a .zip
+def read_kind(filepath, fs=None):
+    with (open(filepath, 'r', encoding='utf-8') if fs is None else fs.open(filepath)) as file:
+        return HEADERS.get(file.readline().strip())
+
+def resolve_path(key, path, mod_dir, mod_root, keys_requiring_mod_dir):
+    path = path.strip().strip('"').replace('\\', os.sep).replace('/', os.sep)
+    if key in keys_requiring_mod_dir and keys_requiring_mod_dir[key] and path.startswith(mod_dir):
+        path = path[len(mod_dir):]
+    return path, os.path.join(mod_root, path)
+
+# Events forced by mystery _frc keys
+def find_forced_events(document, mod_dir, mod_root, keys_requiring_mod_dir):
+    references = []
+    for entry in document.entries:
+        if entry.key.endswith('_frc') and entry.value:
+            path, full_path = resolve_path(entry.key, entry.value, mod_dir, mod_root, keys_requiring_mod_dir)
+            references.append(Reference(EVENT, entry.key, path, full_path, document.filepath, entry.line_number))
+    return references
+
+# Events and enemies triggered by trigger_event/trigger_enemy win and fail prizes, enemies first
+def find_triggered_files(document, mod_dir, mod_root, keys_requiring_mod_dir):
+    events_to_check = {}
+    enemies_to_check = {}
+    prize_conditions = {}
+    line_numbers = {}
+
+    for entry in document.entries:
+        key = entry.key
+        if 'winprize' in key or 'failprize' in key:
+            prize_conditions[key] = entry.value
+        elif 'winnumber' in key or 'failnumber' in key:
+            path = entry.value
+            line_numbers[key] = entry.line_number
+            condition_key = key.replace('number', 'prize')
+            # Check if the corresponding prize key indicates a file path needs checking
+            if prize_conditions.get(condition_key) == "trigger_event":
+                if path:
+                    events_to_check[key] = path
+            if prize_conditions.get(condition_key) == "trigger_enemy":
+                if path:
+                    enemies_to_check[key] = path
+
+    references = []
+    for kind, files_to_check in ((ENEMY, enemies_to_check), (EVENT, events_to_check)):
+        for key, path in files_to_check.items():
+            path, full_path = resolve_path(key, path, mod_dir, mod_root, keys_requiring_mod_dir)
+            references.append(Reference(kind, key, path, full_path, document.filepath, line_numbers[key]))
+    return references
+
+# Walks everything reachable from references, lazily, without validating it
+# Yields (depth, reference, status, document) in the order files are validated
+# document is the parsed file for LINKED references, or None if it could not be parsed
+# Files are told apart by fs.identity, so a file reached through differently spelled paths is only LINKED once
+# already_checked_events/enemies contain identities too
+def discover_linked_files(references, mod_dir, mod_root, keys_requiring_mod_dir, already_checked_events=(), already_checked_enemies=(), fs=None):
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    seen = {EVENT: set(already_checked_events), ENEMY: set(already_checked_enemies)}
+
+    worklist = [(1, reference) for reference in reversed(references)]
+    while worklist:
+        depth, reference = worklist.pop()
+        if not fs.exists(reference.full_path):
+            yield depth, reference, MISSING, None
+            continue
+        identity = fs.identity(reference.full_path)
+        if identity in seen[reference.kind]:
+            yield depth, reference, DUPLICATE, None
+            continue
+        seen[reference.kind].add(identity)
+
+        try:
+            document = parse_ito(reference.full_path, fs)
+        except Exception:
+            # Reported when the file itself is validated
+            document = None
+        yield depth, reference, LINKED, document
+
+        if reference.kind == EVENT and document is not None:
+            linked_references = find_triggered_files(document, mod_dir, mod_root, keys_requiring_mod_dir)
+            worklist.extend((depth + 1, linked_reference) for linked_reference in reversed(linked_references))
+
+# File in a ModGraph, missing files referenced from the mod are nodes too
+class GraphNode:
+    __slots__ = ('path', 'kind', 'exists', 'root')
+
+    def __init__(self, path, kind, exists, root=False):
+        self.path = path
+        self.kind = kind
+        self.exists = exists
+        self.root = root
+
+    def __repr__(self):
+        return f"GraphNode({self.path!r}, {self.kind!r}, {self.exists!r}, {self.root!r})"
+
+# Mystery -> _frc event -> trigger_event/trigger_enemy structure of a mod
+# Nodes are keyed by fs.identity, each edge is the Reference it came from
+class ModGraph:
+
+    def __init__(self, fs=None):
+        self.fs = fs if fs is not None else OS_FILE_SYSTEM
+        # identity -> GraphNode, in the order files were reached
+        self.nodes = {}
+        # identity -> list of (Reference, target identity) going out of the file
+        self.forward = {}
+        # identity -> list of (Reference, source identity) pointing at the file
+        self.reverse = {}
+
+    def identity(self, path):
+        return self.fs.identity(path)
+
+    def add_node(self, path, kind, exists=True, root=False):
+        identity = self.identity(path)
+        node = self.nodes.get(identity)
+        if node is None:
+            node = GraphNode(os.path.normpath(os.path.abspath(path)), kind, exists, root)
+            self.nodes[identity] = node
+            self.forward[identity] = []
+            self.reverse[identity] = []
+        elif root:
+            node.root = True
+        return identity
+
+    def add_reference(self, reference, exists=True):
+        source = self.identity(reference.source)
+        target = self.add_node(reference.full_path, reference.kind, exists)
+        self.forward[source].append((reference, target))
+        self.reverse[target].append((reference, source))
+
+    def node(self, path):
+        return self.nodes.get(self.identity(path))
+
+    # References pointing at path, without scanning the mod
+    def references_to(self, path):
+        return [reference for reference, _ in self.reverse.get(self.identity(path), ())]
+
+    def references_from(self, path):
+        return [reference for reference, _ in self.forward.get(self.identity(path), ())]
+
+    def successors(self, identity):
+        return list(dict.fromkeys(target for _, target in self.forward[identity]))
+
+    def edge_count(self):
+        return sum(len(edges) for edges in self.forward.values())
+
+    # Tarjan's algorithm without recursion, so long trigger chains don't hit the recursion limit
+    # Returns lists of identities, every component comes after all components reachable from it
+    def strongly_connected_components(self):
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+
+        for start in self.nodes:
+            if start in index:
+                continue
+            index[start] = lowlink[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            work = [(start, iter(self.successors(start)))]
+            while work:
+                node, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self.successors(successor))))
+                        break
+                    if successor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component[::-1])
+        return components
+
+    # Trigger loops - groups of files that can trigger each other, including a file triggering itself
+    def cycles(self):
+        return [component for component in self.strongly_connected_components()
+                if len(component) > 1 or component[0] in self.successors(component[0])]
+
+    # Longest chain of references starting at a root, a trigger loop counts as a single step
+    # Returns list of steps, each a list of identities with more than one only for loops
+    def longest_chain(self):
+        components = self.strongly_connected_components()
+        component_of = {identity: number for number, component in enumerate(components) for identity in component}
+        length = [0] * len(components)
+        following = [None] * len(components)
+        # Components reachable from a component come before it
+        for number, component in enumerate(components):
+            length[number] = 1
+            for identity in component:
+                for successor in self.successors(identity):
+                    successor_number = component_of[successor]
+                    if successor_number != number and length[successor_number] + 1 > length[number]:
+                        length[number] = length[successor_number] + 1
+                        following[number] = successor_number
+
+        roots = [component_of[identity] for identity, node in self.nodes.items() if node.root]
+        if not roots:
+            return []
+        number = max(roots, key=lambda root: length[root])
+        chain = []
+        while number is not None:
+            chain.append(components[number])
+            number = following[number]
+        return chain
+
+    # .ito files under mod_root not reached from any root, in sorted order
+    def orphans(self, mod_root):
+        orphans = []
+        for directory, subdirectories, filenames in os.walk(mod_root if mod_root else os.curdir):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith('.ito'):
+                    path = os.path.join(directory, filename)
+                    if self.identity(path) not in self.nodes:
+                        orphans.append(os.path.normpath(os.path.abspath(path)))
+        return orphans
+
+    # Plain dict for JSON export, paths relative to mod_root
+    def to_dict(self, mod_root):
+        return {
+            'nodes': [{'path': relative_path(node.path, mod_root), 'kind': node.kind, 'exists': node.exists, 'root': node.root}
+                      for node in self.nodes.values()],
+            'edges': [{'source': relative_path(self.nodes[source].path, mod_root), 'target': relative_path(self.nodes[target].path, mod_root),
+                       'key': reference.key, 'line': reference.line_number}
+                      for source, edges in self.forward.items() for reference, target in edges],
+        }
+
+    # Graphviz source, missing files are drawn dashed
+    def to_dot(self, mod_root):
+        shapes = {MYSTERY: 'doubleoctagon', EVENT: 'box', ENEMY: 'ellipse'}
+        names = {identity: f"n{number}" for number, identity in enumerate(self.nodes)}
+        lines = ['digraph mod {', '    rankdir=LR;']
+        for identity, node in self.nodes.items():
+            attributes = f'label={dot_string(relative_path(node.path, mod_root))}, shape={shapes.get(node.kind, "box")}'
+            if not node.exists:
+                attributes += ', style=dashed, color=red'
+            lines.append(f'    {names[identity]} [{attributes}];')
+        for source, edges in self.forward.items():
+            for reference, target in edges:
+                lines.append(f'    {names[source]} -> {names[target]} [label={dot_string(reference.key)}];')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+def relative_path(path, mod_root):
+    return os.path.relpath(path, os.path.abspath(mod_root if mod_root else os.curdir)).replace(os.sep, '/')
+
+def dot_string(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+# Builds the graph of everything reachable from root_paths in a single pass, each file is parsed once
+# forced_keys_requiring_mod_dir - mystery _frc keys, trigger_keys_requiring_mod_dir - event trigger keys
+def build_graph(root_paths, mod_dir, mod_root, forced_keys_requiring_mod_dir, trigger_keys_requiring_mod_dir, fs=None):
+    graph = ModGraph(fs)
+    references = []
+    checked = {EVENT: set(), ENEMY: set()}
+    for root_path in root_paths:
+        document = parse_ito(root_path, graph.fs)
+        kind = HEADERS.get(document.header)
+        graph.add_node(root_path, kind, True, True)
+        if kind in checked:
+            checked[kind].add(graph.identity(root_path))
+        if kind == MYSTERY:
+            references += find_forced_events(document, mod_dir, mod_root, forced_keys_requiring_mod_dir)
+        elif kind == EVENT:
+            references += find_triggered_files(document, mod_dir, mod_root, trigger_keys_requiring_mod_dir)
+
+    for _, reference, status, _ in discover_linked_files(references, mod_dir, mod_root, trigger_keys_requiring_mod_dir, checked[EVENT], checked[ENEMY], graph.fs):
+        graph.add_reference(reference, status != MISSING)
+    return graph
@@ -0,0 +1,156 @@
+import os
+from .ito_document import parse_ito
+from .mod_graph import MYSTERY, EVENT, ENEMY, HEADERS, find_triggered_files
+from .diagnostics import Diagnostic, WARNING, DUPLICATE_FORCED_EVENT, LOCATION_MISMATCH, UNREACHABLE_ENDING
+
+# Extra prize ending the mystery
+ENDING_TRIGGER = "ending_trigger"
+
+# What rules spanning several files need to know about a file, built once while it's validated
+# Plain enough to be cached with the file's result, so the whole-mod pass doesn't open validated files again
+# Files the mystery never reached are read by summarize_unreached instead
+class FileSummary:
+    __slots__ = ('path', 'kind', 'keys', 'prizes', 'references', 'location', 'location_line', 'character')
+
+    def __init__(self, path, kind, keys, prizes, references, location, location_line, character):
+        self.path = path
+        self.kind = kind
+        # Every key in file order
+        self.keys = keys
+        # (key, prize type, line number) of every win, fail and extra prize
+        self.prizes = prizes
+        # (kind, key, path as written, full path, line number) of every _frc key and trigger_event/trigger_enemy prize
+        self.references = references
+        self.location = location
+        self.location_line = location_line
+        self.character = character
+
+    def __repr__(self):
+        return f"FileSummary({self.path!r}, {self.kind!r}, {len(self.keys)} keys, {len(self.references)} references)"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @staticmethod
+    def from_dict(values):
+        return FileSummary(values['path'], values['kind'], values['keys'], [tuple(prize) for prize in values['prizes']],
+                           [tuple(reference) for reference in values['references']], values['location'], values['location_line'], values['character'])
+
+# references - Reference of every file the document links, as found by mod_graph
+def summarize(document, kind, references=()):
+    location = None
+    location_line = None
+    character = None
+    prizes = []
+    for entry in document.entries:
+        if 'prize' in entry.key and entry.value:
+            prizes.append((entry.key, entry.value, entry.line_number))
+        elif entry.key == 'location' and location is None:
+            location = entry.value
+            location_line = entry.line_number
+        elif entry.key == 'character' and character is None:
+            character = entry.value
+    return FileSummary(document.filepath, kind, [entry.key for entry in document.entries], prizes,
+                       [(reference.kind, reference.key, reference.path, reference.full_path, reference.line_number) for reference in references],
+                       location, location_line, character)
+
+# (path, mod_dir, mod_root) -> (stamp, keys_requiring_mod_dir, FileSummary or None) of files summarize_unreached has read,
+# kept for the lifetime of the process, so re-running a mystery, e.g. with --watch or in serve.py workers, only reads changed files
+unreached_summaries = {}
+# Long-running processes start over once this many summaries are kept
+MAX_CACHED_SUMMARIES = 100000
+
+# Summary of an unreached file, None if it's not an event or enemy
+# Raises OSError or UnicodeDecodeError if the file can't be read
+def summarize_file(filepath, mod_dir, mod_root, keys_requiring_mod_dir, fs):
+    key = (os.path.normcase(filepath), mod_dir, mod_root)
+    stamp = fs.stamp(filepath)
+    cached = unreached_summaries.get(key)
+    if cached is not None and stamp is not None and cached[0] == stamp and cached[1] == keys_requiring_mod_dir:
+        return cached[2]
+    document = parse_ito(filepath, fs)
+    kind = HEADERS.get(document.header)
+    summary = None
+    if kind == EVENT:
+        summary = summarize(document, kind, find_triggered_files(document, mod_dir, mod_root, keys_requiring_mod_dir))
+    elif kind == ENEMY:
+        summary = summarize(document, kind)
+    if len(unreached_summaries) >= MAX_CACHED_SUMMARIES:
+        unreached_summaries.clear()
+    unreached_summaries[key] = (stamp, keys_requiring_mod_dir, summary)
+    return summary
+
+# Summaries of .ito files in filepaths that are under mod_root but weren't validated, read through fs
+# Files are read again only once their size or modification time changed since the last call in this process
+# Files that can't be read are left out, they're not part of the mod as far as the game is concerned either
+def summarize_unreached(filepaths, reached, mod_dir, mod_root, keys_requiring_mod_dir, fs):
+    root = os.path.abspath(mod_root if mod_root else os.curdir) + os.sep
+    summaries = []
+    for filepath in sorted(filepaths):
+        if not filepath.lower().endswith('.ito') or not filepath.startswith(root) or fs.identity(filepath) in reached:
+            continue
+        try:
+            summary = summarize_file(filepath, mod_dir, mod_root, keys_requiring_mod_dir, fs)
+        except (OSError, UnicodeDecodeError):
+            continue
+        if summary is not None:
+            summaries.append(summary)
+    return summaries
+
+# Two _frc keys of a mystery forcing the same event, the event is only ever shown once
+def find_duplicate_forced_events(summaries, fs):
+    diagnostics = []
+    for summary in summaries:
+        if summary.kind != MYSTERY:
+            continue
+        forced = {}
+        for kind, key, path, full_path, line_number in summary.references:
+            if not key.endswith('_frc'):
+                continue
+            identity = fs.identity(full_path)
+            first = forced.get(identity)
+            if first is None:
+                forced[identity] = (key, line_number)
+                continue
+            message = f"Key '{key}' forces {path}, which is already forced by key '{first[0]}' at line {first[1]}"
+            diagnostics.append(Diagnostic(summary.path, line_number, key, DUPLICATE_FORCED_EVENT, WARNING, message))
+    return diagnostics
+
+# Enemies are only met in their own location, so one that's never triggered from an event there can't be fought
+# Events without a location don't rule anything out
+def find_location_mismatches(summaries, fs):
+    triggering_events = {}
+    for summary in summaries:
+        if summary.kind != EVENT:
+            continue
+        for kind, key, path, full_path, line_number in summary.references:
+            if kind == ENEMY:
+                triggering_events.setdefault(fs.identity(full_path), []).append(summary)
+
+    diagnostics = []
+    for summary in summaries:
+        if summary.kind != ENEMY or not summary.location:
+            continue
+        events = [event for event in triggering_events.get(fs.identity(summary.path), ()) if event.location]
+        if not events or any(event.location == summary.location for event in events):
+            continue
+        locations = ', '.join(f"{os.path.basename(event.path)} ('{event.location}')" for event in events)
+        message = f"Enemy location '{summary.location}' doesn't match the location of any event triggering it: {locations}"
+        diagnostics.append(Diagnostic(summary.path, summary.location_line, 'location', LOCATION_MISMATCH, WARNING, message))
+    return diagnostics
+
+# ending_trigger prizes of events no _frc key or trigger_event prize leads to, so the mystery can't end through them
+def find_unreachable_endings(unreached_summaries):
+    diagnostics = []
+    for summary in unreached_summaries:
+        for key, prize, line_number in summary.prizes:
+            if prize == ENDING_TRIGGER:
+                message = f"'{ENDING_TRIGGER}' at key '{key}' is never reached, no _frc key or trigger_event prize leads to {os.path.basename(summary.path)}"
+                diagnostics.append(Diagnostic(summary.path, line_number, key, UNREACHABLE_ENDING, WARNING, message))
+    return diagnostics
+
+# Rules spanning the whole mod, checked on summaries of the files validated from a mystery in a single pass over them
+# unreached_summaries - files under mod_root that weren't validated, see summarize_unreached
+# Returns warnings, time is linear in the number of files and references
+def analyze_mod(summaries, fs, unreached_summaries=()):
+    return find_duplicate_forced_events(summaries, fs) + find_location_mismatches(summaries, fs) + find_unreachable_endings(unreached_summaries)
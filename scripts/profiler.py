@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import builtins
+import importlib
+
+from . import config_registry
+
+DEFAULT_TOP = 10
+
+# Functions measured per call, in every module below that has them
+# The first argument is the parsed document or the path of the file being checked
+PROFILED_FUNCTIONS = [
+    'parse_ito',
+    'read_kind',
+    'check_quotes',
+    'check_no_duplicate_keys',
+    'check_key_value_rules',
+    'check_prize_rules',
+    'check_asset_references',
+    'check_music_references',
+    'check_trigger_references',
+]
+PROFILED_MODULES = ['validate_mystery', 'validate_event', 'validate_enemy', 'scripts.mod_graph']
+
+# Name used for time spent writing the report
+OUTPUT = "output"
+
+# Totals for one check or one file
+class Stats:
+    __slots__ = ('calls', 'seconds', 'opens', 'bytes_read', 'stat_calls', 'config_loads')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.opens = 0
+        self.bytes_read = 0
+        self.stat_calls = 0
+        self.config_loads = 0
+
+    def add(self, seconds, opens, bytes_read, stat_calls, config_loads):
+        self.calls += 1
+        self.seconds += seconds
+        self.opens += opens
+        self.bytes_read += bytes_read
+        self.stat_calls += stat_calls
+        self.config_loads += config_loads
+
+# File object counting what is read from it, in bytes of its UTF-8 encoding for text files
+class CountingFile:
+
+    def __init__(self, file, profiler):
+        self._file = file
+        self._profiler = profiler
+
+    def _count(self, data):
+        self._profiler.bytes_read += len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+        return data
+
+    def read(self, *args):
+        return self._count(self._file.read(*args))
+
+    def readline(self, *args):
+        return self._count(self._file.readline(*args))
+
+    def __iter__(self):
+        for line in self._file:
+            yield self._count(line)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._file.__exit__(exc_type, exc_value, traceback)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+# Report stream timing every write
+class TimedStream:
+
+    def __init__(self, stream, profiler):
+        self._stream = stream
+        self._profiler = profiler
+
+    def write(self, text):
+        started = time.perf_counter()
+        try:
+            return self._stream.write(text)
+        finally:
+            self._profiler.record(OUTPUT, None, time.perf_counter() - started, (0, 0, 0, 0))
+
+    def flush(self):
+        started = time.perf_counter()
+        try:
+            return self._stream.flush()
+        finally:
+            self._profiler.record(OUTPUT, None, time.perf_counter() - started, (0, 0, 0, 0))
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+# Time, file opens, bytes read, stat calls and config loads of every check and parsed file, enabled by --profile
+# Nothing is measured unless start() was called, it replaces the measured functions in their modules until stop()
+# top - number of checks and files listed in the report, stats_path - optional file for cProfile stats of the whole run
+class Profiler:
+
+    def __init__(self, top=DEFAULT_TOP, stats_path=""):
+        self.top = top if top is not None else DEFAULT_TOP
+        self.stats_path = stats_path
+        self.checks = {}
+        self.files = {}
+        self.opens = 0
+        self.bytes_read = 0
+        self.stat_calls = 0
+        # Calls made by a counted function itself, e.g. os.stat by os.path.exists, are not counted again
+        self.depth = 0
+        self.started = None
+        self.seconds = 0.0
+        self.first_counters = None
+        self.last_counters = None
+        self.patches = []
+        self.cprofile = None
+
+    def counters(self):
+        return (self.opens, self.bytes_read, self.stat_calls, config_registry.registry.loads)
+
+    def record(self, check, filepath, seconds, before):
+        after = self.counters()
+        deltas = [now - then for now, then in zip(after, before)]
+        self.checks.setdefault(check, Stats()).add(seconds, *deltas)
+        if filepath is not None:
+            self.files.setdefault(filepath, Stats()).add(seconds, *deltas)
+
+    def patch(self, owner, name, replacement):
+        self.patches.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def measured(self, name, function):
+        def wrapper(*args, **kwargs):
+            target = args[0] if args else None
+            filepath = getattr(target, 'filepath', target)
+            before = self.counters()
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, filepath, time.perf_counter() - started, before)
+        return wrapper
+
+    def counted(self, function):
+        def wrapper(*args, **kwargs):
+            if self.depth == 0:
+                self.stat_calls += 1
+            self.depth += 1
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.depth -= 1
+        return wrapper
+
+    def counting_open(self, function):
+        def wrapper(*args, **kwargs):
+            file = function(*args, **kwargs)
+            self.opens += 1
+            mode = args[1] if len(args) > 1 else kwargs.get('mode', 'r')
+            if 'r' in mode and '+' not in mode:
+                return CountingFile(file, self)
+            return file
+        return wrapper
+
+    # reporter - optional, time spent writing its report is listed as "output"
+    def start(self, reporter=None):
+        for module_name in PROFILED_MODULES:
+            importlib.import_module(module_name)
+        for module_name in ['__main__', 'validate', 'woh_validator'] + PROFILED_MODULES:
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            for name in PROFILED_FUNCTIONS:
+                if callable(getattr(module, name, None)):
+                    self.patch(module, name, self.measured(name, getattr(module, name)))
+
+        self.patch(builtins, 'open', self.counting_open(builtins.open))
+        for owner, name in ((os, 'stat'), (os, 'scandir'), (os.path, 'exists'), (os.path, 'isfile'), (os.path, 'isdir'), (os.path, 'getmtime')):
+            self.patch(owner, name, self.counted(getattr(owner, name)))
+
+        if reporter is not None:
+            self.patch(reporter, 'stream', TimedStream(reporter.stream, self))
+
+        if self.stats_path:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+        self.first_counters = self.counters()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.seconds = time.perf_counter() - self.started
+        self.last_counters = self.counters()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.stats_path)
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches = []
+
+    # Written to stderr, so it doesn't mix with jsonl or sarif reports on stdout
+    def print_report(self, stream=None):
+        stream = stream if stream is not None else sys.stderr
+        opens, bytes_read, stat_calls, config_loads = [last - first for last, first in zip(self.last_counters, self.first_counters)]
+        measured_seconds = sum(stats.seconds for stats in self.checks.values())
+
+        print(file=stream)
+        print(f"Profile: {self.seconds * 1000:.1f} ms, {len(self.files)} files, {opens} file opens, {bytes_read / 1024:.1f} KiB read, {stat_calls} stat calls, {config_loads} config loads", file=stream)
+        self.print_table("Check", self.checks, stream)
+        self.print_table("File", self.files, stream)
+        print(f"Not measured above (reference graph, caching, building the index): {max(self.seconds - measured_seconds, 0) * 1000:.1f} ms", file=stream)
+        if self.stats_path:
+            print(f"cProfile stats written to {self.stats_path}, view them with: python -m pstats {self.stats_path}", file=stream)
+
+    def print_table(self, title, table, stream):
+        rows = sorted(table.items(), key=lambda item: item[1].seconds, reverse=True)[:self.top]
+        name_width = max([len(title)] + [len(name) for name, _ in rows])
+        print(file=stream)
+        print(f"Slowest {title.lower()}s:", file=stream)
+        print(f"{title:<{name_width}}  {'Calls':>6}  {'Time ms':>9}  {'Opens':>6}  {'KiB read':>9}  {'Stats':>6}  {'Config':>6}", file=stream)
+        for name, stats in rows:
+            print(f"{name:<{name_width}}  {stats.calls:>6}  {stats.seconds * 1000:>9.1f}  {stats.opens:>6}  {stats.bytes_read / 1024:>9.1f}  {stats.stat_calls:>6}  {stats.config_loads:>6}", file=stream)
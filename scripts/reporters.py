@@ -0,0 +1,200 @@
+import re
+import sys
+import io
+import time
+
+from .diagnostics import ERROR
+
+HUMAN = "human"
+QUIET = "quiet"
+JSONL = "jsonl"
+SARIF = "sarif"
+FORMATS = [HUMAN, QUIET, JSONL, SARIF]
+
+# Buffered human output is written out at most this often, in seconds
+FLUSH_INTERVAL = 0.1
+
+RED = '\033[31m'
+RESET = '\033[0m'
+COLOR_CODE = re.compile('\033\\[[0-9;]*m')
+
+# Swallows everything written to it
+class NullStream:
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+# Receives results while validation runs, used as a context manager around it
+# Text printed by validators through DiagnosticCollector.print arrives too, the reporter decides where it goes
+# The base class writes that text to stream and ignores everything else, e.g. to capture the output of a single file
+class Reporter:
+
+    def __init__(self, stream=None, close_stream=False):
+        self.stream = stream if stream is not None else sys.stdout
+        self.close_stream = close_stream
+
+    # Where printed progress goes while validating
+    def text_stream(self):
+        return self.stream
+
+    def text(self, text):
+        self.text_stream().write(text)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream.flush()
+        if self.close_stream:
+            self.stream.close()
+        return False
+
+    def start(self):
+        pass
+
+    def diagnostic(self, diagnostic):
+        pass
+
+    # Called once per validated file, after its diagnostics
+    def file(self, path, kind, valid, message):
+        pass
+
+    # Called once at the end, message is None if the caller already reported the outcome
+    def finish(self, valid, message):
+        pass
+
+# Colored text as printed by validators, collected in memory and written out in large chunks
+# Colors are left out unless stream is a terminal, e.g. for --output files or output piped to another program
+class HumanReporter(Reporter):
+
+    def __init__(self, stream=None, close_stream=False):
+        super().__init__(stream, close_stream)
+        self.buffer = io.StringIO()
+        self.flushed_at = time.monotonic()
+        isatty = getattr(self.stream, 'isatty', None)
+        self.colors = isatty is not None and isatty()
+
+    def text_stream(self):
+        return self.buffer
+
+    def flush(self):
+        text = self.buffer.getvalue()
+        self.stream.write(text if self.colors else COLOR_CODE.sub("", text))
+        self.stream.flush()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.flushed_at = time.monotonic()
+
+    def file(self, path, kind, valid, message):
+        if time.monotonic() - self.flushed_at >= FLUSH_INTERVAL:
+            self.flush()
+
+    def finish(self, valid, message):
+        if not valid and message:
+            self.buffer.write(f"{RED}{message}{RESET}\n")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return super().__exit__(exc_type, exc_value, traceback)
+
+# Nothing at all, the outcome is only in the exit code
+class QuietReporter(Reporter):
+
+    def text_stream(self):
+        return NullStream()
+
+# One JSON object per line: every diagnostic and validated file as it is found, then a summary
+class JsonLinesReporter(Reporter):
+
+    def __init__(self, stream=None, close_stream=False):
+        super().__init__(stream, close_stream)
+        self.error_count = 0
+        self.file_count = 0
+
+    # Progress text would mix with records on stdout
+    def text_stream(self):
+        return NullStream() if self.stream is sys.stdout else sys.stdout
+
+    def write(self, record):
+        self.stream.write(to_json(record) + "\n")
+
+    def diagnostic(self, diagnostic):
+        if diagnostic.severity == ERROR:
+            self.error_count += 1
+        record = {'type': 'diagnostic'}
+        record.update(diagnostic.to_dict())
+        self.write(record)
+
+    def file(self, path, kind, valid, message):
+        self.file_count += 1
+        self.write({'type': 'file', 'file': path, 'kind': kind, 'valid': valid, 'message': message})
+        self.stream.flush()
+
+    def finish(self, valid, message):
+        self.write({'type': 'summary', 'valid': valid, 'files': self.file_count, 'errors': self.error_count, 'message': message})
+
+# SARIF 2.1.0 log with results written as they are found
+# Only the tool, rule ids and artifact paths are kept until the end, the JSON object is closed in finish()
+class SarifReporter(Reporter):
+
+    def __init__(self, stream=None, close_stream=False):
+        super().__init__(stream, close_stream)
+        self.result_count = 0
+        self.rules = []
+        self.artifacts = []
+
+    def text_stream(self):
+        return NullStream() if self.stream is sys.stdout else sys.stdout
+
+    def start(self):
+        self.stream.write('{"version": "2.1.0", "$schema": "https://json.schemastore.org/sarif-2.1.0.json", "runs": [{"results": [\n')
+
+    def diagnostic(self, diagnostic):
+        if diagnostic.rule not in self.rules:
+            self.rules.append(diagnostic.rule)
+        location = {'artifactLocation': {'uri': to_uri(diagnostic.file)}}
+        if diagnostic.line is not None:
+            location['region'] = {'startLine': diagnostic.line}
+        result = {
+            'ruleId': diagnostic.rule,
+            'ruleIndex': self.rules.index(diagnostic.rule),
+            'level': 'error' if diagnostic.severity == ERROR else 'warning',
+            'message': {'text': diagnostic.message},
+            'locations': [{'physicalLocation': location}],
+        }
+        self.stream.write((",\n" if self.result_count else "") + to_json(result))
+        self.result_count += 1
+
+    def file(self, path, kind, valid, message):
+        self.artifacts.append({'location': {'uri': to_uri(path)}})
+        self.stream.flush()
+
+    def finish(self, valid, message):
+        tool = {'driver': {
+            'name': 'woh_mystery_validator',
+            'informationUri': 'https://github.com/andrzejfalkowski/woh_mystery_validator',
+            'rules': [{'id': rule} for rule in self.rules],
+        }}
+        self.stream.write('\n], "tool": ' + to_json(tool) + ', "artifacts": ' + to_json(self.artifacts) + '}]}\n')
+
+# JSON encoding and path handling are only loaded by the formats writing them, the human and quiet ones start faster without
+def to_json(value):
+    import json
+    return json.dumps(value)
+
+# Absolute file URI, with drive letters and characters like spaces or '#' escaped
+def to_uri(path):
+    import pathlib
+    return pathlib.Path(path).resolve().as_uri()
+
+REPORTERS = {HUMAN: HumanReporter, QUIET: QuietReporter, JSONL: JsonLinesReporter, SARIF: SarifReporter}
+
+# output_path - optional file for the report, stdout by default
+def create_reporter(output_format=HUMAN, output_path=""):
+    if output_path:
+        return REPORTERS[output_format](open(output_path, 'w', encoding='utf-8'), True)
+    return REPORTERS[output_format]()
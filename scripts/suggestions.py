@@ -0,0 +1,98 @@
+# Valid values closest to a rejected one, e.g. 'BASEBAL BAT' -> 'BASEBALL BAT'
+# Values are compared ignoring letter case, by Levenshtein distance
+
+MAX_SUGGESTIONS = 3
+
+# Values with most trigrams in common are measured with edit distance, at most this many per lookup
+MAX_CANDIDATES = 50
+
+# Levenshtein distance, or max_distance + 1 once it's certain to be larger
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# Trigram index of a value table, built once per table
+# A lookup only measures edit distance to the values sharing most trigrams with the rejected one, not the whole table
+class SuggestionIndex:
+
+    def __init__(self, values):
+        # Casefolded values, and the values as written in the table for each of them
+        self.words = []
+        self.originals = {}
+        # Trigram -> indexes in words of every word containing it
+        self.postings = {}
+        # Value -> suggestions, the same typo tends to repeat across a pack
+        self.results = {}
+
+        for value in sorted(values):
+            word = value.casefold()
+            if word in self.originals:
+                self.originals[word].append(value)
+                continue
+            self.originals[word] = [value]
+            for trigram in trigrams(word):
+                self.postings.setdefault(trigram, []).append(len(self.words))
+            self.words.append(word)
+
+    # Closest valid values, nearest first, empty if none is close enough
+    def suggest(self, value, limit=MAX_SUGGESTIONS):
+        suggestions = self.results.get(value)
+        if suggestions is not None:
+            return suggestions
+
+        word = value.casefold()
+        # Roughly one typo per three characters
+        max_distance = max(1, len(word) // 3)
+
+        shared = {}
+        for trigram in trigrams(word):
+            for number in self.postings.get(trigram, ()):
+                shared[number] = shared.get(number, 0) + 1
+        candidates = sorted(shared, key=lambda number: (-shared[number], number))[:MAX_CANDIDATES]
+
+        matches = []
+        for number in candidates:
+            distance = edit_distance(word, self.words[number], max_distance)
+            if distance <= max_distance:
+                matches.append((distance, self.words[number]))
+
+        suggestions = []
+        for _, match in sorted(matches):
+            suggestions += self.originals[match]
+        suggestions = [suggestion for suggestion in suggestions if suggestion != value][:limit]
+        self.results[value] = suggestions
+        return suggestions
+
+# Value table -> its index, tables are cached by the config registry so each is indexed once
+_indexes = {}
+
+def get_suggestion_index(valid_values):
+    index = _indexes.get(valid_values)
+    if index is None:
+        index = SuggestionIndex(valid_values)
+        _indexes[valid_values] = index
+    return index
+
+# Text appended to an error about value, empty if nothing in valid_values is close
+def did_you_mean(value, valid_values):
+    if not value or value.isspace():
+        return ""
+    suggestions = get_suggestion_index(valid_values).suggest(value)
+    if not suggestions:
+        return ""
+    return " Did you mean " + ", ".join(f"'{suggestion}'" for suggestion in suggestions) + "?"
@@ -0,0 +1,27 @@
+import os
+
+# Windows consoles only interpret ANSI color codes once virtual terminal processing is enabled for them
+# Enabled through the console API, instead of os.system("") spawning a shell just for that side effect
+STD_OUTPUT_HANDLE = -11
+ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+
+colors_enabled = False
+
+def enable_colors():
+    global colors_enabled
+    if colors_enabled:
+        return
+    colors_enabled = True
+
+    if os.name != 'nt':
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
+        mode = ctypes.c_uint32()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            kernel32.SetConsoleMode(handle, mode.value | ENABLE_VIRTUAL_TERMINAL_PROCESSING)
+    except Exception:
+        # Not a console, e.g. output redirected to a file, colors don't matter there
+        pass
@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+
+from . import config_registry
+from . import check_asset_references
+from .file_system import split_archive_path
+
+# Bump whenever check logic or output changes, so stale results are not reused
+TOOL_VERSION = "5"
+
+CACHE_DIR_NAME = ".woh_validate_cache"
+CACHE_FILE_NAME = "results.json"
+
+# Hash of every config table of the selected language, results are only reused with identical config
+def fingerprint_config(config_path, language):
+    digest = hashlib.sha256(language.encode('utf-8'))
+    for directory in (config_path, os.path.join(config_path, language)):
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.txt'):
+                continue
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(directory, name), 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+# Per-file validation results stored next to mod_root, keyed by hash of file content, config and tool version
+# Each result also keeps the outcome of every existence check it made, the letter case match of every missing reference
+# and the stamp of every asset whose content it checked, and is discarded once any of them changes
+class ValidationCache:
+
+    # Non-persistent cache is kept in memory only, e.g. for the lifetime of --watch
+    def __init__(self, mod_root, config_path, persistent=True):
+        # Mods inside a .zip archive keep their cache next to the archive
+        archive_path, _ = split_archive_path(mod_root)
+        self.directory = os.path.join(os.path.dirname(archive_path if archive_path is not None else os.path.abspath(mod_root)), CACHE_DIR_NAME)
+        self.filepath = os.path.join(self.directory, CACHE_FILE_NAME)
+        # The selected game profile already carries a digest of all its tables, computed when its bundle was built
+        profile = config_registry.registry.profile
+        self.config_fingerprint = profile.digest if profile is not None else fingerprint_config(config_path, config_registry.get_language())
+        self.entries = {}
+        self.persistent = persistent
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+
+        # (path, kind) -> key, only the newest result for each file is kept so edits don't grow the cache forever
+        self.keys_by_file = {}
+
+        if not persistent:
+            return
+
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as file:
+                self.entries = json.load(file)
+            self.keys_by_file = {(entry['path'], entry['kind']): key for key, entry in self.entries.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Missing or corrupted cache, start from scratch
+            self.entries = {}
+            self.keys_by_file = {}
+
+    def key(self, kind, document, mod_dir, mod_root, print_info):
+        parts = [TOOL_VERSION, self.config_fingerprint, kind, document.content_hash, mod_dir, mod_root, str(print_info)]
+        if check_asset_references.content_checks:
+            parts.append("assets")
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    # Returns (valid, message, output, dependencies, diagnostics, summaries) or None if there's no usable result
+    def get(self, key, fs):
+        entry = self.entries.get(key)
+        if entry is not None:
+            for path, existed in entry['dependencies'].items():
+                # Files whose content was checked are recorded with their stamp instead of True,
+                # missing files looked up ignoring letter case with the path matching them instead of False
+                if isinstance(existed, list):
+                    current = fs.stamp(path)
+                elif isinstance(existed, str):
+                    current = fs.exists(path) or fs.match_ignoring_case(path) or ""
+                else:
+                    current = fs.exists(path)
+                if current != existed:
+                    entry = None
+                    break
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['valid'], entry['message'], entry['output'], entry['dependencies'], entry['diagnostics'], entry['summaries']
+
+    def put(self, key, kind, filepath, result):
+        valid, message, output, dependencies, diagnostics, summaries = result
+        filepath = os.path.abspath(filepath)
+        stale_key = self.keys_by_file.get((filepath, kind))
+        if stale_key is not None and stale_key != key:
+            self.entries.pop(stale_key, None)
+        self.keys_by_file[(filepath, kind)] = key
+        self.entries[key] = {
+            'path': filepath,
+            'kind': kind,
+            'valid': valid,
+            'message': message,
+            'output': output,
+            'dependencies': dependencies,
+            'diagnostics': diagnostics,
+            'summaries': summaries,
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.persistent or not self.dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temp_filepath = self.filepath + ".tmp"
+        with open(temp_filepath, 'w', encoding='utf-8') as file:
+            json.dump(self.entries, file)
+        os.replace(temp_filepath, self.filepath)
+        self.dirty = False
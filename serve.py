@@ -0,0 +1,458 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+import collections
+import multiprocessing
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+
+# PyInstaller check
+if getattr(sys, 'frozen', False):
+    application_path = sys._MEIPASS
+else:
+    application_path = os.path.dirname(os.path.abspath(__file__))
+
+CONFIG_PATH = os.path.join(application_path, 'config')
+
+from woh_validator import validate_path, find_archived_mystery, DEFAULT_MOD_DIR
+from scripts.config_registry import select_profile, DEFAULT_LANGUAGE
+from scripts.game_profile import DEFAULT_GAME_VERSION
+from scripts.file_system import ARCHIVE_EXTENSION, ArchiveFileSystem
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 32
+# Seconds a single job may take, its worker is restarted once it's exceeded
+DEFAULT_TIMEOUT = 60.0
+
+# Uploaded archives larger than this are refused, and so are archives whose files add up to more than MAX_EXTRACTED_BYTES
+MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+MAX_EXTRACTED_BYTES = 1024 * 1024 * 1024
+
+# Reports of this many recently uploaded archives are kept, keyed by archive content and job parameters
+RESULT_CACHE_SIZE = 256
+# Results of linked files kept by each worker, the cache starts over once it grows past this
+MAX_CACHED_FILE_RESULTS = 20000
+# Latency percentiles in /metrics are computed over this many most recent jobs
+LATENCY_WINDOW = 1000
+
+# Validation requests that can't be served are answered with these
+BAD_REQUEST = 400
+PAYLOAD_TOO_LARGE = 413
+LENGTH_REQUIRED = 411
+SERVICE_UNAVAILABLE = 503
+GATEWAY_TIMEOUT = 504
+
+# Runs in a worker process, validates jobs received through connection until it's closed
+# Config tables, compiled rules and results of unchanged linked files stay loaded between jobs
+def worker_main(connection, work_directory):
+    from scripts.validation_cache import ValidationCache
+
+    # Every upload this worker validates is saved at the same path, cached results are keyed by mod_root and
+    # depend on archive members by path, so files unchanged since an earlier upload are not validated again
+    upload_path = upload_path_of(work_directory, os.getpid())
+    # (game version, language) -> cache, results depend on the config they were checked with
+    caches = {}
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            valid, message = select_profile(CONFIG_PATH, job['game_version'], job['language'])
+            if not valid:
+                raise ValueError(message)
+            selection = (job['game_version'], job['language'])
+            cache = caches.get(selection)
+            if cache is None or len(cache.entries) > MAX_CACHED_FILE_RESULTS:
+                cache = ValidationCache("", CONFIG_PATH, persistent=False)
+                caches[selection] = cache
+            if 'archive' in job:
+                report = validate_upload(job, upload_path, cache)
+            else:
+                report = validate_path(job['path'], job['mod_dir'], job['mod_root'], None, job['game_version'], job['language'], cache=cache, max_errors=job['max_errors'], check_assets=job['check_assets']).to_dict()
+            connection.send((True, report))
+        except Exception as e:
+            connection.send((False, str(e)))
+
+def upload_path_of(work_directory, pid):
+    return os.path.join(work_directory, f"woh_upload_{pid}{ARCHIVE_EXTENSION}")
+
+# Saves an uploaded .zip to upload_path and validates the mystery in it without extracting anything
+# Returns report dict with paths relative to the archive, raises ValueError if the archive can't be validated
+def validate_upload(job, upload_path, cache):
+    with open(upload_path, 'wb') as file:
+        file.write(job['archive'])
+    try:
+        valid, message = check_archive(upload_path)
+        if valid:
+            valid, message = find_mystery(upload_path, job['path'])
+        if not valid:
+            raise ValueError(message)
+        report = validate_path(message, job['mod_dir'], os.path.dirname(message), None, job['game_version'], job['language'], cache=cache, max_errors=job['max_errors'], check_assets=job['check_assets'])
+    finally:
+        os.remove(upload_path)
+    # Paths inside the saved archive mean nothing to the uploader
+    return strip_directory(report.to_dict(), upload_path + os.sep)
+
+# Long-running worker process, used by one job at a time
+class Worker:
+
+    def __init__(self, context, work_directory):
+        self.context = context
+        self.work_directory = work_directory
+        self.start()
+
+    def start(self):
+        self.connection, child_connection = self.context.Pipe()
+        self.process = self.context.Process(target=worker_main, args=(child_connection, self.work_directory), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    # Throws away the process and its warm state, used after a timeout or crash
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def stop(self):
+        self.connection.close()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        # Left behind by a job that timed out
+        try:
+            os.remove(upload_path_of(self.work_directory, self.process.pid))
+        except OSError:
+            pass
+
+    # Returns (ok, report dict or error message), raises TimeoutError if the job takes longer than timeout seconds
+    def run(self, job, timeout):
+        try:
+            self.connection.send(job)
+            finished = self.connection.poll(timeout)
+            if finished:
+                return self.connection.recv()
+        except (EOFError, OSError):
+            self.restart()
+            return False, "Worker process exited unexpectedly"
+        self.restart()
+        raise TimeoutError()
+
+# Counters reported by /metrics
+class Metrics:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = collections.OrderedDict((name, 0) for name in (
+            'jobs_received', 'jobs_passed', 'jobs_failed', 'jobs_rejected', 'jobs_timed_out', 'jobs_errored',
+            'result_cache_hits', 'worker_restarts'))
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def increment(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def job_done(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def to_dict(self, in_flight, busy_workers, workers, queue_size):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            counters = dict(self.counters)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 1)
+
+        metrics = {'uptime_seconds': round(time.time() - self.started, 1), 'workers': workers, 'busy_workers': busy_workers,
+                   'queue_size': queue_size, 'in_flight': in_flight, 'queued': max(in_flight - busy_workers, 0)}
+        metrics.update(counters)
+        metrics.update({'latency_ms_p50': percentile(0.5), 'latency_ms_p95': percentile(0.95), 'latency_ms_max': percentile(1.0)})
+        return metrics
+
+# Accepts jobs from request threads and runs them on a fixed set of workers
+# At most workers + queue_size jobs are admitted at once, the rest are refused right away instead of piling up
+class ValidationService:
+
+    def __init__(self, workers, queue_size=DEFAULT_QUEUE_SIZE, timeout=DEFAULT_TIMEOUT, work_directory=None):
+        # Spawned rather than forked, request threads may hold locks at the moment a worker is restarted
+        context = multiprocessing.get_context('spawn')
+        self.work_directory = work_directory if work_directory else tempfile.gettempdir()
+        self.workers = [Worker(context, self.work_directory) for _ in range(workers)]
+        self.idle_workers = queue.Queue()
+        for worker in self.workers:
+            self.idle_workers.put(worker)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.admission = threading.BoundedSemaphore(workers + queue_size)
+        self.in_flight = 0
+        self.busy_workers = 0
+        self.lock = threading.Lock()
+        self.metrics = Metrics()
+        # (archive hash, job parameters) -> report dict, least recently used first
+        self.results = collections.OrderedDict()
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+
+    # Returns (HTTP status, response dict)
+    # Every job received ends up counted exactly once as passed, failed, rejected, timed out or errored
+    def validate(self, job):
+        self.metrics.increment('jobs_received')
+        return self.admit(job)
+
+    # Runs a job already counted as received, unless too many are in progress
+    def admit(self, job):
+        if not self.admission.acquire(blocking=False):
+            self.metrics.increment('jobs_rejected')
+            return SERVICE_UNAVAILABLE, {'error': f"{len(self.workers) + self.queue_size} jobs are already queued, retry later"}
+        try:
+            with self.lock:
+                self.in_flight += 1
+            return self.run(job)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            self.admission.release()
+
+    def run(self, job):
+        started = time.perf_counter()
+        try:
+            # Admission already bounds the queue, so the wait for a worker is bounded too
+            worker = self.idle_workers.get()
+            with self.lock:
+                self.busy_workers += 1
+            try:
+                ok, result = worker.run(job, self.timeout)
+            finally:
+                with self.lock:
+                    self.busy_workers -= 1
+                self.idle_workers.put(worker)
+        except TimeoutError:
+            self.metrics.increment('jobs_timed_out')
+            self.metrics.increment('worker_restarts')
+            return GATEWAY_TIMEOUT, {'error': f"Validation took longer than {self.timeout:g} seconds"}
+
+        seconds = time.perf_counter() - started
+        self.metrics.job_done(seconds)
+        if not ok:
+            self.metrics.increment('jobs_errored')
+            return BAD_REQUEST, {'error': result}
+        self.metrics.increment('jobs_passed' if result['valid'] else 'jobs_failed')
+        return 200, {'seconds': round(seconds, 3), 'cached': False, 'report': result}
+
+    # Validates the mystery in an uploaded .zip, the archive is saved and checked by the worker running the job
+    # Reports are kept per archive content, so uploading the same archive again is answered without validating it
+    def validate_archive(self, data, job):
+        import hashlib
+        self.metrics.increment('jobs_received')
+        key = (hashlib.sha256(data).hexdigest(), job['path'], job['mod_dir'], job['game_version'], job['language'], job['max_errors'], job['check_assets'])
+        with self.lock:
+            report = self.results.get(key)
+            if report is not None:
+                self.results.move_to_end(key)
+        if report is not None:
+            self.metrics.increment('result_cache_hits')
+            self.metrics.increment('jobs_passed' if report['valid'] else 'jobs_failed')
+            return 200, {'seconds': 0.0, 'cached': True, 'report': report}
+
+        status, response = self.admit(dict(job, archive=data))
+        if status == 200:
+            with self.lock:
+                self.results[key] = response['report']
+                while len(self.results) > RESULT_CACHE_SIZE:
+                    self.results.popitem(last=False)
+        return status, response
+
+    def metrics_dict(self):
+        with self.lock:
+            in_flight, busy_workers = self.in_flight, self.busy_workers
+        return self.metrics.to_dict(in_flight, busy_workers, len(self.workers), self.queue_size)
+
+# Returns (valid, message), refuses archives whose files add up to more than MAX_EXTRACTED_BYTES
+def check_archive(archive_path):
+    import zipfile
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            if sum(member.file_size for member in archive.infolist()) > MAX_EXTRACTED_BYTES:
+                return False, f"Archive unpacks to more than {MAX_EXTRACTED_BYTES // (1024 * 1024)} MiB"
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, RuntimeError) as e:
+        return False, f"Not a valid .zip archive: {str(e)}"
+    return True, ""
+
+# Returns (valid, path of the mystery or error message)
+# path - mystery .ito inside the archive, if not given the archive has to contain exactly one
+def find_mystery(archive_path, path):
+    if path:
+        filepath = os.path.normpath(os.path.join(archive_path, path.replace('\\', os.sep).replace('/', os.sep)))
+        fs = ArchiveFileSystem(archive_path)
+        try:
+            found = filepath.startswith(archive_path + os.sep) and fs.exists(filepath)
+        finally:
+            fs.close()
+        if not found:
+            return False, f"File '{path}' not found in the archive"
+        return True, filepath
+    try:
+        return True, find_archived_mystery(archive_path)
+    except ValueError as e:
+        return False, str(e)
+
+def strip_directory(value, prefix):
+    if isinstance(value, str):
+        return value.replace(prefix, "")
+    if isinstance(value, list):
+        return [strip_directory(item, prefix) for item in value]
+    if isinstance(value, dict):
+        return {key: strip_directory(item, prefix) for key, item in value.items()}
+    return value
+
+class ValidationServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, quiet=False):
+        super().__init__(address, RequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+# GET /metrics, GET /health
+# POST /validate - JSON body {"path": ..., "mod_dir": ..., "mod_root": ..., "game_version": ..., "lang": ..., "max_errors": ...} for a mod on disk,
+# or a .zip body (Content-Type: application/zip) with the same parameters in the query string, path being the mystery inside the archive
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = "WoHMysteryValidator"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body, headers=()):
+        data = (json.dumps(body) + "\n").encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/metrics':
+            self.send_json(200, self.server.service.metrics_dict())
+        elif path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': f"Unknown endpoint {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/validate':
+            self.send_json(404, {'error': f"Unknown endpoint {url.path}"})
+            return
+
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_json(LENGTH_REQUIRED, {'error': "Content-Length is required"})
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            self.send_json(BAD_REQUEST, {'error': "Invalid Content-Length"})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.send_json(PAYLOAD_TOO_LARGE, {'error': f"Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MiB"})
+            self.close_connection = True
+            return
+        data = self.rfile.read(length)
+
+        parameters = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        is_archive = content_type in ('application/zip', 'application/x-zip-compressed', 'application/octet-stream')
+        if not is_archive and data:
+            try:
+                body = json.loads(data.decode('utf-8'))
+            except ValueError:
+                self.send_json(BAD_REQUEST, {'error': "Body must be a JSON object or a .zip archive"})
+                return
+            if not isinstance(body, dict):
+                self.send_json(BAD_REQUEST, {'error': "Body must be a JSON object or a .zip archive"})
+                return
+            parameters.update(body)
+
+        valid, job = parse_job(parameters, is_archive)
+        if not valid:
+            self.send_json(BAD_REQUEST, {'error': job})
+            return
+
+        service = self.server.service
+        if is_archive:
+            status, response = service.validate_archive(data, job)
+        else:
+            status, response = service.validate(job)
+        headers = [('Retry-After', '1')] if status == SERVICE_UNAVAILABLE else []
+        self.send_json(status, response, headers)
+
+# Returns (valid, job dict or error message)
+def parse_job(parameters, is_archive):
+    path = parameters.get('path') or ""
+    if not path and not is_archive:
+        return False, "path of the .ito file to validate is required"
+    max_errors = parameters.get('max_errors')
+    if max_errors is not None:
+        try:
+            max_errors = int(max_errors)
+        except (TypeError, ValueError):
+            return False, "max_errors must be a number"
+    # true in JSON, or true/1 in the query string of an archive upload
+    check_assets = parameters.get('check_assets') in (True, 'true', '1')
+    return True, {
+        'path': path,
+        'mod_dir': parameters.get('mod_dir') or DEFAULT_MOD_DIR,
+        'mod_root': "" if is_archive else (parameters.get('mod_root') or ""),
+        'game_version': parameters.get('game_version') or DEFAULT_GAME_VERSION,
+        'language': parameters.get('lang') or DEFAULT_LANGUAGE,
+        'max_errors': max_errors,
+        'check_assets': check_assets,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local HTTP service validating mods on disk or uploaded as .zip archives, keeping config and results loaded between jobs.')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Optional address to listen on, defaults to 127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Optional port to listen on, defaults to {DEFAULT_PORT}')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Optional number of worker processes validating jobs, defaults to the number of CPUs')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help=f'Optional number of jobs waiting for a worker before new ones are refused with 503, defaults to {DEFAULT_QUEUE_SIZE}')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help=f'Optional seconds a job may take before it is answered with 504 and its worker restarted, defaults to {DEFAULT_TIMEOUT:g}')
+    parser.add_argument('--work-dir', type=str, default="", help='Optional directory uploaded archives are saved to while they are validated, defaults to the system temporary directory')
+    parser.add_argument('--quiet', action='store_true', help='Optional, do not log every request to stderr')
+
+    args = parser.parse_args()
+    if args.workers < 1 or args.queue_size < 0 or args.timeout <= 0:
+        parser.error("--workers and --timeout must be positive, --queue-size can't be negative")
+
+    service = ValidationService(args.workers, args.queue_size, args.timeout, args.work_dir)
+    server = ValidationServer((args.host, args.port), service, args.quiet)
+    print(f"Validating on http://{args.host}:{server.server_address[1]}/validate with {args.workers} workers, press Ctrl+C to stop...", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    # Required for worker processes in the PyInstaller build
+    if getattr(sys, 'frozen', False):
+        multiprocessing.freeze_support()
+    sys.exit(main())
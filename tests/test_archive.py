@@ -0,0 +1,85 @@
+import os
+import sys
+import zipfile
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from woh_validator import validate_path
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.file_system import ArchiveFileSystem, split_archive_path
+
+# Writes every file under mod_root into a .zip, below prefix, skipping paths for which skip returns True
+def write_archive(archive_path, mod_root, prefix, skip=lambda path: False):
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for root, _, filenames in os.walk(mod_root):
+            for filename in filenames:
+                filepath = os.path.join(root, filename)
+                path = os.path.relpath(filepath, mod_root).replace(os.sep, '/')
+                if not skip(path):
+                    archive.write(filepath, prefix + path)
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mystery_path, self.mod_root, self.file_count = generate_mod(os.path.join(self.directory.name, 'mod'), CorpusShape(events=4, assets=3))
+        self.archive_path = os.path.join(self.directory.name, 'upload.zip')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_mystery_inside_archive_is_found_and_passes(self):
+        write_archive(self.archive_path, self.mod_root, 'my mod/')
+        report = validate_path(self.archive_path, check_assets=True)
+        self.assertTrue(report.valid, report.message)
+        self.assertEqual(len(report.files), self.file_count)
+        self.assertTrue(all(file.path.startswith(os.path.join(self.archive_path, 'my mod') + os.sep) for file in report.files))
+
+    def test_path_inside_archive_is_validated(self):
+        write_archive(self.archive_path, self.mod_root, '')
+        report = validate_path(os.path.join(self.archive_path, 'mystery.ito'))
+        self.assertTrue(report.valid, report.message)
+        self.assertEqual(split_archive_path(report.files[0].path), (self.archive_path, 'mystery.ito'))
+
+    def test_file_missing_from_archive_is_reported(self):
+        write_archive(self.archive_path, self.mod_root, '', lambda path: path == 'events/e00001.ito')
+        report = validate_path(self.archive_path)
+        self.assertFalse(report.valid)
+        self.assertTrue(any('e00001.ito' in diagnostic.message for diagnostic in report.diagnostics))
+
+    def test_archive_with_two_mysteries_is_refused(self):
+        with zipfile.ZipFile(self.archive_path, 'w') as archive:
+            archive.write(self.mystery_path, 'a/mystery.ito')
+            archive.write(self.mystery_path, 'b/mystery.ito')
+        with self.assertRaisesRegex(ValueError, "Expected exactly one mystery"):
+            validate_path(self.archive_path)
+
+    def test_broken_archive_is_refused(self):
+        with open(self.archive_path, 'wb') as file:
+            file.write(b'PK not really a zip')
+        with self.assertRaisesRegex(ValueError, "Not a valid .zip archive"):
+            validate_path(self.archive_path)
+
+    def test_file_system_reads_members(self):
+        write_archive(self.archive_path, self.mod_root, 'mod/')
+        fs = ArchiveFileSystem(self.archive_path)
+        try:
+            event_path = os.path.join(self.archive_path, 'mod', 'events', 'e00000.ito')
+            self.assertTrue(fs.exists(event_path))
+            self.assertTrue(fs.exists(os.path.join(self.archive_path, 'mod', 'events')))
+            self.assertFalse(fs.exists(os.path.join(self.archive_path, 'mod', 'events', 'nope.ito')))
+            self.assertEqual(fs.match_ignoring_case(os.path.join(self.archive_path, 'MOD', 'Events', 'E00000.ito')), event_path)
+            with fs.open(event_path) as file:
+                self.assertEqual(file.readline().strip(), '[event]')
+            self.assertEqual(fs.read_bytes(event_path, 7), b'[event]')
+            info = fs.archive.getinfo('mod/events/e00000.ito')
+            self.assertEqual(fs.stamp(event_path), [info.file_size, info.CRC])
+            self.assertIsNone(fs.stamp(os.path.join(self.archive_path, 'mod', 'events', 'nope.ito')))
+        finally:
+            fs.close()
+
+if __name__ == "__main__":
+    unittest.main()
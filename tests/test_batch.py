@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from validate_batch import validate_batch, print_summary
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.mod_graph import MYSTERY, EVENT
+from scripts.diagnostics import DiagnosticCollector
+from scripts.reporters import Reporter
+
+# Two generated mods side by side, the second with a wrong prize in its first event
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mods = os.path.join(self.directory.name, 'mods')
+        shape = CorpusShape(events=3, assets=2)
+        self.first_mystery, self.first_root, self.file_count = generate_mod(os.path.join(self.mods, 'first'), shape)
+        self.second_mystery, self.second_root, _ = generate_mod(os.path.join(self.mods, 'second'), shape)
+        with open(os.path.join(self.second_root, 'events', 'e00000.ito'), 'a', encoding='utf-8') as file:
+            file.write('winprizeb="item"\nwinnumberb="NOT AN ITEM"\n')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_linked_files_are_validated_once(self):
+        results = validate_batch([self.mods])
+        mysteries = [(os.path.relpath(path, self.mods), status, linked_count) for path, kind, status, _, linked_count in results if kind == MYSTERY]
+        self.assertEqual(mysteries, [(os.path.join('first', 'mystery', 'mystery.ito'), "PASS", self.file_count - 1),
+                                     (os.path.join('second', 'mystery', 'mystery.ito'), "FAIL", self.file_count - 1)])
+        self.assertEqual({(status, message) for _, kind, status, message, _ in results if kind != MYSTERY}, {("SKIP", "Inside a validated mystery")})
+
+    def test_file_linked_with_the_same_mod_root_is_skipped(self):
+        event_path = os.path.join(self.first_root, 'events', 'e00001.ito')
+        results = validate_batch([event_path, self.first_mystery], mod_root=self.first_root)
+        self.assertEqual([(kind, status) for _, kind, status, _, _ in results], [(MYSTERY, "PASS"), (EVENT, "SKIP")])
+        results = validate_batch([event_path], mod_root=self.first_root)
+        self.assertEqual([(kind, status) for _, kind, status, _, _ in results], [(EVENT, "PASS")])
+
+    def test_archive_is_validated_as_its_mystery(self):
+        shutil.make_archive(os.path.join(self.directory.name, 'first'), 'zip', self.first_root)
+        results = validate_batch([os.path.join(self.directory.name, 'first.zip')])
+        self.assertEqual([(kind, status, linked_count) for _, kind, status, _, linked_count in results], [(MYSTERY, "PASS", self.file_count - 1)])
+
+    def test_unrecognized_file_named_directly_fails(self):
+        path = os.path.join(self.directory.name, 'notes.ito')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('just notes\n')
+        results = validate_batch([path, os.path.join(self.directory.name, 'missing.zip')])
+        self.assertEqual([status for _, _, status, _, _ in results], ["FAIL", "FAIL"])
+
+    def test_summary_shows_first_line_of_message(self):
+        stream = io.StringIO()
+        print_summary([("mod/mystery.ito", MYSTERY, "FAIL", "e1.ito: ['first']\ne2.ito: ['second']\ne3.ito: ['third']", 3),
+                       ("mod/events/e4.ito", EVENT, "FAIL", "e4.ito: ['fourth']\ne5.ito: ['fifth']", 1)],
+                      DiagnosticCollector(reporter=Reporter(stream)))
+        rows = stream.getvalue().splitlines()
+        self.assertTrue(rows[3].endswith("e1.ito: ['first'] (and 2 more failed files)\033[0m"), rows[3])
+        self.assertTrue(rows[4].endswith("e4.ito: ['fourth'] (and 1 more failed file)\033[0m"), rows[4])
+        self.assertNotIn("second", stream.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from woh_validator import validate_path
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.diagnostics import ERROR
+
+# Generated mods are meant to pass validation, asset headers included, or benchmarks would time error paths
+class GeneratedCorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        shape = CorpusShape(events=12, chain_depth=3, fanout_depth=1, shared_enemies=2, assets=60)
+        self.mystery_path, self.mod_root, self.file_count = generate_mod(self.directory.name, shape)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assert_passes(self, jobs):
+        report = validate_path(self.mystery_path, jobs=jobs, check_assets=True)
+        errors = [diagnostic.message for diagnostic in report.diagnostics if diagnostic.severity == ERROR]
+        self.assertEqual(errors, [])
+        self.assertTrue(report.valid, report.message)
+        self.assertEqual(len(report.files), self.file_count)
+
+    def test_passes_sequentially(self):
+        self.assert_passes(jobs=1)
+
+    def test_passes_with_jobs(self):
+        self.assert_passes(jobs=2)
+
+if __name__ == "__main__":
+    unittest.main()
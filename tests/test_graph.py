@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from graph import CONFIG_PATH, FORCED_EVENT_KEYS, TRIGGER_KEYS
+from scripts.config_registry import load_mod_dir_requirements
+from scripts.file_system import FileSystemIndex
+from scripts.mod_graph import build_graph, relative_path
+
+MOD_FILES = {
+    'mystery.ito': ['[mystery]', 'one_frc="mystery\\events\\a.ito"', 'two_frc="mystery\\events\\gone.ito"'],
+    # a -> b -> c -> a is a trigger loop, c also triggers itself
+    'events/a.ito': ['[event]', 'winprizea="trigger_event"', 'winnumbera="mystery\\events\\b.ito"'],
+    'events/b.ito': ['[event]', 'winprizea="trigger_event"', 'winnumbera="mystery\\events\\c.ito"',
+                     'failprizea="trigger_enemy"', 'failnumbera="mystery\\enemies\\lost.ito"'],
+    'events/c.ito': ['[event]', 'winprizea="trigger_event"', 'winnumbera="mystery\\events\\a.ito"',
+                     'failprizea="trigger_event"', 'failnumbera="mystery\\events\\c.ito"'],
+    'events/unused.ito': ['[event]', 'name="Never triggered"'],
+}
+
+class GraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mod_root = self.directory.name
+        for path, lines in MOD_FILES.items():
+            filepath = os.path.join(self.mod_root, path)
+            os.makedirs(os.path.dirname(filepath), exist_ok=True)
+            with open(filepath, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(lines) + '\n')
+        self.graph = build_graph([os.path.join(self.mod_root, 'mystery.ito')], "mystery" + os.sep, self.mod_root,
+                                 load_mod_dir_requirements(os.path.join(CONFIG_PATH, FORCED_EVENT_KEYS)),
+                                 load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS)),
+                                 FileSystemIndex(self.mod_root))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def names(self, identities):
+        return [relative_path(self.graph.nodes[identity].path, self.mod_root) for identity in identities]
+
+    def test_missing_files_are_nodes(self):
+        missing = sorted(relative_path(node.path, self.mod_root) for node in self.graph.nodes.values() if not node.exists)
+        self.assertEqual(missing, ['enemies/lost.ito', 'events/gone.ito'])
+        sources = [relative_path(reference.source, self.mod_root) for reference in self.graph.references_to(os.path.join(self.mod_root, 'enemies', 'lost.ito'))]
+        self.assertEqual(sources, ['events/b.ito'])
+
+    def test_trigger_loop_is_found(self):
+        self.assertEqual([sorted(self.names(cycle)) for cycle in self.graph.cycles()], [['events/a.ito', 'events/b.ito', 'events/c.ito']])
+
+    def test_loop_counts_as_one_step_of_longest_chain(self):
+        chain = self.graph.longest_chain()
+        self.assertEqual([sorted(self.names(step)) for step in chain],
+                         [['mystery.ito'], ['events/a.ito', 'events/b.ito', 'events/c.ito'], ['enemies/lost.ito']])
+
+    def test_unreached_file_is_orphan(self):
+        self.assertEqual([relative_path(path, self.mod_root) for path in self.graph.orphans(self.mod_root)], ['events/unused.ito'])
+
+    def test_exported_edges_keep_their_keys(self):
+        exported = json.loads(json.dumps(self.graph.to_dict(self.mod_root)))
+        self.assertIn({'source': 'events/c.ito', 'target': 'events/c.ito', 'key': 'failnumbera', 'line': 5}, exported['edges'])
+        self.assertIn('style=dashed', self.graph.to_dot(self.mod_root))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+from urllib.request import pathname2url
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from lsp import LanguageServer, SEVERITY_ERROR, JSON_PARSE_ERROR, SERVER_NOT_INITIALIZED, MAX_MOD_ROOT_DEPTH
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.diagnostics import FILE_NOT_FOUND
+from scripts.mod_graph import EVENT
+
+def encode(message):
+    data = json.dumps(message).encode('utf-8')
+    return f"Content-Length: {len(data)}\r\n\r\n".encode('ascii') + data
+
+def decode(data):
+    messages = []
+    stream = io.BytesIO(data)
+    while True:
+        line = stream.readline()
+        if not line:
+            return messages
+        length = int(line.decode('ascii').split(':', 1)[1])
+        stream.readline()
+        messages.append(json.loads(stream.read(length).decode('utf-8')))
+
+# Runs a LanguageServer over in-memory streams until the given messages run out
+class LanguageServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mystery_path, self.mod_root, _ = generate_mod(self.directory.name, CorpusShape(events=2, assets=2))
+        self.event_path = os.path.join(self.mod_root, 'events', 'e00000.ito')
+        self.uri = 'file://' + pathname2url(self.event_path)
+        with open(self.event_path, encoding='utf-8') as file:
+            self.text = file.read()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_server(self, *messages):
+        output = io.BytesIO()
+        server = LanguageServer(io.BytesIO(b''.join(message if isinstance(message, bytes) else encode(message) for message in messages)), output)
+        self.exit_code = server.run()
+        return decode(output.getvalue())
+
+    def session(self, *messages):
+        return self.run_server({'id': 1, 'method': 'initialize', 'params': {'rootUri': None, 'capabilities': {}}},
+                               {'method': 'initialized', 'params': {}}, *messages,
+                               {'id': 2, 'method': 'shutdown'}, {'method': 'exit'})
+
+    def did_open(self):
+        return {'method': 'textDocument/didOpen', 'params': {'textDocument': {'uri': self.uri, 'languageId': 'ito', 'version': 1, 'text': self.text}}}
+
+    def did_change(self, text):
+        return {'method': 'textDocument/didChange', 'params': {'textDocument': {'uri': self.uri, 'version': 2}, 'contentChanges': [{'text': text}]}}
+
+    def published(self, messages):
+        return [message['params']['diagnostics'] for message in messages if message.get('method') == 'textDocument/publishDiagnostics']
+
+    def test_valid_document_has_no_diagnostics(self):
+        messages = self.session(self.did_open())
+        self.assertEqual(self.published(messages), [[]])
+        self.assertEqual(self.exit_code, 0)
+
+    def test_changed_value_is_reported_at_its_range(self):
+        text = self.text + 'winprizeb = "item"\n  winnumberb = "BASEBAL BAT"  \n'
+        diagnostics = self.published(self.session(self.did_open(), self.did_change(text)))[-1]
+        self.assertEqual(len(diagnostics), 1, diagnostics)
+        line = len(self.text.split('\n'))
+        self.assertEqual(diagnostics[0]['range'], {'start': {'line': line, 'character': 15}, 'end': {'line': line, 'character': 28}})
+        self.assertEqual(diagnostics[0]['severity'], SEVERITY_ERROR)
+        self.assertIn("Did you mean 'BASEBALL BAT'?", diagnostics[0]['message'])
+
+    def test_range_counts_utf16_code_units(self):
+        text = self.text + 'winprizeb="item"\nwinnumberb="\U0001F600 BAT"\n'
+        diagnostics = self.published(self.session(self.did_open(), self.did_change(text)))[-1]
+        ranges = [diagnostic['range'] for diagnostic in diagnostics if 'winnumberb' in diagnostic['message']]
+        line = len(self.text.split('\n'))
+        # The emoji is two UTF-16 code units
+        self.assertEqual(ranges, [{'start': {'line': line, 'character': 11}, 'end': {'line': line, 'character': 19}}])
+
+    def test_missing_triggered_file_is_reported(self):
+        text = self.text + 'winprizec="trigger_event"\nwinnumberc="mystery\\events\\nope.ito"\n'
+        diagnostics = self.published(self.session(self.did_open(), self.did_change(text)))[-1]
+        self.assertEqual([diagnostic['code'] for diagnostic in diagnostics], [FILE_NOT_FOUND])
+
+    def test_closed_document_is_cleared(self):
+        messages = self.session(self.did_open(), self.did_change(self.text + 'winprizeb="item"\nwinnumberb="NOT AN ITEM"\n'),
+                                {'method': 'textDocument/didClose', 'params': {'textDocument': {'uri': self.uri}}})
+        published = self.published(messages)
+        self.assertEqual(len(published[1]), 1)
+        self.assertEqual(published[-1], [])
+
+    def test_unreadable_message_is_answered_and_skipped(self):
+        messages = self.run_server({'id': 0, 'method': 'textDocument/hover', 'params': {}},
+                                   b'Content-Length: 5\r\n\r\n{oops', {'id': 1, 'method': 'shutdown'}, {'method': 'exit'})
+        self.assertEqual([message.get('error', {}).get('code') for message in messages], [SERVER_NOT_INITIALIZED, JSON_PARSE_ERROR, None])
+        self.assertEqual(self.exit_code, 0)
+
+    def initialized_server(self, params):
+        server = LanguageServer(io.BytesIO(), io.BytesIO())
+        server.handle('initialize', dict(params, capabilities={}), 1)
+        return server
+
+    def test_mod_root_is_found_inside_workspace(self):
+        server = self.initialized_server({'rootUri': 'file://' + pathname2url(self.directory.name)})
+        self.assertEqual(server.locate(self.event_path, EVENT), ("mystery" + os.sep, self.mod_root))
+
+    def test_mod_root_search_stops_at_workspace_folder(self):
+        events = os.path.dirname(self.event_path)
+        server = self.initialized_server({'workspaceFolders': [{'uri': 'file://' + pathname2url(events), 'name': 'events'}]})
+        self.assertEqual(server.locate(self.event_path, EVENT), ("", events))
+        self.assertEqual(server.mystery_directories, {events: False})
+
+    def test_mod_root_search_is_capped_outside_workspace(self):
+        nested = os.path.join(self.mod_root, *['deeper'] * (MAX_MOD_ROOT_DEPTH + 1))
+        os.makedirs(nested)
+        event_path = os.path.join(nested, 'e.ito')
+        server = self.initialized_server({'rootUri': None})
+        self.assertEqual(server.locate(event_path, EVENT), ("", nested))
+        self.assertEqual(len(server.mystery_directories), MAX_MOD_ROOT_DEPTH + 1)
+        self.assertEqual(server.locate(os.path.join(nested, os.pardir, 'e.ito'), EVENT), ("mystery" + os.sep, self.mod_root))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from woh_validator import validate_path
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.reporters import HumanReporter, QuietReporter, JsonLinesReporter, SarifReporter, to_uri
+from scripts.diagnostics import INVALID_PRIZE, LOCATION_MISMATCH
+
+# Every reporter gets the same run: a generated mod with one wrong prize in its first event,
+# its shared enemy also gets a warning for a location none of the events triggering it has
+class ReporterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mystery_path, self.mod_root, self.file_count = generate_mod(self.directory.name, CorpusShape(events=2, assets=2))
+        self.event_path = os.path.join(self.mod_root, 'events', 'e00000.ito')
+        with open(self.event_path, 'a', encoding='utf-8') as file:
+            file.write('winprizeb="item"\nwinnumberb="NOT AN ITEM"\n')
+        with open(self.event_path, encoding='utf-8') as file:
+            self.error_line = len(file.read().splitlines())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_reporter(self, reporter_class):
+        stream = io.StringIO()
+        report = validate_path(self.mystery_path, reporter=reporter_class(stream))
+        self.assertFalse(report.valid)
+        return stream.getvalue()
+
+    def test_human_report_has_progress_and_outcome(self):
+        output = self.run_reporter(HumanReporter)
+        self.assertIn("Incorrect prize 'NOT AN ITEM'", output)
+        # The outcome comes last
+        self.assertIn("'NOT AN ITEM' for prize type 'item' at key 'winnumberb'.", output.rstrip().splitlines()[-1])
+
+    def test_human_report_is_colored_only_on_terminals(self):
+        self.assertNotIn('\033[', self.run_reporter(HumanReporter))
+
+        class Terminal(io.StringIO):
+            def isatty(self):
+                return True
+
+        stream = Terminal()
+        validate_path(self.mystery_path, reporter=HumanReporter(stream))
+        self.assertIn('\033[31m', stream.getvalue())
+
+    def test_quiet_report_is_empty(self):
+        self.assertEqual(self.run_reporter(QuietReporter), "")
+
+    def test_json_lines_have_diagnostics_files_and_summary(self):
+        records = [json.loads(line) for line in self.run_reporter(JsonLinesReporter).splitlines()]
+        diagnostics = [record for record in records if record['type'] == 'diagnostic']
+        first = diagnostics[0]
+        self.assertEqual((first['file'], first['line'], first['key'], first['rule'], first['severity']),
+                         (self.event_path, self.error_line, 'winnumberb', INVALID_PRIZE, 'error'))
+        self.assertEqual([(record['rule'], record['severity']) for record in diagnostics][1:], [(LOCATION_MISMATCH, 'warning')])
+        self.assertEqual(sum(1 for record in records if record['type'] == 'file'), self.file_count)
+        self.assertEqual(records[-1], {'type': 'summary', 'valid': False, 'files': self.file_count, 'errors': 1, 'message': records[-1]['message']})
+
+    def test_sarif_log_is_valid_json(self):
+        log = json.loads(self.run_reporter(SarifReporter))
+        self.assertEqual(log['version'], "2.1.0")
+        run = log['runs'][0]
+        self.assertEqual([rule['id'] for rule in run['tool']['driver']['rules']], [INVALID_PRIZE, LOCATION_MISMATCH])
+        self.assertEqual([(result['ruleId'], result['ruleIndex'], result['level']) for result in run['results']],
+                         [(INVALID_PRIZE, 0, 'error'), (LOCATION_MISMATCH, 1, 'warning')])
+        result = run['results'][0]
+        self.assertEqual(result['locations'][0]['physicalLocation'], {'artifactLocation': {'uri': to_uri(self.event_path)}, 'region': {'startLine': self.error_line}})
+        self.assertEqual(len(run['artifacts']), self.file_count)
+
+    def test_uri_escapes_spaces(self):
+        self.assertTrue(to_uri(os.path.join(self.directory.name, 'my mod', 'a#b.ito')).endswith('/my%20mod/a%23b.ito'))
+
+if __name__ == "__main__":
+    unittest.main()
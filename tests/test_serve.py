@@ -0,0 +1,106 @@
+import io
+import os
+import sys
+import zipfile
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from serve import ValidationService, validate_upload, parse_job, CONFIG_PATH, SERVICE_UNAVAILABLE, GATEWAY_TIMEOUT, BAD_REQUEST
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.validation_cache import ValidationCache
+
+def zip_directory(directory):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w') as archive:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                filepath = os.path.join(root, filename)
+                archive.write(filepath, os.path.relpath(filepath, directory))
+    return data.getvalue()
+
+class ServeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mystery_path, self.mod_root, self.file_count = generate_mod(self.directory.name, CorpusShape(events=6, assets=3))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def job(self, parameters, is_archive=False):
+        valid, job = parse_job(parameters, is_archive)
+        self.assertTrue(valid, job)
+        return job
+
+    def test_unchanged_files_of_a_changed_upload_stay_cached(self):
+        cache = ValidationCache("", CONFIG_PATH, persistent=False)
+        upload_path = os.path.join(self.directory.name, "upload.zip")
+        job = dict(self.job({}, True), archive=zip_directory(self.mod_root))
+        report = validate_upload(job, upload_path, cache)
+        self.assertTrue(report['valid'], report['message'])
+        self.assertEqual(len(report['files']), self.file_count)
+        self.assertFalse(any(upload_path in file['path'] for file in report['files']))
+        self.assertFalse(os.path.exists(upload_path))
+        self.assertEqual(cache.hits, 0)
+
+        with open(os.path.join(self.mod_root, 'events', 'e00000.ito'), 'a', encoding='utf-8') as file:
+            file.write('winprizeb="item"\nwinnumberb="NOT AN ITEM"\n')
+        job = dict(job, archive=zip_directory(self.mod_root))
+        report = validate_upload(job, upload_path, cache)
+        self.assertFalse(report['valid'])
+        self.assertTrue(any("NOT AN ITEM" in diagnostic['message'] for diagnostic in report['diagnostics']))
+        # Only the mystery, which is never cached, and the edited event are validated again
+        self.assertEqual(cache.hits, self.file_count - 2)
+
+    def test_invalid_archive_is_refused(self):
+        service = ValidationService(1, queue_size=0, work_directory=self.directory.name)
+        try:
+            status, response = service.validate_archive(b'not a zip', self.job({}, True))
+        finally:
+            service.close()
+        self.assertEqual(status, BAD_REQUEST)
+        self.assertIn("Not a valid .zip archive", response['error'])
+        self.assertEqual(service.metrics_dict()['jobs_errored'], 1)
+
+    def test_same_upload_is_answered_from_results(self):
+        service = ValidationService(1, queue_size=0, work_directory=self.directory.name)
+        data = zip_directory(self.mod_root)
+        try:
+            first = service.validate_archive(data, self.job({}, True))
+            second = service.validate_archive(data, self.job({}, True))
+        finally:
+            service.close()
+        self.assertEqual(first[0], 200)
+        self.assertEqual(second, (200, {'seconds': 0.0, 'cached': True, 'report': first[1]['report']}))
+        metrics = service.metrics_dict()
+        self.assertEqual((metrics['jobs_received'], metrics['jobs_passed'], metrics['result_cache_hits']), (2, 2, 1))
+
+    def test_job_over_capacity_is_rejected(self):
+        service = ValidationService(1, queue_size=0)
+        try:
+            # Stands in for a job already running on the only worker
+            service.admission.acquire()
+            status, response = service.validate(self.job({'path': self.mystery_path}))
+        finally:
+            service.close()
+        self.assertEqual(status, SERVICE_UNAVAILABLE)
+        self.assertIn("retry later", response['error'])
+        metrics = service.metrics_dict()
+        self.assertEqual((metrics['jobs_received'], metrics['jobs_rejected']), (1, 1))
+
+    def test_job_over_timeout_restarts_worker(self):
+        service = ValidationService(1, queue_size=0, timeout=0.001)
+        try:
+            status, response = service.validate(self.job({'path': self.mystery_path}))
+            self.assertEqual(status, GATEWAY_TIMEOUT)
+            self.assertTrue(service.workers[0].process.is_alive())
+        finally:
+            service.close()
+        metrics = service.metrics_dict()
+        self.assertEqual((metrics['jobs_timed_out'], metrics['worker_restarts']), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
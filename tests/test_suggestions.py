@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from woh_validator import validate_path
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.suggestions import SuggestionIndex, did_you_mean, edit_distance
+
+ITEMS = frozenset(["BASEBALL BAT", "BASEBALL CAP", "ANATOMY BOOK", "OLD KEY", "Old Key", "LANTERN"])
+
+class SuggestionTest(unittest.TestCase):
+
+    def test_edit_distance_stops_past_max_distance(self):
+        self.assertEqual(edit_distance("kitten", "sitting", 3), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", 1), 2)
+        self.assertEqual(edit_distance("a", "abcdef", 2), 3)
+
+    def test_nearest_value_comes_first(self):
+        self.assertEqual(SuggestionIndex(ITEMS).suggest("BASEBAL BAT"), ["BASEBALL BAT", "BASEBALL CAP"])
+
+    def test_letter_case_is_ignored(self):
+        self.assertEqual(SuggestionIndex(ITEMS).suggest("lantern"), ["LANTERN"])
+
+    def test_value_as_written_is_not_suggested(self):
+        self.assertEqual(SuggestionIndex(ITEMS).suggest("Old Key"), ["OLD KEY"])
+
+    def test_distant_value_gets_no_suggestion(self):
+        self.assertEqual(SuggestionIndex(ITEMS).suggest("SWORD"), [])
+        self.assertEqual(did_you_mean("SWORD", ITEMS), "")
+        self.assertEqual(did_you_mean("  ", ITEMS), "")
+
+    def test_message_lists_suggestions(self):
+        self.assertEqual(did_you_mean("ANATOMY BOK", ITEMS), " Did you mean 'ANATOMY BOOK'?")
+
+    def test_misspelled_prize_gets_suggestion(self):
+        with tempfile.TemporaryDirectory() as directory:
+            mystery_path, mod_root, _ = generate_mod(directory, CorpusShape(events=1, assets=1))
+            with open(os.path.join(mod_root, 'events', 'e00000.ito'), 'a', encoding='utf-8') as file:
+                file.write('winprizeb="item"\nwinnumberb="BASEBAL BAT"\n')
+            report = validate_path(mystery_path)
+        self.assertIn("Incorrect prize 'BASEBAL BAT' for prize type 'item' at key 'winnumberb'. Did you mean 'BASEBALL BAT'?",
+                      [diagnostic.message for diagnostic in report.diagnostics])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from woh_validator import validate_path, CONFIG_PATH
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.config_registry import select_profile, DEFAULT_LANGUAGE
+from scripts.game_profile import DEFAULT_GAME_VERSION
+from scripts.validation_cache import ValidationCache
+
+# The mystery itself is validated on every run, only linked files are cached
+class ValidationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mystery_path, self.mod_root, self.file_count = generate_mod(self.directory.name, CorpusShape(events=4, assets=3))
+        select_profile(CONFIG_PATH, DEFAULT_GAME_VERSION, DEFAULT_LANGUAGE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def validate(self, cache, check_assets=False):
+        return validate_path(self.mystery_path, cache=cache, check_assets=check_assets)
+
+    def event_value(self, event, key):
+        with open(os.path.join(self.mod_root, 'events', event), encoding='utf-8') as file:
+            for line in file:
+                if line.startswith(key + '='):
+                    return line.split('=', 1)[1].strip().strip('"').split('\\', 1)[1].replace('\\', os.sep)
+
+    def test_unchanged_files_are_not_validated_again(self):
+        cache = ValidationCache(self.mod_root, CONFIG_PATH, persistent=False)
+        first = self.validate(cache)
+        second = self.validate(cache)
+        self.assertTrue(second.valid, second.message)
+        self.assertEqual(cache.hits, self.file_count - 1)
+        self.assertEqual(second.to_dict(), first.to_dict())
+
+    def test_saved_results_are_loaded(self):
+        cache = ValidationCache(self.mod_root, CONFIG_PATH)
+        self.validate(cache)
+        cache.save()
+        cache = ValidationCache(self.mod_root, CONFIG_PATH)
+        self.assertTrue(self.validate(cache).valid)
+        self.assertEqual(cache.hits, self.file_count - 1)
+
+    def test_edited_file_is_validated_again(self):
+        cache = ValidationCache(self.mod_root, CONFIG_PATH, persistent=False)
+        self.validate(cache)
+        with open(os.path.join(self.mod_root, 'events', 'e00001.ito'), 'a', encoding='utf-8') as file:
+            file.write('winprizeb="item"\nwinnumberb="NOT AN ITEM"\n')
+        report = self.validate(cache)
+        self.assertFalse(report.valid)
+        self.assertTrue(any("NOT AN ITEM" in diagnostic.message for diagnostic in report.diagnostics))
+        self.assertEqual(cache.hits, self.file_count - 2)
+
+    def test_removed_referenced_file_invalidates_result(self):
+        cache = ValidationCache(self.mod_root, CONFIG_PATH, persistent=False)
+        self.validate(cache)
+        image = self.event_value('e00000.ito', 'image')
+        os.remove(os.path.join(self.mod_root, image))
+        report = self.validate(cache)
+        self.assertFalse(report.valid)
+        self.assertTrue(any(os.path.basename(image) in diagnostic.message for diagnostic in report.diagnostics))
+
+    def test_changed_asset_invalidates_result(self):
+        cache = ValidationCache(self.mod_root, CONFIG_PATH, persistent=False)
+        self.assertTrue(self.validate(cache, check_assets=True).valid)
+        with open(os.path.join(self.mod_root, self.event_value('e00000.ito', 'load_sound')), 'wb') as file:
+            file.write(b'not a sound at all')
+        report = self.validate(cache, check_assets=True)
+        self.assertFalse(report.valid)
+        self.assertTrue(any("load_sound" in diagnostic.message for diagnostic in report.diagnostics))
+
+if __name__ == "__main__":
+    unittest.main()
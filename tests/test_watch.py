@@ -0,0 +1,109 @@
+import os
+import sys
+import queue
+import tempfile
+import threading
+import subprocess
+import unittest
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_PATH)
+
+from benchmarks.corpus import CorpusShape, generate_mod
+from scripts.dependency_index import DependencyIndex
+
+# Seconds to wait for watch to notice a change
+TIMEOUT = 20
+
+class DependencyIndexTest(unittest.TestCase):
+
+    def test_modified_file_affects_files_reading_its_content(self):
+        index = DependencyIndex()
+        index.set_dependencies("/mod/mystery.ito", {"/mod/img/art.png": [68, 1], "/mod/events/e1.ito": True})
+        self.assertEqual(index.affected_by({"/mod/img/art.png"}, set()), {os.path.abspath("/mod/mystery.ito")})
+
+    def test_modified_file_checked_for_existence_only_affects_nothing(self):
+        index = DependencyIndex()
+        index.set_dependencies("/mod/mystery.ito", {"/mod/img/art.png": True})
+        self.assertEqual(index.affected_by({"/mod/img/art.png"}, set()), set())
+
+    def test_added_or_removed_file_affects_files_referencing_it(self):
+        index = DependencyIndex()
+        index.set_dependencies("/mod/events/e1.ito", {"/mod/img/Pic.png": False})
+        self.assertEqual(index.affected_by(set(), {"/mod/img/pic.png"}), {os.path.abspath("/mod/events/e1.ito")})
+
+    def test_replaced_dependencies_are_forgotten(self):
+        index = DependencyIndex()
+        index.set_dependencies("/mod/mystery.ito", {"/mod/img/old.png": [68, 1]})
+        index.set_dependencies("/mod/mystery.ito", {"/mod/img/new.png": [68, 1]})
+        self.assertEqual(index.affected_by({"/mod/img/old.png"}, set()), set())
+
+# Runs validate.py --watch on a generated mod and reads its output as it comes
+class WatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.mystery_path, self.mod_root, _ = generate_mod(self.directory.name, CorpusShape(events=3, assets=3))
+        self.process = None
+
+    def tearDown(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process.stdout.close()
+        self.directory.cleanup()
+
+    def start(self, *arguments):
+        command = [sys.executable, '-u', os.path.join(REPO_PATH, 'validate.py'), self.mystery_path, '--watch'] + list(arguments)
+        self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=REPO_PATH, universal_newlines=True, encoding='utf-8')
+        self.lines = queue.Queue()
+        threading.Thread(target=lambda: [self.lines.put(line) for line in self.process.stdout], daemon=True).start()
+        self.wait_for("Watching")
+
+    def wait_for(self, text):
+        seen = []
+        while True:
+            try:
+                line = self.lines.get(timeout=TIMEOUT)
+            except queue.Empty:
+                self.fail(f"'{text}' not printed, got: {''.join(seen)}")
+            seen.append(line)
+            if text in line:
+                return
+
+    def mystery_value(self, key):
+        with open(self.mystery_path, encoding='utf-8') as file:
+            for line in file:
+                if line.startswith(key + '='):
+                    return line.split('=', 1)[1].strip().strip('"')
+
+    def test_changed_asset_is_checked_again(self):
+        self.start('--check-assets')
+        with open(os.path.join(self.mod_root, self.mystery_value('end_img')), 'wb') as file:
+            file.write(b'not an image at all')
+        self.wait_for("Changed:")
+        self.wait_for("referenced at key 'end_img' is not a PNG")
+
+    def test_edited_event_is_checked_again(self):
+        self.start()
+        event_path = os.path.join(self.mod_root, 'events', 'e00000.ito')
+        with open(event_path, 'a', encoding='utf-8') as file:
+            file.write('winprizeb="item"\nwinnumberb="NOT AN ITEM"\n')
+        self.wait_for("Changed: " + os.path.join('events', 'e00000.ito'))
+        self.wait_for("NOT AN ITEM")
+
+    def test_removed_and_restored_file_is_checked_again(self):
+        self.start()
+        enemy_path = os.path.join(self.mod_root, 'enemies', 'm0000.ito')
+        with open(enemy_path, encoding='utf-8') as file:
+            text = file.read()
+        os.remove(enemy_path)
+        self.wait_for("Changed: " + os.path.join('enemies', 'm0000.ito'))
+        self.wait_for("m0000.ito does not exist")
+        with open(enemy_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        self.wait_for("Changed: " + os.path.join('enemies', 'm0000.ito'))
+        self.wait_for("m0000.ito enemy validation passed")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import argparse
 
 # PyInstaller check
@@ -8,59 +9,154 @@ if getattr(sys, 'frozen', False):
 else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
-from validate_mystery import validate_mystery
-from validate_event import validate_event
-from validate_enemy import validate_enemy
+CONFIG_PATH = os.path.join(application_path, 'config')
 
-os.system("")
+from woh_validator import validate, validate_path, normalize_path, find_archived_mystery, DEFAULT_MOD_DIR
+from scripts.terminal import enable_colors
+from scripts.file_system import FileSystemIndex, split_archive_path
+from scripts.mod_graph import EVENT, ENEMY
+from scripts.reporters import create_reporter, HUMAN
+from scripts.diagnostics import DiagnosticCollector
+from scripts.config_registry import select_profile
+from scripts.check_asset_references import enable_content_checks
+from scripts.cli_arguments import add_common_arguments
+
+# Seconds between mod_root polls in --watch mode
+WATCH_INTERVAL = 0.25
+
+enable_colors()
 RED = '\033[31m'
 GREEN = '\033[32m'
 YELLOW = '\033[33m'
 DARK_GRAY = '\033[90m'
 RESET = '\033[0m'
 
-def validate(ito_filepath, mod_dir="", mod_root="", print_prefix="", print_info=True):
+# Stays resident and polls mod_root, re-validating only files affected by a change
+# Linked files are checked again when their content changes or a file they reference is added or removed, including newly triggered files
+# Changes to the validated file itself, or any change after a failed run, validate everything again - unchanged files reuse cached results
+def watch(ito_filepath, mod_dir="", mod_root="", jobs=1, cache=None, interval=WATCH_INTERVAL):
 
-    basename = os.path.basename(ito_filepath)
-    
+    from validate_event import validate_linked_files
+    from scripts.validation_cache import ValidationCache
+    from scripts.dependency_index import DependencyIndex
+    from scripts.file_watcher import snapshot_files, diff_snapshots
+
+    if cache is None:
+        cache = ValidationCache(mod_root, CONFIG_PATH, persistent=False)
+
+    root_filepath = os.path.abspath(ito_filepath)
+    watched_directory = mod_root if mod_root else os.curdir
+    dependency_index = DependencyIndex()
+    fs = FileSystemIndex(watched_directory)
+
+    with create_reporter(HUMAN) as reporter:
+        valid, message = validate(ito_filepath, mod_dir, mod_root, jobs=jobs, cache=cache, dependency_index=dependency_index, fs=fs, diagnostics=DiagnosticCollector(reporter=reporter))
+        reporter.finish(valid, message)
+    files = snapshot_files(watched_directory)
+
+    print(f"{YELLOW}Watching {watched_directory} for changes, press Ctrl+C to stop...{RESET}")
     try:
-        with open(ito_filepath, 'r', encoding='utf-8') as file:
-            line = file.readline().strip()
-            if line == '[mystery]':
-                print(f"Recognized mystery file")
-                validate_mystery(ito_filepath, mod_dir, mod_root, None, None, print_prefix, print_info)
-            elif line == '[event]':
-                print(f"Recognized event file")
-                validate_event(ito_filepath, mod_dir, mod_root, None, None, print_prefix, print_info)
-            elif line == '[enemy]':
-                print(f"Recognized enemy file")
-                validate_enemy(ito_filepath, mod_dir, mod_root, None, None, print_prefix, print_info)
-            else:
-                print(f"Unrecognized file type")
-        return True, ""
-    except Exception as e:
-        return False, f"An error occurred: {str(e)}"
+        while True:
+            time.sleep(interval)
+            new_files = snapshot_files(watched_directory)
+            modified, added_or_removed = diff_snapshots(files, new_files)
+            files = new_files
+            changed = modified | added_or_removed
+            if not changed:
+                continue
+
+            affected = dependency_index.affected_by(modified, added_or_removed)
+            if not affected and valid:
+                continue
+
+            print(f"{YELLOW}Changed: {', '.join(sorted(os.path.relpath(path, watched_directory) for path in changed))}{RESET}")
+            if added_or_removed:
+                fs = FileSystemIndex(watched_directory)
+            if not valid or root_filepath in affected:
+                dependency_index.clear()
+                with create_reporter(HUMAN) as reporter:
+                    valid, message = validate(ito_filepath, mod_dir, mod_root, jobs=jobs, cache=cache, dependency_index=dependency_index, fs=fs, diagnostics=DiagnosticCollector(reporter=reporter))
+                    reporter.finish(valid, message)
+                continue
+
+            # Everything not affected is still valid and is skipped when reached again
+            known_events = {fs.identity(path) for path, reference in dependency_index.references.items() if reference.kind == EVENT and path not in affected}
+            known_enemies = {fs.identity(path) for path, reference in dependency_index.references.items() if reference.kind == ENEMY and path not in affected}
+            # Linked files in the order they were first reached
+            for filepath, reference in list(dependency_index.references.items()):
+                if filepath not in affected:
+                    continue
+                # Already validated again as part of another affected file's links
+                if fs.identity(filepath) in (known_enemies if reference.kind == ENEMY else known_events):
+                    continue
+                with create_reporter(HUMAN) as reporter:
+                    linked_valid, linked_message = validate_linked_files([reference], mod_dir, mod_root, known_events, known_enemies, "", True, jobs, cache, fs, dependency_index, DiagnosticCollector(reporter=reporter))
+                    reporter.finish(linked_valid, linked_message)
+                if not linked_valid:
+                    valid = False
+            cache.save()
+    except KeyboardInterrupt:
+        pass
 
 def main():
     parser = argparse.ArgumentParser(description='Validate a mystery/event/enemy file.')
     parser.add_argument('ito_filepath', type=str, help='Path to the event .ito file')
     parser.add_argument('--mod_dir', type=str, default="", help='Optional directory for mods of specific type, relative to WoH .exe location, e.g. "mystery\"')
     parser.add_argument('--mod_root', type=str, default="", help='Optional directory from which paths will be built, defaults to .ito location')
+    add_common_arguments(parser, CONFIG_PATH)
+    parser.add_argument('--watch', action='store_true', help='Optional, keep running and re-validate files affected by changes in mod_root')
     
     args = parser.parse_args()
+    valid, message = select_profile(CONFIG_PATH, args.game_version, args.lang)
+    if not valid:
+        parser.error(message)
+    if args.watch and (args.format != HUMAN or args.output):
+        parser.error("--watch only supports human output in the terminal")
+    if args.watch and (args.profile is not None or args.profile_output):
+        parser.error("--profile can't be used with --watch")
 
-    ito_filepath = args.ito_filepath
-    mod_dir = args.mod_dir if args.mod_dir else "mystery" + os.sep
-    mod_root = args.mod_root if args.mod_root else os.path.dirname(ito_filepath)
-    
-    ito_filepath = ito_filepath.replace('\\', os.sep).replace('/', os.sep)
-    mod_dir = mod_dir.replace('\\', os.sep).replace('/', os.sep)
-    mod_root = mod_root.replace('\\', os.sep).replace('/', os.sep)
+    try:
+        ito_filepath = find_archived_mystery(normalize_path(args.ito_filepath))
+    except ValueError as e:
+        parser.error(str(e))
+    mod_dir = normalize_path(args.mod_dir) if args.mod_dir else DEFAULT_MOD_DIR
+    mod_root = normalize_path(args.mod_root) if args.mod_root else os.path.dirname(ito_filepath)
     
-    valid, valid_message = validate(ito_filepath, mod_dir, mod_root)
-    if not valid:
-        print(f"{RED}{valid_message}{RESET}")
+    if args.watch and split_archive_path(mod_root)[0] is not None:
+        parser.error("--watch can't be used with mods inside .zip archives")
+
+    cache = None
+    if args.cache:
+        from scripts.validation_cache import ValidationCache
+        cache = ValidationCache(mod_root, CONFIG_PATH)
+
+    if args.watch:
+        enable_content_checks(args.check_assets)
+        watch(ito_filepath, mod_dir, mod_root, jobs=args.jobs, cache=cache)
+        if cache is not None:
+            cache.save()
+        return True, True
+
+    profiler = None
+    if args.profile is not None or args.profile_output:
+        from scripts.profiler import Profiler
+        profiler = Profiler(args.profile, args.profile_output)
+
+    report = validate_path(ito_filepath, mod_dir, mod_root, None, args.game_version, args.lang, args.jobs, cache, args.max_errors, create_reporter(args.format, args.output), profiler, args.check_assets)
+    if profiler is not None:
+        profiler.print_report()
+    if cache is not None:
+        cache.save()
+
+    # No key prompt when output is meant for other tools
+    return args.format == HUMAN, report.valid
 
 if __name__ == "__main__":
-    main()
-    input("Press any key to exit...")
+    # Required for --jobs worker processes in the PyInstaller build
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    interactive, valid = main()
+    if interactive:
+        input("Press any key to exit...")
+    sys.exit(0 if valid else 1)
@@ -0,0 +1,256 @@
+import os
+import sys
+import glob
+import argparse
+
+from woh_validator import validate_path, find_archived_mystery, CONFIG_PATH, DEFAULT_MOD_DIR
+from scripts.terminal import enable_colors
+from scripts.file_system import FileSystemIndex, ArchiveFileSystem, ARCHIVE_EXTENSION, open_file_system, split_archive_path
+from scripts.mod_graph import MYSTERY, EVENT, ENEMY, read_kind
+from scripts.diagnostics import DiagnosticCollector
+from scripts.reporters import create_reporter
+from scripts.config_registry import select_profile, DEFAULT_LANGUAGE
+from scripts.game_profile import DEFAULT_GAME_VERSION
+from scripts.cli_arguments import add_common_arguments
+
+enable_colors()
+RED = '\033[31m'
+GREEN = '\033[32m'
+YELLOW = '\033[33m'
+DARK_GRAY = '\033[90m'
+RESET = '\033[0m'
+
+# Mysteries first, so events and enemies they link are not validated again on their own
+KIND_ORDER = [MYSTERY, EVENT, ENEMY]
+
+# Exit codes
+EXIT_PASSED = 0
+EXIT_FAILED = 1
+EXIT_NO_FILES = 2
+
+# Expands directories (recursively) and glob patterns into .ito files and .zip archives of mods, in sorted order without duplicates
+# Returns list of (path, explicit), explicit being True for files named directly
+def collect_files(paths):
+    files = []
+    seen = set()
+
+    def add(path, explicit):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            files.append((path, explicit))
+
+    for path in paths:
+        path = path.replace('\\', os.sep).replace('/', os.sep)
+        if os.path.isdir(path):
+            for directory, subdirectories, filenames in os.walk(path):
+                subdirectories.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(('.ito', ARCHIVE_EXTENSION)):
+                        add(os.path.join(directory, filename), False)
+        elif glob.has_magic(path):
+            for match in sorted(glob.glob(path, recursive=True)):
+                if os.path.isfile(match) and match.lower().endswith(('.ito', ARCHIVE_EXTENSION)):
+                    add(match, False)
+        else:
+            add(path, True)
+    return files
+
+def is_inside(path, directory):
+    path = os.path.normcase(os.path.abspath(path))
+    directory = os.path.normcase(os.path.abspath(directory))
+    return path.startswith(directory + os.sep)
+
+# A file validated from another one only counts as validated for the mod_root it was validated with,
+# paths in it would point elsewhere from any other mod_root
+def linked_key(mod_root, path):
+    return os.path.normcase(os.path.abspath(mod_root if mod_root else os.curdir)), os.path.normcase(os.path.realpath(path))
+
+# Validates every top-level mystery, event and enemy in one process, each through validate_path
+# Files linked from an already validated file with the same mod_root are skipped, so are files lying inside an already validated mystery's mod_root
+# unless named directly. Archives are validated as the single mystery inside them.
+# Returns list of (path, kind, status, message, linked_count), status being PASS/FAIL/SKIP
+def validate_batch(paths, mod_dir=DEFAULT_MOD_DIR, mod_root="", jobs=1, use_cache=False, diagnostics=None, game_version=DEFAULT_GAME_VERSION, language=DEFAULT_LANGUAGE, check_assets=False):
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+
+    files = collect_files(paths)
+    directories = [path for path in paths if os.path.isdir(path)]
+
+    # Existence checks are shared by every file below an already indexed directory
+    indexes = []
+    caches = {}
+
+    def add_index(index):
+        if check_assets:
+            # Headers of every image and sound below the index are read at once, checks then find them in memory
+            from scripts.asset_headers import prefetch_headers
+            prefetch_headers(index.filepaths, index)
+        indexes.append(index)
+        return index
+
+    def get_index(root):
+        root = root if root else os.curdir
+        # Files inside an archive can only be read through the archive's own index
+        in_archive = split_archive_path(root)[0] is not None
+        for index in indexes:
+            if isinstance(index, ArchiveFileSystem) != in_archive:
+                continue
+            if os.path.normcase(os.path.abspath(root)) == index.root_key or is_inside(root, index.root):
+                return index
+        return add_index(open_file_system(root))
+
+    def get_cache(root):
+        if not use_cache:
+            return None
+        key = os.path.abspath(root if root else os.curdir)
+        if key not in caches:
+            from scripts.validation_cache import ValidationCache
+            caches[key] = ValidationCache(root, CONFIG_PATH)
+        return caches[key]
+
+    # Mystery .ito inside every archive, archives without a single mystery are reported as failed
+    targets = {}
+    kinds = {}
+    problems = {}
+    for path, explicit in files:
+        targets[path] = path
+        try:
+            if path.lower().endswith(ARCHIVE_EXTENSION) and os.path.isfile(path):
+                targets[path] = find_archived_mystery(path)
+                kinds[path] = MYSTERY
+            else:
+                kinds[path] = read_kind(path)
+        except ValueError as e:
+            kinds[path] = None
+            problems[path] = str(e)
+        except Exception:
+            kinds[path] = None
+
+    # Unrecognized files found while scanning are not mod files, named ones are reported as failed
+    files = [(path, explicit) for path, explicit in files if kinds[path] is not None or explicit or path in problems]
+    files.sort(key=lambda file: KIND_ORDER.index(kinds[file[0]]) if kinds[file[0]] in KIND_ORDER else len(KIND_ORDER))
+
+    results = []
+    # linked_key of every file validated from another one
+    linked_files = set()
+    mystery_roots = []
+    try:
+        for directory in directories:
+            add_index(FileSystemIndex(directory))
+        for number, (path, explicit) in enumerate(files, 1):
+            kind = kinds[path]
+            target = targets[path]
+            file_mod_root = mod_root if mod_root else os.path.dirname(target)
+
+            if diagnostics.limit_reached:
+                results.append((path, kind, "SKIP", f"Stopped after {diagnostics.error_count} errors", 0))
+                continue
+
+            # Already validated with mod_dir and mod_root of the file linking it
+            if kind != MYSTERY and linked_key(file_mod_root, path) in linked_files:
+                results.append((path, kind, "SKIP", "Linked from another file", 0))
+                continue
+            if not explicit and kind != MYSTERY and any(is_inside(path, root) for root in mystery_roots):
+                results.append((path, kind, "SKIP", "Inside a validated mystery", 0))
+                continue
+
+            diagnostics.print(f"{YELLOW}[{number}/{len(files)}] {path}{RESET}")
+            if path in problems:
+                diagnostics.print(f"{RED}{problems[path]}{RESET}")
+                results.append((path, kind, "FAIL", problems[path], 0))
+                continue
+
+            report = validate_path(target, mod_dir, file_mod_root, None, game_version, language, jobs, get_cache(file_mod_root), check_assets=check_assets, fs=get_index(file_mod_root), diagnostics=diagnostics)
+            if not report.valid:
+                diagnostics.print(f"{RED}{report.message}{RESET}")
+
+            linked = [file.path for file in report.files if os.path.abspath(file.path) != os.path.abspath(target)]
+            linked_files.update(linked_key(file_mod_root, filepath) for filepath in linked)
+            if kind == MYSTERY:
+                mystery_roots.append(file_mod_root if file_mod_root else os.curdir)
+            results.append((path, kind, "PASS" if report.valid else "FAIL", report.message, len(linked)))
+    finally:
+        for index in indexes:
+            index.close()
+
+    for cache in caches.values():
+        cache.save()
+
+    return results
+
+def print_summary(results, diagnostics):
+    path_width = max([len("File")] + [len(path) for path, _, _, _, _ in results])
+    diagnostics.print()
+    diagnostics.print("Summary:")
+    diagnostics.print(f"{'Result':<8}{'Type':<9}{'Linked':<8}File")
+    for path, kind, status, message, linked_count in results:
+        color = {"PASS": GREEN, "FAIL": RED, "SKIP": DARK_GRAY}[status]
+        line = f"{status:<8}{(kind if kind else 'unknown'):<9}{linked_count:<8}{path:<{path_width}}"
+        if status != "PASS":
+            # Messages of failed mysteries have a line for every failed file, all of them were printed while validating
+            lines = message.splitlines() if message else [""]
+            line += f"  {lines[0]}"
+            if len(lines) == 2:
+                line += " (and 1 more failed file)"
+            elif len(lines) > 2:
+                line += f" (and {len(lines) - 1} more failed files)"
+        diagnostics.print(f"{color}{line.rstrip()}{RESET}")
+
+    counts = {status: sum(1 for result in results if result[2] == status) for status in ("PASS", "FAIL", "SKIP")}
+    color = RED if counts["FAIL"] else GREEN
+    diagnostics.print(f"{color}{counts['PASS']} passed, {counts['FAIL']} failed, {counts['SKIP']} skipped{RESET}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate every mystery/event/enemy file in directories, glob patterns or a list of files.')
+    parser.add_argument('paths', type=str, nargs='+', help='Directories (searched recursively), glob patterns, .ito files or .zip archives of mods')
+    parser.add_argument('--mod_dir', type=str, default="", help='Optional directory for mods of specific type, relative to WoH .exe location, e.g. "mystery\"')
+    parser.add_argument('--mod_root', type=str, default="", help='Optional directory from which paths will be built, defaults to each .ito location')
+    add_common_arguments(parser, CONFIG_PATH, cache_location="next to each mod_root")
+
+    args = parser.parse_args()
+    valid, message = select_profile(CONFIG_PATH, args.game_version, args.lang)
+    if not valid:
+        parser.error(message)
+
+    mod_dir = args.mod_dir if args.mod_dir else "mystery" + os.sep
+    mod_dir = mod_dir.replace('\\', os.sep).replace('/', os.sep)
+    mod_root = args.mod_root.replace('\\', os.sep).replace('/', os.sep)
+
+    profiler = None
+    if args.profile is not None or args.profile_output:
+        from scripts.profiler import Profiler
+        profiler = Profiler(args.profile, args.profile_output)
+
+    reporter = create_reporter(args.format, args.output)
+    with reporter:
+        if profiler is not None:
+            profiler.start(reporter)
+        # Worker processes are not measured
+        jobs = args.jobs if profiler is None else 1
+        diagnostics = DiagnosticCollector(args.max_errors, reporter)
+        results = validate_batch(args.paths, mod_dir, mod_root, jobs, args.cache, diagnostics, args.game_version, args.lang, args.check_assets)
+        failed = any(status == "FAIL" for _, _, status, _, _ in results)
+        if results:
+            print_summary(results, diagnostics)
+            reporter.finish(not failed, None)
+        else:
+            reporter.finish(False, f"No .ito files or archives found in: {', '.join(args.paths)}")
+
+    if profiler is not None:
+        profiler.stop()
+        profiler.print_report()
+
+    if not results:
+        return EXIT_NO_FILES
+    if failed:
+        return EXIT_FAILED
+    return EXIT_PASSED
+
+if __name__ == "__main__":
+    # Required for --jobs worker processes in the PyInstaller build
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(main())
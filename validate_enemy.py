@@ -9,144 +9,165 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
 CONFIG_PATH = os.path.join(application_path, 'config')
-SCRIPTS_PATH = os.path.join(application_path, 'scripts')
 
-sys.path.append(CONFIG_PATH)
-sys.path.append(SCRIPTS_PATH)
-
-from check_quotes import check_quotes
-from check_no_duplicate_keys import check_no_duplicate_keys
-from check_asset_references import check_asset_references
-from check_keys_and_values import check_keys_and_values
-from check_keys_and_values import check_key_and_values
-from check_prizes import check_prizes
+from scripts.ito_document import parse_ito
+from scripts.check_quotes import check_quotes
+from scripts.check_no_duplicate_keys import check_no_duplicate_keys
+from scripts.check_asset_references import check_asset_references
+from scripts.check_keys_and_values import check_key_value_rules
+from scripts.terminal import enable_colors
+from scripts.file_system import OS_FILE_SYSTEM
+from scripts.config_registry import select_profile
+from scripts.diagnostics import Diagnostic, DiagnosticCollector, PARSE_ERROR, ERROR
+from scripts.mod_graph import ENEMY
 
 ASSET_KEYS = "enemy_asset_keys.txt"
 ALLOWED_DUPLICATE_KEYS = "enemy_allowed_duplicate_keys.txt"
 
-LOCATION_KEYS = "location_keys.txt"
-LOCATION_VALUES = "location_values.txt"
-WEAKNESS_KEYS = "weakness_keys.txt"
-WEAKNESS_VALUES = "weakness_values.txt"
-ENMTYPE_KEYS = "enmtype_keys.txt"
-ENMTYPE_VALUES = "enmtype_values.txt"
-DAMAGETYPE_KEYS = "damagetype_keys.txt"
-DAMAGETYPE_VALUES = "damagetype_values.txt"
-DAMAGETYPE_KEYS = "damagetype_keys.txt"
-
-PRIZE_NAME = "prize_name"
-ITEM_VALUES = "item_values.txt"
+# Key -> valid values, only items are supported as prize_name drops for now
+KEY_VALUE_RULES = "enemy_key_value_rules.txt"
 
-os.system("")
+enable_colors()
 RED = '\033[31m'
 GREEN = '\033[32m'
 YELLOW = '\033[33m'
 DARK_GRAY = '\033[90m'
 RESET = '\033[0m'
 
-def validate_enemy(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True):
-    
-    basename = os.path.basename(ito_filepath)
-
-    if already_checked_events is None:
-        already_checked_events = set()
-
-    if already_checked_enemies is None:
-        already_checked_enemies = set()
-        
-    if ito_filepath in already_checked_enemies:
-        print(f"{DARK_GRAY}{print_prefix}Skipping already checked enemy file: {basename}{RESET}")
-        return True, "" 
-
-    already_checked_enemies.add(ito_filepath)        
+# Runs every check of a single enemy on its parsed document
+# Returns messages of the problems found, lsp.py runs it on unsaved buffers too
+def check_document(document, mod_dir, mod_root, fs, diagnostics, print_prefix="", print_info=True):
+    # Every check runs even if an earlier one failed, so all problems are reported at once
+    errors = []
 
     # Check for unclosed quotes
     if print_info:
-        print(f"{print_prefix}Checking quotes...")
-    quotes_valid, quotes_message = check_quotes(ito_filepath)
+        diagnostics.print(f"{print_prefix}Checking quotes...")
+    quotes_valid, quotes_message = check_quotes(document, diagnostics)
     if not quotes_valid:
-        print(f"{RED}{print_prefix}{quotes_message}{RESET}")
-        return False, f"{basename}: {quotes_message}"
+        for message in quotes_message:
+            diagnostics.print(f"{RED}{print_prefix}{message}{RESET}")
+        errors += quotes_message
     elif print_info:
-        print(f"{print_prefix}{quotes_message}")
+        diagnostics.print(f"{print_prefix}{quotes_message}")
 
     # Check for no duplicate keys, except allowed ones
     if print_info:
-        print(f"{print_prefix}Checking key duplicates...")
-    duplicates_valid, duplicates_message = check_no_duplicate_keys(ito_filepath, os.path.join(CONFIG_PATH, ALLOWED_DUPLICATE_KEYS))
+        diagnostics.print(f"{print_prefix}Checking key duplicates...")
+    duplicates_valid, duplicates_message = check_no_duplicate_keys(document, os.path.join(CONFIG_PATH, ALLOWED_DUPLICATE_KEYS), diagnostics=diagnostics)
     if not duplicates_valid:
-        print(f"{RED}{print_prefix}{duplicates_message}{RESET}")
-        return False, f"{basename}: {quotes_message}"
+        for message in duplicates_message:
+            diagnostics.print(f"{RED}{print_prefix}{message}{RESET}")
+        errors += duplicates_message
     elif print_info:
-        print(f"{print_prefix}{duplicates_message}")
+        diagnostics.print(f"{print_prefix}{duplicates_message}")
 
     # Check if key values are valid
-    # TODO: refactor to limit copypasta
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, WEAKNESS_KEYS), os.path.join(CONFIG_PATH, WEAKNESS_VALUES))  
+    keys_and_values_valid, keys_and_values_message = check_key_value_rules(document, os.path.join(CONFIG_PATH, KEY_VALUE_RULES), diagnostics)
     if not keys_and_values_valid:
         for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, LOCATION_KEYS), os.path.join(CONFIG_PATH, LOCATION_VALUES), False)  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, ENMTYPE_KEYS), os.path.join(CONFIG_PATH, ENMTYPE_VALUES), False)  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, DAMAGETYPE_KEYS), os.path.join(CONFIG_PATH, DAMAGETYPE_VALUES), False)  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    # Only items are supported as drops for now
-    keys_and_values_valid, keys_and_values_message = check_key_and_values(ito_filepath, PRIZE_NAME, os.path.join(CONFIG_PATH, ITEM_VALUES))
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-        
-    if print_info:
-        print(f"{print_prefix}All keys and values validated.")
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += keys_and_values_message
+    elif print_info:
+        diagnostics.print(f"{print_prefix}All keys and values validated.")
 
     # Check referenced files
     if print_info:
-        print(f"{print_prefix}Checking file references...")
-    file_ref_valid, file_ref_message = check_asset_references(ito_filepath, mod_dir, mod_root, os.path.join(CONFIG_PATH, ASSET_KEYS))
+        diagnostics.print(f"{print_prefix}Checking file references...")
+    file_ref_valid, file_ref_message = check_asset_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, ASSET_KEYS), fs=fs, diagnostics=diagnostics)
     if not file_ref_valid:
         for message in file_ref_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {file_ref_message}"
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += file_ref_message
     elif print_info:
-        print(f"{print_prefix}{file_ref_message}")
+        diagnostics.print(f"{print_prefix}{file_ref_message}")
 
-    print(f"{GREEN}{print_prefix}{basename} enemy validation passed.{RESET}")
+    return errors
+
+def validate_enemy(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True, document=None, fs=None, diagnostics=None):
+    
+    basename = os.path.basename(ito_filepath)
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+
+    if already_checked_events is None:
+        already_checked_events = set()
+
+    if already_checked_enemies is None:
+        already_checked_enemies = set()
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    # Sets of files are keyed by identity, so the same file reached through another path is not validated again
+    identity = fs.identity(ito_filepath)
+    if identity in already_checked_enemies:
+        diagnostics.print(f"{DARK_GRAY}{print_prefix}Skipping already checked enemy file: {basename}{RESET}")
+        return True, "" 
+
+    already_checked_enemies.add(identity)
+
+    # Read and parse the file once, every check below runs on the parsed document
+    try:
+        if document is None:
+            document = parse_ito(ito_filepath, fs)
+    except Exception as e:
+        diagnostics.print(f"{RED}{print_prefix}An error occurred: {str(e)}{RESET}")
+        diagnostics.add(Diagnostic(ito_filepath, None, None, PARSE_ERROR, ERROR, f"An error occurred: {str(e)}"))
+        diagnostics.file_validated(ito_filepath, ENEMY, False, f"{basename}: An error occurred: {str(e)}")
+        return False, f"{basename}: An error occurred: {str(e)}"
+
+    errors = check_document(document, mod_dir, mod_root, fs, diagnostics, print_prefix, print_info)
+
+    if diagnostics.collect_summaries:
+        from scripts.mod_summary import summarize
+        diagnostics.add_summary(summarize(document, ENEMY))
+
+    if errors:
+        diagnostics.file_validated(ito_filepath, ENEMY, False, f"{basename}: {errors}")
+        return False, f"{basename}: {errors}"
+
+    diagnostics.print(f"{GREEN}{print_prefix}{basename} enemy validation passed.{RESET}")
+    diagnostics.file_validated(ito_filepath, ENEMY, True, f"{basename} enemy validation passed.")
 
     return True, f"{basename} enemy validation passed."
 
 def main():
+    # Only the command line reports through a reporter, the library entry point is loaded with it
+    from scripts.reporters import create_reporter, HUMAN
+    from scripts.cli_arguments import add_common_arguments
+    from woh_validator import validate_path, normalize_path
+
     parser = argparse.ArgumentParser(description='Validate an event file.')
     parser.add_argument('ito_filepath', type=str, help='Path to the event .ito file')
     parser.add_argument('--mod_dir', type=str, default="", help='Optional directory for mods of specific type, relative to WoH .exe location, e.g. "mystery\"')
     parser.add_argument('--mod_root', type=str, default="", help='Optional directory from which paths will be built, defaults to .ito location')
+    add_common_arguments(parser, CONFIG_PATH, linked_files=False)
     
     args = parser.parse_args()
+    valid, message = select_profile(CONFIG_PATH, args.game_version, args.lang)
+    if not valid:
+        parser.error(message)
 
-    ito_filepath = args.ito_filepath
-    mod_dir = args.mod_dir if args.mod_dir else ""
-    mod_root = args.mod_root if args.mod_root else os.path.dirname(ito_filepath)
-    
-    ito_filepath = ito_filepath.replace('\\', os.sep).replace('/', os.sep)
-    mod_dir = mod_dir.replace('\\', os.sep).replace('/', os.sep)
-    mod_root = mod_root.replace('\\', os.sep).replace('/', os.sep)
+    ito_filepath = normalize_path(args.ito_filepath)
+    mod_dir = normalize_path(args.mod_dir) if args.mod_dir else ""
+    mod_root = normalize_path(args.mod_root) if args.mod_root else os.path.dirname(ito_filepath)
     
-    valid, valid_message = validate_enemy(ito_filepath, mod_dir, mod_root)
-    if not valid:
-        print(f"{RED}{valid_message}{RESET}")
+    profiler = None
+    if args.profile is not None or args.profile_output:
+        from scripts.profiler import Profiler
+        profiler = Profiler(args.profile, args.profile_output)
+
+    report = validate_path(ito_filepath, mod_dir, mod_root, ENEMY, args.game_version, args.lang, reporter=create_reporter(args.format, args.output), profiler=profiler, check_assets=args.check_assets)
+    if profiler is not None:
+        profiler.print_report()
+
+    # No key prompt when output is meant for other tools
+    return args.format == HUMAN, report.valid
 
 if __name__ == "__main__":
-    main()
-    input("Press any key to exit...")  
+    interactive, valid = main()
+    if interactive:
+        input("Press any key to exit...")
+    sys.exit(0 if valid else 1)  
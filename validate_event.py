@@ -1,6 +1,7 @@
 import os
 import sys
 import argparse
+import io
 
 # PyInstaller check
 if getattr(sys, 'frozen', False):
@@ -9,297 +10,394 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
 CONFIG_PATH = os.path.join(application_path, 'config')
-SCRIPTS_PATH = os.path.join(application_path, 'scripts')
 
-sys.path.append(CONFIG_PATH)
-sys.path.append(SCRIPTS_PATH)
-
-from check_quotes import check_quotes
-from check_no_duplicate_keys import check_no_duplicate_keys
-from check_asset_references import check_asset_references
-from check_trigger_references import check_trigger_references
-from check_keys_and_values import check_keys_and_values
-from check_prizes import check_prizes
-from validate_enemy import validate_enemy
+from scripts.ito_document import parse_ito
+from scripts.config_registry import load_mod_dir_requirements, get_selection, select_profile
+from scripts.check_quotes import check_quotes
+from scripts.check_no_duplicate_keys import check_no_duplicate_keys
+from scripts.check_asset_references import check_asset_references, enable_content_checks
+from scripts.check_trigger_references import check_trigger_references
+from scripts.check_keys_and_values import check_key_value_rules
+from scripts.check_prizes import check_prize_rules
+from scripts.mod_graph import EVENT, ENEMY, LINKED, DUPLICATE, MISSING, find_triggered_files, discover_linked_files
+from scripts.terminal import enable_colors
+from scripts.file_system import OS_FILE_SYSTEM, RecordingFileSystem, open_file_system
+from scripts import check_asset_references as asset_references
+from scripts.diagnostics import Diagnostic, DiagnosticCollector, PARSE_ERROR, FILE_NOT_FOUND, ERROR
 
 ASSET_KEYS = "event_asset_keys.txt"
 TRIGGER_KEYS = "event_trigger_keys.txt"
 ALLOWED_DUPLICATE_KEYS = "event_allowed_duplicate_keys.txt"
 
-ITEM_PRIZE_TYPE = "item"
-ITEM_VALUES = "item_values.txt"
-ITEMPOOL_PRIZE_TYPE = "itempool"
-ITEMPOOL_VALUES = "itempool_values.txt"
-CURSE_EX_PRIZE_TYPE = "curse_ex"
-CURSE_EX_VALUES = "curse_ex_values.txt"
-SPELL_EX_PRIZE_TYPE = "spell_ex"
-SPELL_EX_VALUES = "spell_ex_values.txt"
-INJURY_EX_PRIZE_TYPE = "injury_ex"
-INJURY_EX_VALUES = "injury_ex_values.txt"
-ALLY_EX_PRIZE_TYPE = "ally_ex"
-ALLY_EX_VALUES = "ally_ex_values.txt"
-CARD_ADD_PRIZE_TYPE = "card_add"
-CARD_ADD_VALUES = "card_add_values.txt"
-
-WINPRIZE_KEYS = "winprize_keys.txt"
-WINPRIZE_VALUES = "winprize_values.txt"
-EXTRA_WINPRIZE_KEYS = "extra_winprize_keys.txt"
-EXTRA_WINPRIZE_VALUES = "extra_winprize_values.txt"
-WINEFFECT_KEYS = "wineffect_keys.txt"
-WINEFFECT_VALUES = "wineffect_values.txt"
-
-LOCATION_KEYS = "location_keys.txt"
-LOCATION_VALUES = "location_values.txt"
-CHARACTER_KEYS = "character_keys.txt"
-CHARACTER_VALUES = "character_values.txt"
+# Key -> valid values and prize type -> valid values, adding a rule only takes a line in these files
+KEY_VALUE_RULES = "event_key_value_rules.txt"
+PRIZE_RULES = "event_prize_rules.txt"
 
 ADDITIONAL_PREFIX = "   "
 
-os.system("")
+enable_colors()
 RED = '\033[31m'
 GREEN = '\033[32m'
 YELLOW = '\033[33m'
 DARK_GRAY = '\033[90m'
 RESET = '\033[0m'
 
-def load_mod_dir_requirements(filepath):
-    keys_requiring_mod_dir = {}
-    with open(filepath, 'r') as file:
-        for line in file:
-            parts = line.strip().split(',')
-            key = parts[0].strip()
-            requires_subdir = parts[1].strip() if len(parts) > 1 else None
-            keys_requiring_mod_dir[key] = requires_subdir == 'True'
-    return keys_requiring_mod_dir
-
-def validate_event(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True):
-
-    basename = os.path.basename(ito_filepath)
-
-    if already_checked_events is None:
-        already_checked_events = set()
-
-    if already_checked_enemies is None:
-        already_checked_enemies = set()
-        
-    if ito_filepath in already_checked_events:
-        print(f"{DARK_GRAY}{print_prefix}Skipping already checked event file: {basename}{RESET}")
-        return True, "" 
-        
-    already_checked_events.add(ito_filepath)
-
-    triggers_requiring_mod_dir = load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS))
+# Runs every check of a single event on its parsed document, linked files are not looked at
+# Returns messages of the problems found, lsp.py runs it on unsaved buffers too
+def check_document(document, mod_dir, mod_root, fs, diagnostics, print_prefix="", print_info=True):
+    # Every check runs even if an earlier one failed, so all problems are reported at once
+    errors = []
 
     # Check for unclosed quotes
     if print_info:
-        print(f"{print_prefix}Checking quotes...")
-    quotes_valid, quotes_message = check_quotes(ito_filepath)
+        diagnostics.print(f"{print_prefix}Checking quotes...")
+    quotes_valid, quotes_message = check_quotes(document, diagnostics)
     if not quotes_valid:
-        print(f"{RED}{print_prefix}{quotes_message}{RESET}")
-        return False, f"{basename}: {quotes_message}"
+        for message in quotes_message:
+            diagnostics.print(f"{RED}{print_prefix}{message}{RESET}")
+        errors += quotes_message
     elif print_info:
-        print(f"{print_prefix}{quotes_message}")
+        diagnostics.print(f"{print_prefix}{quotes_message}")
 
     # Check for no duplicate keys, except allowed ones
     if print_info:
-        print(f"{print_prefix}Checking key duplicates...")
-    duplicates_valid, duplicates_message = check_no_duplicate_keys(ito_filepath, os.path.join(CONFIG_PATH, ALLOWED_DUPLICATE_KEYS))
+        diagnostics.print(f"{print_prefix}Checking key duplicates...")
+    duplicates_valid, duplicates_message = check_no_duplicate_keys(document, os.path.join(CONFIG_PATH, ALLOWED_DUPLICATE_KEYS), diagnostics=diagnostics)
     if not duplicates_valid:
-        print(f"{RED}{print_prefix}{duplicates_message}{RESET}")
-        return False, f"{basename}: {quotes_message}"
+        for message in duplicates_message:
+            diagnostics.print(f"{RED}{print_prefix}{message}{RESET}")
+        errors += duplicates_message
     elif print_info:
-        print(f"{print_prefix}{duplicates_message}")
+        diagnostics.print(f"{print_prefix}{duplicates_message}")
 
     # Check if key values are valid
-    # TODO: refactor to limit copypasta
     if print_info:
-        print(f"{print_prefix}Checking keys and valid values...")
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, WINPRIZE_KEYS), os.path.join(CONFIG_PATH, WINPRIZE_VALUES))  
+        diagnostics.print(f"{print_prefix}Checking keys and valid values...")
+    keys_and_values_valid, keys_and_values_message = check_key_value_rules(document, os.path.join(CONFIG_PATH, KEY_VALUE_RULES), diagnostics)
     if not keys_and_values_valid:
         for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, EXTRA_WINPRIZE_KEYS), os.path.join(CONFIG_PATH, EXTRA_WINPRIZE_VALUES))  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, WINEFFECT_KEYS), os.path.join(CONFIG_PATH, WINEFFECT_VALUES))  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, LOCATION_KEYS), os.path.join(CONFIG_PATH, LOCATION_VALUES))  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-    keys_and_values_valid, keys_and_values_message = check_keys_and_values(ito_filepath, os.path.join(CONFIG_PATH, CHARACTER_KEYS), os.path.join(CONFIG_PATH, CHARACTER_VALUES))  
-    if not keys_and_values_valid:
-        for message in keys_and_values_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {keys_and_values_message}"
-        
-    if print_info:
-        print(f"{print_prefix}All keys and values validated.")
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += keys_and_values_message
+    elif print_info:
+        diagnostics.print(f"{print_prefix}All keys and values validated.")
         
     # Check prizes - acceptable prize values depend on prize types
-    # TODO: refactor to dictionary of prize types and value configs instead of each pair hardcoded
     if print_info:
-        print(f"{print_prefix}Checking prizes...")
-    prizes_valid, prizes_message = check_prizes(ito_filepath, ITEM_PRIZE_TYPE, os.path.join(CONFIG_PATH, ITEM_VALUES)) 
+        diagnostics.print(f"{print_prefix}Checking prizes...")
+    prizes_valid, prizes_message = check_prize_rules(document, os.path.join(CONFIG_PATH, PRIZE_RULES), diagnostics)
     if not prizes_valid:
         for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    prizes_valid, prizes_message = check_prizes(ito_filepath, ITEMPOOL_PRIZE_TYPE, os.path.join(CONFIG_PATH, ITEMPOOL_VALUES)) 
-    if not prizes_valid:
-        for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    prizes_valid, prizes_message = check_prizes(ito_filepath, CURSE_EX_PRIZE_TYPE, os.path.join(CONFIG_PATH, CURSE_EX_VALUES)) 
-    if not prizes_valid:
-        for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    prizes_valid, prizes_message = check_prizes(ito_filepath, SPELL_EX_PRIZE_TYPE, os.path.join(CONFIG_PATH, SPELL_EX_VALUES)) 
-    if not prizes_valid:
-        for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    prizes_valid, prizes_message = check_prizes(ito_filepath, INJURY_EX_PRIZE_TYPE, os.path.join(CONFIG_PATH, INJURY_EX_VALUES)) 
-    if not prizes_valid:
-        for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    prizes_valid, prizes_message = check_prizes(ito_filepath, ALLY_EX_PRIZE_TYPE, os.path.join(CONFIG_PATH, ALLY_EX_VALUES)) 
-    if not prizes_valid:
-        for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    prizes_valid, prizes_message = check_prizes(ito_filepath, CARD_ADD_PRIZE_TYPE, os.path.join(CONFIG_PATH, CARD_ADD_VALUES)) 
-    if not prizes_valid:
-        for message in prizes_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {prizes_message}"
-    
-    if print_info:
-        print(f"{print_prefix}All prizes validated.")
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += prizes_message
+    elif print_info:
+        diagnostics.print(f"{print_prefix}{prizes_message}")
     
     # Check referenced files
     if print_info:
-        print(f"{print_prefix}Checking file references...")
-    file_ref_valid, file_ref_message = check_asset_references(ito_filepath, mod_dir, mod_root, os.path.join(CONFIG_PATH, ASSET_KEYS))
+        diagnostics.print(f"{print_prefix}Checking file references...")
+    file_ref_valid, file_ref_message = check_asset_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, ASSET_KEYS), fs=fs, diagnostics=diagnostics)
     if not file_ref_valid:
         for message in file_ref_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, f"{basename}: {file_ref_message}"
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += file_ref_message
     elif print_info:
-        print(f"{print_prefix}{file_ref_message}")
+        diagnostics.print(f"{print_prefix}{file_ref_message}")
         
     # Conditional trigger reference check
     if print_info:
-        print(f"{print_prefix}Checking trigger references...")
-    trigger_ref_valid, trigger_ref_message = check_trigger_references(ito_filepath, mod_dir, mod_root, os.path.join(CONFIG_PATH, TRIGGER_KEYS))
+        diagnostics.print(f"{print_prefix}Checking trigger references...")
+    trigger_ref_valid, trigger_ref_message = check_trigger_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, TRIGGER_KEYS), fs=fs, diagnostics=diagnostics)
     if not trigger_ref_valid:
         for message in trigger_ref_message:
-            print(f"{print_prefix}{message}")
-        return False, f"{basename}: {trigger_ref_message}"
-
-    print(f"{GREEN}{print_prefix}{basename} event validation passed.{RESET}")
-
-    events_to_check = {}
-    enemies_to_check = {}
-    prize_conditions = {}
-
-    with open(ito_filepath, 'r') as file:
-        for line in file:
-            if 'winprize' in line:
-                key, value = line.split('=', 1)
-                prize_conditions[key.strip()] = value.strip().strip('"')
-            elif 'winnumber' in line:
-                key, path = line.split('=', 1)
-                key = key.strip()
-                path = path.strip().strip('"')
-                condition_key = key.replace('number', 'prize')
-                # Check if the corresponding prize key indicates a file path needs checking
-                if prize_conditions.get(condition_key) == "trigger_event":
-                    if path:
-                        events_to_check[key] = path
-                if prize_conditions.get(condition_key) == "trigger_enemy":
-                    if path:
-                        enemies_to_check[key] = path
-            elif 'failprize' in line:
-                key, value = line.split('=', 1)
-                prize_conditions[key.strip()] = value.strip().strip('"')
-            elif 'failnumber' in line:
-                key, path = line.split('=', 1)
-                key = key.strip()
-                path = path.strip().strip('"')
-                condition_key = key.replace('number', 'prize')
-                # Check if the corresponding prize key indicates a file path needs checking
-                if prize_conditions.get(condition_key) == "trigger_event":
-                    if path:
-                        events_to_check[key] = path
-                if prize_conditions.get(condition_key) == "trigger_enemy":
-                    if path:
-                        enemies_to_check[key] = path
-
-    # Validate each linked enemy
-    for key, path in enemies_to_check.items():
-        path = path.strip().strip('"').replace('\\', os.sep).replace('/', os.sep)
-        if key in triggers_requiring_mod_dir and triggers_requiring_mod_dir[key] and path.startswith(mod_dir):
-            path = path[len(mod_dir):]
-        ref_full_path = os.path.join(mod_root, path)
-        if not os.path.exists(ref_full_path):
-            print(f"{RED}{print_prefix}Referenced file {path} does not exist.{RESET}")
-            return False, f"{basename}: Referenced file {path} does not exist."
-        file_ref_valid, file_ref_message
-        if print_info:
-            print(f"{print_prefix}Validating linked enemy file: {path}")
-        linked_enemy_valid, linked_enemy_message = validate_enemy(ref_full_path, mod_dir, mod_root, already_checked_events, already_checked_enemies, print_prefix + ADDITIONAL_PREFIX, print_info)
-        if not linked_enemy_valid:
-            return False, f"{linked_enemy_message}"
- 
-    # Recursively validate each linked event
-    for key, path in events_to_check.items():
-        path = path.strip().strip('"').replace('\\', os.sep).replace('/', os.sep)
-        if key in triggers_requiring_mod_dir and triggers_requiring_mod_dir[key] and path.startswith(mod_dir):
-            path = path[len(mod_dir):]
-        ref_full_path = os.path.join(mod_root, path)
-        if not os.path.exists(ref_full_path):
-            print(f"{RED}{print_prefix}Referenced file {path} does not exist.{RESET}")
-            return False, f"{filename}: Referenced file {path} does not exist."
-        file_ref_valid, file_ref_message
-        if print_info:
-            print(f"{print_prefix}Validating linked event file: {path}")
-        linked_event_valid, linked_event_message = validate_event(ref_full_path, mod_dir, mod_root, already_checked_events, already_checked_enemies, print_prefix + "   ", print_info)
-        if not linked_event_valid:
-            return False, f"{linked_event_message}"
-
-    return True, f"{basename} event validation passed."
+            diagnostics.print(f"{print_prefix}{message}")
+        errors += trigger_ref_message
+
+    return errors
+
+# Validates a single event file, linked files are returned as references instead of being validated here
+def validate_event_file(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True, document=None, fs=None, diagnostics=None):
+
+    basename = os.path.basename(ito_filepath)
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+
+    if already_checked_events is None:
+        already_checked_events = set()
+
+    if already_checked_enemies is None:
+        already_checked_enemies = set()
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    # Sets of files are keyed by identity, so the same file reached through another path is not validated again
+    identity = fs.identity(ito_filepath)
+    if identity in already_checked_events:
+        diagnostics.print(f"{DARK_GRAY}{print_prefix}Skipping already checked event file: {basename}{RESET}")
+        return True, "", []
+        
+    already_checked_events.add(identity)
+
+    # Read and parse the file once, every check below runs on the parsed document
+    try:
+        if document is None:
+            document = parse_ito(ito_filepath, fs)
+    except Exception as e:
+        diagnostics.print(f"{RED}{print_prefix}An error occurred: {str(e)}{RESET}")
+        diagnostics.add(Diagnostic(ito_filepath, None, None, PARSE_ERROR, ERROR, f"An error occurred: {str(e)}"))
+        diagnostics.file_validated(ito_filepath, EVENT, False, f"{basename}: An error occurred: {str(e)}")
+        return False, f"{basename}: An error occurred: {str(e)}", []
+
+    errors = check_document(document, mod_dir, mod_root, fs, diagnostics, print_prefix, print_info)
+
+    # Linked files are still validated when this one failed
+    triggers_requiring_mod_dir = load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS))
+    references = find_triggered_files(document, mod_dir, mod_root, triggers_requiring_mod_dir)
+    if diagnostics.collect_summaries:
+        from scripts.mod_summary import summarize
+        diagnostics.add_summary(summarize(document, EVENT, references))
+
+    if errors:
+        diagnostics.file_validated(ito_filepath, EVENT, False, f"{basename}: {errors}")
+        return False, f"{basename}: {errors}", references
+
+    diagnostics.print(f"{GREEN}{print_prefix}{basename} event validation passed.{RESET}")
+    diagnostics.file_validated(ito_filepath, EVENT, True, f"{basename} event validation passed.")
+
+    return True, f"{basename} event validation passed.", references
+
+# Marks where print_prefix goes in captured output, so results can be replayed at any depth
+PREFIX_PLACEHOLDER = "\x1f"
+
+# Index of mod_root in a --jobs worker process, built on its first file instead of being sent with every file
+worker_fs = None
+worker_fs_root = None
+
+def get_worker_fs(mod_root):
+    global worker_fs, worker_fs_root
+    if worker_fs is None or worker_fs_root != mod_root:
+        if worker_fs is not None:
+            worker_fs.close()
+        worker_fs = open_file_system(mod_root)
+        worker_fs_root = mod_root
+    return worker_fs
+
+# Validates a single linked file with its output captured, so it can run in a worker process or be cached
+# Returns (valid, message, output, dependencies, diagnostics, summaries), dependencies being the existence checks made on the way
+# and diagnostics and summaries plain dicts, so results can be sent back from workers and stored as JSON
+# selection and check_assets are only given to worker processes, which don't share the selected game version and language
+# or whether asset contents are checked with the main one
+def validate_linked_file(kind, ito_filepath, mod_dir, mod_root, print_info, document, fs=None, selection=None, check_assets=None):
+    if selection is not None:
+        select_profile(CONFIG_PATH, *selection)
+    if check_assets is not None:
+        enable_content_checks(check_assets)
+    if fs is None:
+        fs = get_worker_fs(mod_root)
+    recording_fs = RecordingFileSystem(fs)
+    from scripts.reporters import Reporter
+    output = io.StringIO()
+    # Summaries are cached and sent back with the result, whether the mod is analyzed or not
+    diagnostics = DiagnosticCollector(reporter=Reporter(output), collect_summaries=True)
+    if kind == ENEMY:
+        # Enemy checks are only loaded once an enemy is linked
+        from validate_enemy import validate_enemy
+        valid, message = validate_enemy(ito_filepath, mod_dir, mod_root, None, None, PREFIX_PLACEHOLDER, print_info, document, recording_fs, diagnostics)
+    else:
+        valid, message, _ = validate_event_file(ito_filepath, mod_dir, mod_root, None, None, PREFIX_PLACEHOLDER, print_info, document, recording_fs, diagnostics)
+    return valid, message, output.getvalue(), recording_fs.checked, [diagnostic.to_dict() for diagnostic in diagnostics.diagnostics], [summary.to_dict() for summary in diagnostics.summaries]
+
+# Validates linked events and enemies with an explicit worklist instead of recursion
+# Depth is only tracked for output indentation, so chain length is not limited by the interpreter stack
+# With jobs > 1 the whole graph is discovered first and files are validated on a process pool,
+# results are still printed in traversal order regardless of which worker finishes first
+# Broken files don't stop the walk, it only ends early once diagnostics reach their max_errors
+def validate_linked_files(references, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True, jobs=1, cache=None, fs=None, dependency_index=None, diagnostics=None):
+
+    if already_checked_events is None:
+        already_checked_events = set()
+
+    if already_checked_enemies is None:
+        already_checked_enemies = set()
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+
+    # Message of every file that failed, in traversal order
+    failed_messages = []
+
+    triggers_requiring_mod_dir = load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS))
+    nodes = discover_linked_files(references, mod_dir, mod_root, triggers_requiring_mod_dir, already_checked_events, already_checked_enemies, fs)
+
+    # Index in nodes -> cached result or future for files sent to the pool
+    results = {}
+    futures = {}
+    executor = None
+    if jobs > 1:
+        # Process pool machinery is slow to import, only load it when it's used
+        from concurrent.futures import ProcessPoolExecutor
+        nodes = list(nodes)
+        executor = ProcessPoolExecutor(max_workers=jobs)
+
+    try:
+        if executor is not None:
+            for index, (depth, reference, status, document) in enumerate(nodes):
+                if status == LINKED:
+                    result = get_cached_result(cache, reference, document, mod_dir, mod_root, print_info, fs)
+                    if result is None:
+                        futures[index] = executor.submit(validate_linked_file, reference.kind, reference.full_path, mod_dir, mod_root, print_info, document, None, get_selection(), asset_references.content_checks)
+                    else:
+                        results[index] = result
+
+        for index, (depth, reference, status, document) in enumerate(nodes):
+            if diagnostics.limit_reached:
+                failed_messages.append(f"Stopped after {diagnostics.error_count} errors, the limit set by --max-errors.")
+                break
+
+            source_prefix = print_prefix + ADDITIONAL_PREFIX * (depth - 1)
+
+            if dependency_index is not None:
+                dependency_index.add_dependency(reference.source, reference.full_path)
+
+            if status == MISSING:
+                missing_message = f"Referenced file {reference.path} does not exist."
+                # Triggered events are usually reported already by the referencing file's own checks
+                if diagnostics.add(Diagnostic(reference.source, reference.line_number, reference.key, FILE_NOT_FOUND, ERROR, missing_message)):
+                    diagnostics.print(f"{RED}{source_prefix}{missing_message}{RESET}")
+                    failed_messages.append(f"{os.path.basename(reference.source)}: {missing_message}")
+                continue
+            if print_info:
+                diagnostics.print(f"{source_prefix}Validating linked {reference.kind} file: {reference.path}")
+            if status == DUPLICATE:
+                diagnostics.print(f"{DARK_GRAY}{source_prefix + ADDITIONAL_PREFIX}Skipping already checked {reference.kind} file: {os.path.basename(reference.full_path)}{RESET}")
+                continue
+
+            if reference.kind == ENEMY:
+                already_checked_enemies.add(fs.identity(reference.full_path))
+            else:
+                already_checked_events.add(fs.identity(reference.full_path))
+
+            result = results.pop(index, None)
+            future = futures.pop(index, None)
+            if future is not None:
+                result = future.result()
+                put_cached_result(cache, reference, document, mod_dir, mod_root, print_info, result)
+            if result is None:
+                result = get_cached_result(cache, reference, document, mod_dir, mod_root, print_info, fs)
+            if result is None:
+                result = validate_linked_file(reference.kind, reference.full_path, mod_dir, mod_root, print_info, document, fs)
+                put_cached_result(cache, reference, document, mod_dir, mod_root, print_info, result)
+
+            valid, message, output, dependencies, file_diagnostics, summaries = result
+            if dependency_index is not None:
+                dependency_index.set_dependencies(reference.full_path, dependencies, reference)
+            diagnostics.print(output.replace(PREFIX_PLACEHOLDER, source_prefix + ADDITIONAL_PREFIX), end="")
+            for values in file_diagnostics:
+                diagnostics.add(Diagnostic.from_dict(values))
+            if summaries:
+                from scripts.mod_summary import FileSummary
+                for values in summaries:
+                    diagnostics.add_summary(FileSummary.from_dict(values))
+            diagnostics.file_validated(reference.full_path, reference.kind, valid, message)
+            if not valid:
+                failed_messages.append(message)
+    finally:
+        if executor is not None:
+            for pending in futures.values():
+                pending.cancel()
+            executor.shutdown()
+
+    if failed_messages:
+        return False, "\n".join(failed_messages)
+    return True, ""
+
+def get_cached_result(cache, reference, document, mod_dir, mod_root, print_info, fs):
+    if cache is None or document is None:
+        return None
+    return cache.get(cache.key(reference.kind, document, mod_dir, mod_root, print_info), fs)
+
+def put_cached_result(cache, reference, document, mod_dir, mod_root, print_info, result):
+    if cache is None or document is None:
+        return
+    cache.put(cache.key(reference.kind, document, mod_dir, mod_root, print_info), reference.kind, reference.full_path, result)
+
+def validate_event(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True, jobs=1, cache=None, fs=None, dependency_index=None, diagnostics=None):
+
+    if already_checked_events is None:
+        already_checked_events = set()
+
+    if already_checked_enemies is None:
+        already_checked_enemies = set()
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+
+    # Record what this event's own checks look at, linked files record their own dependencies
+    event_fs = RecordingFileSystem(fs) if dependency_index is not None else fs
+
+    valid, message, references = validate_event_file(ito_filepath, mod_dir, mod_root, already_checked_events, already_checked_enemies, print_prefix, print_info, None, event_fs, diagnostics)
+    if dependency_index is not None:
+        dependency_index.set_dependencies(ito_filepath, event_fs.checked)
+
+    linked_valid, linked_message = validate_linked_files(references, mod_dir, mod_root, already_checked_events, already_checked_enemies, print_prefix, print_info, jobs, cache, fs, dependency_index, diagnostics)
+    if not valid and not linked_valid:
+        return False, f"{message}\n{linked_message}"
+    if not valid:
+        return False, message
+    if not linked_valid:
+        return False, linked_message
+
+    return True, message
 
 def main():
+    # Only the command line reports through a reporter, the library entry point is loaded with it
+    from scripts.reporters import create_reporter, HUMAN
+    from scripts.cli_arguments import add_common_arguments
+    from woh_validator import validate_path, normalize_path
+
     parser = argparse.ArgumentParser(description='Validate an event file.')
     parser.add_argument('ito_filepath', type=str, help='Path to the event .ito file')
     parser.add_argument('--mod_dir', type=str, default="", help='Optional directory for mods of specific type, relative to WoH .exe location, e.g. "mystery\"')
     parser.add_argument('--mod_root', type=str, default="", help='Optional directory from which paths will be built, defaults to .ito location')
+    add_common_arguments(parser, CONFIG_PATH)
     
     args = parser.parse_args()
+    valid, message = select_profile(CONFIG_PATH, args.game_version, args.lang)
+    if not valid:
+        parser.error(message)
 
-    ito_filepath = args.ito_filepath
-    mod_dir = args.mod_dir if args.mod_dir else ""
-    mod_root = args.mod_root if args.mod_root else os.path.dirname(ito_filepath)
-    
-    ito_filepath = ito_filepath.replace('\\', os.sep).replace('/', os.sep)
-    mod_dir = mod_dir.replace('\\', os.sep).replace('/', os.sep)
-    mod_root = mod_root.replace('\\', os.sep).replace('/', os.sep)
+    ito_filepath = normalize_path(args.ito_filepath)
+    mod_dir = normalize_path(args.mod_dir) if args.mod_dir else ""
+    mod_root = normalize_path(args.mod_root) if args.mod_root else os.path.dirname(ito_filepath)
     
-    valid, valid_message = validate_event(ito_filepath, mod_dir, mod_root)
-    if not valid:
-        print(f"{RED}{valid_message}{RESET}")
+    cache = None
+    if args.cache:
+        from scripts.validation_cache import ValidationCache
+        cache = ValidationCache(mod_root, CONFIG_PATH)
+    profiler = None
+    if args.profile is not None or args.profile_output:
+        from scripts.profiler import Profiler
+        profiler = Profiler(args.profile, args.profile_output)
+
+    report = validate_path(ito_filepath, mod_dir, mod_root, EVENT, args.game_version, args.lang, args.jobs, cache, args.max_errors, create_reporter(args.format, args.output), profiler, args.check_assets)
+    if profiler is not None:
+        profiler.print_report()
+    if cache is not None:
+        cache.save()
+
+    # No key prompt when output is meant for other tools
+    return args.format == HUMAN, report.valid
 
 if __name__ == "__main__":
-    main()
-    input("Press any key to exit...")
+    interactive, valid = main()
+    if interactive:
+        input("Press any key to exit...")
+    sys.exit(0 if valid else 1)
         
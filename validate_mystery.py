@@ -9,158 +9,225 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
 CONFIG_PATH = os.path.join(application_path, 'config')
-SCRIPTS_PATH = os.path.join(application_path, 'scripts')
 
-sys.path.append(CONFIG_PATH)
-sys.path.append(SCRIPTS_PATH)
-
-from check_quotes import check_quotes
-from check_no_duplicate_keys import check_no_duplicate_keys
-from check_asset_references import check_asset_references
-from check_music_references import check_music_references
-from validate_event import validate_event
+from scripts.ito_document import parse_ito
+from scripts.config_registry import load_mod_dir_requirements, select_profile
+from scripts.check_quotes import check_quotes
+from scripts.check_no_duplicate_keys import check_no_duplicate_keys
+from scripts.check_asset_references import check_asset_references
+from scripts.check_music_references import check_music_references
+from validate_event import validate_linked_files
+from scripts.mod_graph import MYSTERY, find_forced_events
+from scripts.terminal import enable_colors
+from scripts.file_system import OS_FILE_SYSTEM, RecordingFileSystem
+from scripts.diagnostics import Diagnostic, DiagnosticCollector, PARSE_ERROR, ERROR
 
 ASSET_KEYS = "mystery_asset_keys.txt"
 TRIGGER_KEYS = "mystery_trigger_keys.txt"
+EVENT_TRIGGER_KEYS = "event_trigger_keys.txt"
 ALLOWED_DUPLICATE_KEYS = "mystery_allowed_duplicate_keys.txt"
 ADDITIONAL_PREFIX = "   "
 
 MUSIC_KEYS = "music_keys.txt"
 MUSIC_VALUES = "music_values.txt"
 
-os.system("")
+enable_colors()
 RED = '\033[31m'
 GREEN = '\033[32m'
 YELLOW = '\033[33m'
 DARK_GRAY = '\033[90m'
 RESET = '\033[0m'
 
-def load_mod_dir_requirements(filepath):
-    keys_requiring_mod_dir = {}
-    with open(filepath, 'r') as file:
-        for line in file:
-            parts = line.strip().split(',')
-            key = parts[0].strip()
-            requires_subdir = parts[1].strip() if len(parts) > 1 else None
-            keys_requiring_mod_dir[key] = requires_subdir == 'True'
-    return keys_requiring_mod_dir
-
-# ito_filepath - path to .ito file, relative to script location
-# mos_dir - subdirectory for specific mod type, would be relative to WoH .exe location, e.g. "mystery\", some asset paths require it to be specified, some don't, even inside the same file, complete clown show
-# mod_root - path to main directory of the mod, can be relative to script location, by default same directory as ito_filepath, but might be overriden when e.g. validiating msytery events from subdirectory directly
-def validate_mystery(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True):
-
-    basename = os.path.basename(ito_filepath)
-
-    if already_checked_events is None:
-        already_checked_events = set()
-
-    if already_checked_enemies is None:
-        already_checked_enemies = set()
-
-    triggers_requiring_mod_dir = load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS))
+# Runs every check of a single mystery on its parsed document, forced events are not looked at
+# Returns messages of the problems found, lsp.py runs it on unsaved buffers too
+def check_document(document, mod_dir, mod_root, fs, diagnostics, print_prefix="", print_info=True):
+    # Every check runs even if an earlier one failed, so all problems are reported at once
+    errors = []
 
     # Check for unclosed quotes
     if print_info:
-        print(f"{print_prefix}Checking quotes...")
-    quotes_valid, quotes_message = check_quotes(ito_filepath)
+        diagnostics.print(f"{print_prefix}Checking quotes...")
+    quotes_valid, quotes_message = check_quotes(document, diagnostics)
     if not quotes_valid:
-        print(f"{RED}{print_prefix}{quotes_message}{RESET}")
-        return False, f"{basename}: {quotes_message}"
+        for message in quotes_message:
+            diagnostics.print(f"{RED}{print_prefix}{message}{RESET}")
+        errors += quotes_message
     elif print_info:
-        print(f"{print_prefix}{quotes_message}")
+        diagnostics.print(f"{print_prefix}{quotes_message}")
 
     # Check for no duplicate keys, except allowed ones
     if print_info:
-        print(f"{print_prefix}Checking key duplicates...")
-    duplicates_valid, duplicates_message = check_no_duplicate_keys(ito_filepath, os.path.join(CONFIG_PATH, ALLOWED_DUPLICATE_KEYS))
+        diagnostics.print(f"{print_prefix}Checking key duplicates...")
+    duplicates_valid, duplicates_message = check_no_duplicate_keys(document, os.path.join(CONFIG_PATH, ALLOWED_DUPLICATE_KEYS), diagnostics=diagnostics)
     if not duplicates_valid:
-        print(f"{RED}{print_prefix}{duplicates_message}{RESET}")
-        return False, f"{basename}: {duplicates_message}"
+        for message in duplicates_message:
+            diagnostics.print(f"{RED}{print_prefix}{message}{RESET}")
+        errors += duplicates_message
     elif print_info:
-        print(f"{print_prefix}{duplicates_message}")
+        diagnostics.print(f"{print_prefix}{duplicates_message}")
 
     # Check referenced assets
     if print_info:
-        print(f"{print_prefix}Checking asset references...")
-    file_ref_valid, file_ref_message = check_asset_references(ito_filepath, mod_dir, mod_root, os.path.join(CONFIG_PATH, ASSET_KEYS), True)
+        diagnostics.print(f"{print_prefix}Checking asset references...")
+    file_ref_valid, file_ref_message = check_asset_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, ASSET_KEYS), True, fs, diagnostics=diagnostics)
     if not file_ref_valid:
         for message in file_ref_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, file_ref_message
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += file_ref_message
     elif print_info:
-        print(f"{print_prefix}{file_ref_message}")
+        diagnostics.print(f"{print_prefix}{file_ref_message}")
     
     # Check referenced music (can use hardcoded values)
     if print_info:
-        print(f"{print_prefix}Checking music references...")
-    music_ref_valid, music_ref_message = check_music_references(ito_filepath, mod_dir, mod_root, os.path.join(CONFIG_PATH, MUSIC_KEYS), os.path.join(CONFIG_PATH, MUSIC_VALUES), True)
+        diagnostics.print(f"{print_prefix}Checking music references...")
+    music_ref_valid, music_ref_message = check_music_references(document, mod_dir, mod_root, os.path.join(CONFIG_PATH, MUSIC_KEYS), os.path.join(CONFIG_PATH, MUSIC_VALUES), True, fs, diagnostics=diagnostics)
     if not music_ref_valid:
         for message in music_ref_message:
-            print(f"{print_prefix}{RED}{message}{RESET}")
-        return False, music_ref_message
+            diagnostics.print(f"{print_prefix}{RED}{message}{RESET}")
+        errors += music_ref_message
     elif print_info:
-        print(f"{print_prefix}{music_ref_message}")
-        
+        diagnostics.print(f"{print_prefix}{music_ref_message}")
+
+    return errors
+
+# Warnings of rules spanning the mod of a mystery, over summaries collected since first_summary and diagnostics since first_diagnostic
+def analyze_mystery(diagnostics, first_diagnostic, first_summary, mod_dir, mod_root, fs):
+    from scripts.mod_summary import summarize_unreached, analyze_mod
+    summaries = diagnostics.summaries[first_summary:]
+    unreached_summaries = []
+    # Files reachable only through a file that couldn't be parsed would look unreachable
+    # Only indexed file systems know every file in the mod without walking it
+    filepaths = getattr(fs, 'filepaths', None)
+    if filepaths is not None and not any(diagnostic.rule == PARSE_ERROR for diagnostic in diagnostics.diagnostics[first_diagnostic:]):
+        reached = {fs.identity(summary.path) for summary in summaries}
+        event_triggers_requiring_mod_dir = load_mod_dir_requirements(os.path.join(CONFIG_PATH, EVENT_TRIGGER_KEYS))
+        unreached_summaries = summarize_unreached(filepaths, reached, mod_dir, mod_root, event_triggers_requiring_mod_dir, fs)
+    return analyze_mod(summaries, fs, unreached_summaries)
+
+# ito_filepath - path to .ito file, relative to script location
+# mos_dir - subdirectory for specific mod type, would be relative to WoH .exe location, e.g. "mystery\", some asset paths require it to be specified, some don't, even inside the same file, complete clown show
+# mod_root - path to main directory of the mod, can be relative to script location, by default same directory as ito_filepath, but might be overriden when e.g. validiating msytery events from subdirectory directly
+def validate_mystery(ito_filepath, mod_dir="", mod_root="", already_checked_events=None, already_checked_enemies=None, print_prefix="", print_info=True, jobs=1, cache=None, fs=None, dependency_index=None, diagnostics=None):
+
+    basename = os.path.basename(ito_filepath)
+
+    if already_checked_events is None:
+        already_checked_events = set()
+
+    if already_checked_enemies is None:
+        already_checked_enemies = set()
+
+    triggers_requiring_mod_dir = load_mod_dir_requirements(os.path.join(CONFIG_PATH, TRIGGER_KEYS))
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+    # Diagnostics and summaries collected before this mystery belong to other mods, e.g. in validate_batch.py
+    first_diagnostic = len(diagnostics.diagnostics)
+
+    # Record what the mystery's own checks look at, linked files record their own dependencies
+    mystery_fs = RecordingFileSystem(fs) if dependency_index is not None else fs
+
+    # Read and parse the file once, every check below runs on the parsed document
+    try:
+        document = parse_ito(ito_filepath, fs)
+    except Exception as e:
+        diagnostics.print(f"{RED}{print_prefix}An error occurred: {str(e)}{RESET}")
+        diagnostics.add(Diagnostic(ito_filepath, None, None, PARSE_ERROR, ERROR, f"An error occurred: {str(e)}"))
+        diagnostics.file_validated(ito_filepath, MYSTERY, False, f"{basename}: An error occurred: {str(e)}")
+        return False, f"{basename}: An error occurred: {str(e)}"
+
+    errors = check_document(document, mod_dir, mod_root, mystery_fs, diagnostics, print_prefix, print_info)
 
     # Check _frc triggers
     if print_info:
-        print(f"{print_prefix}Checking forced events...")
-    with open(ito_filepath, 'r') as file:
-        for line in file:
-            if '_frc="' in line:
-                key, path = line.split('=', 1)
-                key = key.strip()
-                path = path.strip().strip('"').replace('\\', os.sep).replace('/', os.sep)
-                if path:
-                    if key in triggers_requiring_mod_dir and triggers_requiring_mod_dir[key] and path.startswith(mod_dir):
-                        path = path[len(mod_dir):]
-                    ref_full_path = os.path.join(mod_root, path)
-                    if print_info:
-                        print(f"{print_prefix}Checking referenced event file: {path}")
-                    if not os.path.exists(ref_full_path):
-                        print(f"{RED}{print_prefix}Referenced file {path} does not exist.{RESET}")
-                        return False, f"{basename}: Referenced file {path} does not exist."
-                    if print_info:
-                        print(f"{print_prefix}Validating linked event file: {path}")
-                    linked_event_valid, linked_event_message = validate_event(ref_full_path, mod_dir, mod_root, already_checked_events, already_checked_enemies, print_prefix + ADDITIONAL_PREFIX, print_info)
-                    if not linked_event_valid:
-                        return False, f"{linked_event_message}"
-
-    if len(already_checked_enemies) > 0:
-        print(f"Validated {len(already_checked_enemies)} enemies:")
+        diagnostics.print(f"{print_prefix}Checking forced events...")
+    if dependency_index is not None:
+        dependency_index.set_dependencies(ito_filepath, mystery_fs.checked)
+    diagnostics.file_validated(ito_filepath, MYSTERY, not errors, f"{basename}: {errors}" if errors else f"{basename} mystery checks passed.")
+
+    forced_events = find_forced_events(document, mod_dir, mod_root, triggers_requiring_mod_dir)
+    first_summary = len(diagnostics.summaries)
+    # Whole-mod rules are only loaded once a mystery is validated
+    from scripts.mod_summary import summarize
+    diagnostics.add_summary(summarize(document, MYSTERY, forced_events))
+    linked_valid, linked_message = validate_linked_files(forced_events, mod_dir, mod_root, already_checked_events, already_checked_enemies, print_prefix, print_info, jobs, cache, fs, dependency_index, diagnostics)
+
+    # Rules spanning files, checked on summaries of the files validated above without opening them again
+    # Skipped once validation stopped early, the summaries would only cover part of the mod
+    if not diagnostics.limit_reached:
+        if print_info:
+            diagnostics.print(f"{print_prefix}Checking the whole mod...")
+        for diagnostic in analyze_mystery(diagnostics, first_diagnostic, first_summary, mod_dir, mod_root, fs):
+            if diagnostics.add(diagnostic):
+                diagnostics.print(f"{YELLOW}{print_prefix}{diagnostic.message}{RESET}")
+    if errors and not linked_valid:
+        return False, f"{basename}: {errors}\n{linked_message}"
+    if errors:
+        return False, f"{basename}: {errors}"
+    if not linked_valid:
+        return False, f"{linked_message}"
+
+    if print_info and len(already_checked_enemies) > 0:
+        diagnostics.print(f"Validated {len(already_checked_enemies)} enemies:")
         for enemy in already_checked_enemies:
-            print(f"{ADDITIONAL_PREFIX}{os.path.basename(enemy)}")
+            diagnostics.print(f"{ADDITIONAL_PREFIX}{os.path.basename(enemy)}")
 
-    if len(already_checked_events) > 0:
-        print(f"Validated {len(already_checked_events)} events:")
+    if print_info and len(already_checked_events) > 0:
+        diagnostics.print(f"Validated {len(already_checked_events)} events:")
         for event in already_checked_events:
-            print(f"{ADDITIONAL_PREFIX}{os.path.basename(event)}")
+            diagnostics.print(f"{ADDITIONAL_PREFIX}{os.path.basename(event)}")
 
-    print(f"{GREEN}{print_prefix}{basename} mystery validation passed.{RESET}")
+    diagnostics.print(f"{GREEN}{print_prefix}{basename} mystery validation passed.{RESET}")
 
     return True, f"{basename} mystery validation passed."
 
 def main():
+    # Only the command line reports through a reporter, the library entry point is loaded with it
+    from scripts.reporters import create_reporter, HUMAN
+    from scripts.cli_arguments import add_common_arguments
+    from woh_validator import validate_path, normalize_path, find_archived_mystery, DEFAULT_MOD_DIR
+
     parser = argparse.ArgumentParser(description='Validate a mystery file.')
     parser.add_argument('ito_filepath', type=str, help='Path to the event .ito file')
     parser.add_argument('--mod_dir', type=str, default="", help='Optional directory for mods of specific type, relative to WoH .exe location, e.g. "mystery\"')
     parser.add_argument('--mod_root', type=str, default="", help='Optional directory from which paths will be built, defaults to .ito location')
+    add_common_arguments(parser, CONFIG_PATH)
     
     args = parser.parse_args()
-
-    ito_filepath = args.ito_filepath
-    mod_dir = args.mod_dir if args.mod_dir else "mystery" + os.sep
-    mod_root = args.mod_root if args.mod_root else os.path.dirname(ito_filepath)
-    
-    ito_filepath = ito_filepath.replace('\\', os.sep).replace('/', os.sep)
-    mod_dir = mod_dir.replace('\\', os.sep).replace('/', os.sep)
-    mod_root = mod_root.replace('\\', os.sep).replace('/', os.sep)
-    
-    valid, valid_message = validate_mystery(ito_filepath, mod_dir, mod_root)
+    valid, message = select_profile(CONFIG_PATH, args.game_version, args.lang)
     if not valid:
-        print(f"{RED}{valid_message}{RESET}")
+        parser.error(message)
+
+    try:
+        ito_filepath = find_archived_mystery(normalize_path(args.ito_filepath))
+    except ValueError as e:
+        parser.error(str(e))
+    mod_dir = normalize_path(args.mod_dir) if args.mod_dir else DEFAULT_MOD_DIR
+    mod_root = normalize_path(args.mod_root) if args.mod_root else os.path.dirname(ito_filepath)
+    
+    cache = None
+    if args.cache:
+        from scripts.validation_cache import ValidationCache
+        cache = ValidationCache(mod_root, CONFIG_PATH)
+    profiler = None
+    if args.profile is not None or args.profile_output:
+        from scripts.profiler import Profiler
+        profiler = Profiler(args.profile, args.profile_output)
+
+    report = validate_path(ito_filepath, mod_dir, mod_root, MYSTERY, args.game_version, args.lang, args.jobs, cache, args.max_errors, create_reporter(args.format, args.output), profiler, args.check_assets)
+    if profiler is not None:
+        profiler.print_report()
+    if cache is not None:
+        cache.save()
+
+    # No key prompt when output is meant for other tools
+    return args.format == HUMAN, report.valid
 
 if __name__ == "__main__":
-    main()
-    input("Press any key to exit...")
+    interactive, valid = main()
+    if interactive:
+        input("Press any key to exit...")
+    sys.exit(0 if valid else 1)
@@ -0,0 +1,149 @@
+import os
+import sys
+
+# PyInstaller check
+if getattr(sys, 'frozen', False):
+    application_path = sys._MEIPASS
+else:
+    application_path = os.path.dirname(os.path.abspath(__file__))
+
+CONFIG_PATH = os.path.join(application_path, 'config')
+
+# Validators and their checks are imported once a file of their type is found
+from scripts.file_system import OS_FILE_SYSTEM, ARCHIVE_EXTENSION, ArchiveFileSystem, RecordingFileSystem, open_file_system
+from scripts.mod_graph import MYSTERY, EVENT, ENEMY, read_kind
+from scripts.diagnostics import Diagnostic, DiagnosticCollector, Report, PARSE_ERROR, ERROR
+from scripts.config_registry import select_profile, DEFAULT_LANGUAGE
+from scripts.check_asset_references import enable_content_checks
+from scripts.game_profile import DEFAULT_GAME_VERSION
+
+# mod_dir of mysteries and the files they link
+DEFAULT_MOD_DIR = "mystery" + os.sep
+
+# Paths in .ito files and on the command line may use either separator
+def normalize_path(path):
+    return path.replace('\\', os.sep).replace('/', os.sep)
+
+# A .zip archive given instead of a file is replaced with the path of the mystery .ito inside it, other paths are returned as they are
+# Raises ValueError if the archive doesn't contain exactly one mystery
+def find_archived_mystery(ito_filepath):
+    if not ito_filepath.lower().endswith(ARCHIVE_EXTENSION) or not os.path.isfile(ito_filepath):
+        return ito_filepath
+    try:
+        fs = ArchiveFileSystem(ito_filepath)
+    except Exception as e:
+        raise ValueError(f"Not a valid .zip archive: {str(e)}")
+    mysteries = []
+    try:
+        for filepath in fs.filepaths:
+            if filepath.lower().endswith('.ito'):
+                try:
+                    if read_kind(filepath, fs) == MYSTERY:
+                        mysteries.append(filepath)
+                except (OSError, UnicodeDecodeError):
+                    continue
+    finally:
+        fs.close()
+    if len(mysteries) != 1:
+        found = ', '.join(os.path.relpath(filepath, ito_filepath) for filepath in mysteries) if mysteries else "none"
+        raise ValueError(f"Expected exactly one mystery .ito in the archive, found {found}, pass the path of the one to validate inside the archive")
+    return mysteries[0]
+
+# Validates a mystery, event or enemy and everything linked from it, returns (valid, message)
+# kind - MYSTERY, EVENT or ENEMY, recognized from the first line of the file if not given
+def validate(ito_filepath, mod_dir="", mod_root="", print_prefix="", print_info=True, jobs=1, cache=None, dependency_index=None, fs=None, diagnostics=None, kind=None):
+
+    if fs is None:
+        fs = OS_FILE_SYSTEM
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector()
+
+    basename = os.path.basename(ito_filepath)
+
+    try:
+        if kind is None:
+            kind = read_kind(ito_filepath, fs)
+            if kind in (MYSTERY, EVENT, ENEMY):
+                diagnostics.print(f"Recognized {kind} file")
+        if kind == MYSTERY:
+            from validate_mystery import validate_mystery
+            return validate_mystery(ito_filepath, mod_dir, mod_root, None, None, print_prefix, print_info, jobs, cache, fs, dependency_index, diagnostics)
+        elif kind == EVENT:
+            from validate_event import validate_event
+            return validate_event(ito_filepath, mod_dir, mod_root, None, None, print_prefix, print_info, jobs, cache, fs, dependency_index, diagnostics)
+        elif kind == ENEMY:
+            from validate_enemy import validate_enemy
+            # Enemies don't link other files, so everything recorded belongs to this one
+            enemy_fs = RecordingFileSystem(fs) if dependency_index is not None else fs
+            valid, message = validate_enemy(ito_filepath, mod_dir, mod_root, None, None, print_prefix, print_info, None, enemy_fs, diagnostics)
+            if dependency_index is not None:
+                dependency_index.set_dependencies(ito_filepath, enemy_fs.checked)
+            return valid, message
+        else:
+            diagnostics.add(Diagnostic(ito_filepath, 1, None, PARSE_ERROR, ERROR, "Unrecognized file type"))
+            return False, f"{basename}: Unrecognized file type"
+    except Exception as e:
+        diagnostics.add(Diagnostic(ito_filepath, None, None, PARSE_ERROR, ERROR, f"An error occurred: {str(e)}"))
+        return False, f"An error occurred: {str(e)}"
+
+# Validates with fs, or an index of mod_root built for this run only
+def validate_in_mod_root(ito_filepath, mod_dir, mod_root, kind, jobs, cache, diagnostics, check_assets, fs=None):
+    enable_content_checks(check_assets)
+    if fs is not None:
+        return validate(ito_filepath, mod_dir, mod_root, jobs=jobs, cache=cache, fs=fs, diagnostics=diagnostics, kind=kind)
+    fs = open_file_system(mod_root)
+    try:
+        if check_assets:
+            # Headers of every image and sound in the mod are read at once, checks then find them in memory
+            from scripts.asset_headers import prefetch_headers
+            prefetch_headers(fs.filepaths, fs)
+        return validate(ito_filepath, mod_dir, mod_root, jobs=jobs, cache=cache, fs=fs, diagnostics=diagnostics, kind=kind)
+    finally:
+        fs.close()
+
+# Library entry point, validates a .ito file and everything linked from it and returns a Report
+# Prints nothing unless reporter is given, e.g. one from reporters.create_reporter as the command line validators do,
+# text printed by validators only goes to the reporter, never to sys.stdout directly
+# Config tables, compiled rules and loaded checks are kept between calls in the same process,
+# pass the same ValidationCache(mod_root, CONFIG_PATH, persistent=False) to also reuse results of unchanged linked files
+# ito_filepath - may be inside a .zip archive, e.g. my_mystery.zip/mystery/mystery.ito, or the archive itself if it contains a single mystery
+#                such mods are read from the archive without extracting them
+# mod_root - directory paths in the mod are resolved from, defaults to location of ito_filepath
+# profiler - optional profiler.Profiler, measures the run until it returns
+# check_assets - also check format, size and bit depth of referenced images and sounds by reading their headers
+# fs - index of mod_root shared with other calls, e.g. of a whole mods directory, it's left open and the caller reads ahead asset headers for it
+# diagnostics - collector shared with other calls, e.g. by validate_batch.py, whose reporter is started and finished by the caller
+#               max_errors and reporter are ignored then, the Report only holds what this call added
+# Raises ValueError for a game version or language that's not in config, or an archive without a single mystery
+def validate_path(ito_filepath, mod_dir=DEFAULT_MOD_DIR, mod_root="", kind=None, game_version=DEFAULT_GAME_VERSION, language=DEFAULT_LANGUAGE, jobs=1, cache=None, max_errors=None, reporter=None, profiler=None, check_assets=False, fs=None, diagnostics=None):
+
+    valid, message = select_profile(CONFIG_PATH, game_version, language)
+    if not valid:
+        raise ValueError(message)
+
+    ito_filepath = find_archived_mystery(normalize_path(ito_filepath))
+    mod_dir = normalize_path(mod_dir)
+    mod_root = normalize_path(mod_root) if mod_root else os.path.dirname(ito_filepath)
+
+    if diagnostics is None:
+        diagnostics = DiagnosticCollector(max_errors, reporter)
+    else:
+        reporter = None
+    first_file = len(diagnostics.files)
+    first_diagnostic = len(diagnostics.diagnostics)
+
+    if profiler is not None:
+        # Worker processes are not measured
+        jobs = 1
+        profiler.start(reporter)
+    if reporter is None:
+        valid, message = validate_in_mod_root(ito_filepath, mod_dir, mod_root, kind, jobs, cache, diagnostics, check_assets, fs)
+    else:
+        with reporter:
+            valid, message = validate_in_mod_root(ito_filepath, mod_dir, mod_root, kind, jobs, cache, diagnostics, check_assets, fs)
+            reporter.finish(valid, message)
+    if profiler is not None:
+        profiler.stop()
+
+    return Report(valid, message, diagnostics.files[first_file:], diagnostics.diagnostics[first_diagnostic:])